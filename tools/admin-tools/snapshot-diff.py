@@ -0,0 +1,90 @@
+"""
+Snapshot Diff
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+This script compares two snapshots of a master data file (or two CSV exports) by SKU, and reports every
+product which has been added, removed or changed, including the old and new prices of any price changes.
+
+It saves:
+    - A report of every change (e.g. './processed-data/carpet-diff.csv')
+    - An update file containing only the added and changed rows from the new snapshot, in the same format as
+      the master data (e.g. './processed-data/carpet-diff-updates.xlsx'). This can be run through any of the
+      converters to produce simPRO / Rakata import files for just the products which have changed.
+
+Usage:
+    python snapshot-diff.py "../../archived/Carpet 2024-05-28.xlsx" ../../data/carpet.xlsx
+    python snapshot-diff.py old.csv new.csv --key "Part Number" --prices "Cost Price,Sell Price (Tier 1 (Buy))"
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.snapshots import PRICE_COLUMNS, diff_snapshots
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two snapshots of a master data file.")
+    parser.add_argument("old", help="The earlier snapshot (XLSX or CSV)")
+    parser.add_argument("new", help="The later snapshot (XLSX or CSV)")
+    parser.add_argument("--key", default="SKU", help="The column which identifies each product (default: SKU)")
+    parser.add_argument("--prices", default=",".join(PRICE_COLUMNS),
+                        help="Comma separated list of price columns (default: the cost and sell prices)")
+    parser.add_argument("--ignore", default="", help="Comma separated list of columns not to compare")
+    parser.add_argument("--output", help="Where to save the report (default: ./processed-data/<new>-diff.csv)")
+    args = parser.parse_args()
+
+    price_columns = [column.strip() for column in args.prices.split(",") if column.strip()]
+    ignore_columns = [column.strip() for column in args.ignore.split(",") if column.strip()]
+    output_csv = args.output or f"./processed-data/{os.path.splitext(os.path.basename(args.new))[0]}-diff.csv"
+    updates_file = f"{os.path.splitext(output_csv)[0]}-updates{os.path.splitext(args.new)[1]}"
+
+    print("\nSnapshot Diff\n(c) 2024 Woven & Woods\nwj@wovenandwoods.com")
+
+    start = time.perf_counter()
+    report = []
+    updates = []
+    counts = Counter()
+    try:
+        for change in diff_snapshots(args.old, args.new, args.key, price_columns, ignore_columns):
+            counts[change.change] += 1
+            row = change.new if change.new is not None else change.old
+            record = {
+                "Change": change.change,
+                args.key: change.key,
+                "Manufacturer": row.get("Manufacturer"),
+                "Product": row.get("Product", row.get("Description")),
+                "Changed Columns": ", ".join(change.columns),
+            }
+            for column in price_columns:
+                record[f"Old {column}"] = change.old.get(column) if change.old is not None else None
+                record[f"New {column}"] = change.new.get(column) if change.new is not None else None
+            report.append(record)
+            if change.new is not None:
+                updates.append(change.new)
+    except (FileNotFoundError, KeyError) as e:
+        sys.exit(print(f"\nError: {e}\n"))
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_csv)), exist_ok=True)
+    pd.DataFrame(report).to_csv(output_csv, index=False)
+    if updates_file.endswith(".csv"):
+        pd.DataFrame(updates).to_csv(updates_file, index=False)
+    else:
+        pd.DataFrame(updates).to_excel(updates_file, index=False)
+
+    print("\nSummary\n---------------------")
+    for change in ["Added", "Removed", "Price Changed", "Changed"]:
+        print(f"{change:<16}{counts[change]}")
+    print(f"\nCompared in {time.perf_counter() - start:.2f}s")
+    print(f"\nReport saved to '{output_csv}'")
+    print(f"Added and changed rows saved to '{updates_file}'\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
+import os
+import sys
 import pandas as pd
 import tkinter as tk
 from tkinter import filedialog
 from tkinter.messagebox import showinfo
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.xlsx import read_sheet
+
 def select_xlsx_file():
     # Create a Tkinter root window
     root = tk.Tk()
@@ -14,17 +19,11 @@ def select_xlsx_file():
     return input_file
 
 def process_xlsx(input_file):
-    # Read all sheets from the XLSX file
-    xls = pd.ExcelFile(input_file)
-    all_sheets = xls.sheet_names
-
-    # Initialize an empty DataFrame to store merged data
-    merged_df = pd.DataFrame()
+    # Read all sheets from the XLSX file in one pass, ignoring row 1 (header is row 2)
+    sheets = read_sheet(input_file, sheet_name=None, header=1)
 
-    # Iterate through each sheet and merge data
-    for sheet_name in all_sheets:
-        df = pd.read_excel(xls, sheet_name, header=1)  # Ignore row 1 (header is row 2)
-        merged_df = merged_df._append(df, ignore_index=True)
+    # Merge the sheets, in order, in one go
+    merged_df = pd.concat(sheets.values(), ignore_index=True, sort=False)
 
     # Remove empty rows
     merged_df.dropna(axis=0, how='all', inplace=True)
@@ -0,0 +1,154 @@
+"""
+Batch Converter Runner
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+This script runs any selection of the (non-interactive) converters in a single Python process.
+
+Each master workbook in the data folder is parsed once and kept in memory, and every converter which uses it
+is given a copy of the parsed data instead of reading the XLSX file again. Pandas is only imported once.
+
+Each converter is run from its own folder, exactly as if it had been run directly, so its output files are
+written to the same 'processed-data' folders as usual.
+
+Usage:
+    python run-converters.py                          # Run every converter
+    python run-converters.py carpet-simpro wood-rakata  # Run only the named converters
+    python run-converters.py --incremental            # Only rewrite changed manufacturer files
+    python run-converters.py --parallel=4             # Use 4 processes per converter (where supported)
+    python run-converters.py --instrument             # Time each stage of each converter (see common/instrument.py)
+    python run-converters.py --profile                # Find each converter's hot spots (see common/profiling.py)
+    python run-converters.py --list                   # List the available converters
+"""
+
+import argparse
+import os
+import runpy
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common import instrument
+from common.suppliers import reset_counts
+from common.workbooks import preload
+
+tools_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+data_dir = os.path.join(tools_dir, "..", "data")
+
+# Name: (script, master workbook)
+converters = {
+    "carpet-simpro": ("simpro-data-converter/carpet-simpro-data-converter.py", "carpet.xlsx"),
+    "vinyl-simpro": ("simpro-data-converter/vinyl-simpro-data-converter.py", "vinyl.xlsx"),
+    "wood-simpro": ("simpro-data-converter/wood-simpro-data-converter.py", "wood.xlsx"),
+    "carpet-rakata": ("rakata-data-converter/carpet-rakata-data-converter.py", "carpet.xlsx"),
+    "vinyl-rakata": ("rakata-data-converter/vinyl-rakata-data-converter.py", "vinyl.xlsx"),
+    "wood-rakata": ("rakata-data-converter/wood-rakata-data-converter.py", "wood.xlsx"),
+    "ancillaries-rakata": ("rakata-data-converter/ancillaries-rakata-data-converter.py", "ancillaries.xlsx"),
+    "carpet-website": ("website-data-converter/rakata-carpet-website-data-converter.py", "carpet.xlsx"),
+    "runner-website": ("website-data-converter/rakata-runner-website-data-converter.py", "runners.xlsx"),
+    "vinyl-website": ("website-data-converter/rakata-vinyl-website-data-converter.py", "vinyl.xlsx"),
+    "carpet-ticket": ("ticket-data-converter/carpet-ticket-data-converter.py", "carpet.xlsx"),
+}
+
+# The Rakata converters also look up supplier emails
+supplier_workbook = "suppliers.xlsx"
+
+
+def run_converter(script):
+    """
+    Runs a converter script as if it had been run from its own folder. Returns True if it finished.
+    """
+    script_path = os.path.abspath(os.path.join(tools_dir, script))
+    script_dir = os.path.dirname(script_path)
+    previous_dir = os.getcwd()
+    os.chdir(script_dir)
+    sys.path.insert(0, script_dir)
+    reset_counts()  # So each converter only reports its own unknown suppliers
+    instrument.start()
+    try:
+        runpy.run_path(script_path, run_name="__main__")
+        return True
+    except SystemExit:
+        return False
+    except Exception as e:
+        print(f"\nError: {e}\n")
+        return False
+    finally:
+        instrument.finish()  # Saved to the converter's own processed-data folder
+        sys.path.remove(script_dir)
+        os.chdir(previous_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several converters in one process.")
+    parser.add_argument("names", nargs="*", help="Converters to run (default: all)")
+    parser.add_argument("--list", action="store_true", help="List the available converters and exit")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only rewrite the per-manufacturer files which have changed (where supported)")
+    parser.add_argument("--db", action="store_true",
+                        help="Read the master data from the product database instead of the workbooks")
+    parser.add_argument("--parallel", nargs="?", const=0, type=int, metavar="N",
+                        help="Process each manufacturer separately, in N processes (default: one per core), "
+                             "where supported")
+    parser.add_argument("--instrument", nargs="?", const="", metavar="time",
+                        help="Report the time (and, unless --instrument=time, the memory) used by each stage of "
+                             "each converter")
+    parser.add_argument("--profile", nargs="?", const="", metavar="sample",
+                        help="Profile each converter with cProfile (or, with --profile=sample, by sampling) and "
+                             "save its call stacks for flame graphs")
+    args = parser.parse_args()
+    if args.instrument not in (None, "", "time"):
+        parser.error("--instrument can only be given 'time'")
+    if args.profile not in (None, "", "sample"):
+        parser.error("--profile can only be given 'sample'")
+
+    if args.list:
+        for name, (script, workbook) in converters.items():
+            print(f"{name:<20}{workbook:<20}{script}")
+        return
+
+    unknown = [name for name in args.names if name not in converters]
+    if unknown:
+        sys.exit(print(f"\nUnknown converter(s): {', '.join(unknown)}. Use --list to see the options.\n"))
+    selected = args.names or list(converters)
+
+    print("\nBatch Converter Runner\n(c) 2024 Woven & Woods\nwj@wovenandwoods.com")
+
+    # Parse each master workbook once, up front. With --db only the supplier workbook is needed.
+    start = time.perf_counter()
+    workbooks = sorted({converters[name][1] for name in selected}) if not args.db else []
+    if any(name.endswith("-rakata") for name in selected):
+        workbooks.append(supplier_workbook)
+    missing = preload([os.path.abspath(os.path.join(data_dir, workbook)) for workbook in workbooks])
+    print(f"\nLoaded {len(workbooks) - len(missing)} workbook(s) in {time.perf_counter() - start:.2f}s")
+    for path in missing:
+        print(f"Not found: {path}")
+    instrument.finish(save=False)
+
+    # Run the converters, passing on --incremental, --db, --parallel, --instrument and --profile if they were given
+    converter_args = [option for option, given in (("--incremental", args.incremental), ("--db", args.db)) if given]
+    if args.parallel is not None:
+        converter_args.append(f"--parallel={args.parallel}" if args.parallel else "--parallel")
+    if args.instrument is not None:
+        converter_args.append(f"--instrument={args.instrument}" if args.instrument else "--instrument")
+    if args.profile is not None:
+        converter_args.append(f"--profile={args.profile}" if args.profile else "--profile")
+    results = []
+    argv = sys.argv
+    for name in selected:
+        script = converters[name][0]
+        print(f"\n==================== {name} ====================")
+        sys.argv = [script] + converter_args
+        start = time.perf_counter()
+        finished = run_converter(script)
+        results.append((name, finished, time.perf_counter() - start))
+    sys.argv = argv
+
+    print("\nSummary\n---------------------")
+    for name, finished, duration in results:
+        print(f"{name:<20}{'OK' if finished else 'FAILED':<8}{duration:.2f}s")
+    print()
+
+
+if __name__ == "__main__":
+    main()
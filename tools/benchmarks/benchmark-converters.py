@@ -0,0 +1,403 @@
+"""
+Converter Benchmark
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+This script times the converters and the GOD List loader against synthetic data (see synthetic_data.py), at one
+or more scales, and saves the results so later runs can be compared with them.
+
+The synthetic data for each scale is generated the first time it's needed and kept in .benchmark-data in the
+root of the repository. Each benchmark runs in a temporary copy of the tools folder, with its own data folder
+and product database, so the real data, database and processed-data folders are never touched.
+
+Every converter is run in a fresh Python process, exactly as it would be run directly, and its time is split
+into three stages:
+    load        Reading the master workbook and the supplier directory (read_master_data,
+                load_supplier_directory)
+    export      Writing CSV files (CatalogueWriter, export_groups and DataFrame.to_csv)
+    transform   Everything else
+The GOD List benchmark loads the GOD Lists (load), matches the synthetic wood products against them (transform,
+only if rapidfuzz is installed) and saves the merged GOD List (export).
+
+By default the on-disk workbook cache (see common/workbooks.py) is cleared before every run, so the load stage
+includes parsing the XLSX file. With --warm the cache is filled first, to time loads from the cache instead.
+With --repeat N each benchmark is run N times and the fastest run is kept.
+
+The results are saved to benchmarks/results as JSON. --compare prints the change since an earlier result file
+('latest' for the most recent one), marking anything which has slowed down by more than --threshold percent.
+
+Usage:
+    python benchmark-converters.py                             # Every benchmark, 1,000 products per workbook
+    python benchmark-converters.py --rows 1000 10000 100000    # At several scales
+    python benchmark-converters.py carpet-simpro wood-rakata   # Only the named benchmarks
+    python benchmark-converters.py --compare latest            # Compare with the last saved results
+    python benchmark-converters.py --list                      # List the available benchmarks
+"""
+
+import argparse
+import datetime
+import functools
+import glob
+import json
+import os
+import platform
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+from synthetic_data import GOD_LISTS, write_data
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+tools_dir = os.path.join(benchmarks_dir, "..")
+data_cache_dir = os.path.join(tools_dir, "..", ".benchmark-data")
+results_dir = os.path.join(benchmarks_dir, "results")
+
+# Name: script (relative to the tools folder), as in batch-runner/run-converters.py
+converters = {
+    "carpet-simpro": "simpro-data-converter/carpet-simpro-data-converter.py",
+    "vinyl-simpro": "simpro-data-converter/vinyl-simpro-data-converter.py",
+    "wood-simpro": "simpro-data-converter/wood-simpro-data-converter.py",
+    "installation-simpro": "simpro-data-converter/installation-simpro-data-converter.py",
+    "carpet-rakata": "rakata-data-converter/carpet-rakata-data-converter.py",
+    "vinyl-rakata": "rakata-data-converter/vinyl-rakata-data-converter.py",
+    "wood-rakata": "rakata-data-converter/wood-rakata-data-converter.py",
+    "ancillaries-rakata": "rakata-data-converter/ancillaries-rakata-data-converter.py",
+    "carpet-website": "website-data-converter/rakata-carpet-website-data-converter.py",
+    "runner-website": "website-data-converter/rakata-runner-website-data-converter.py",
+    "vinyl-website": "website-data-converter/rakata-vinyl-website-data-converter.py",
+    "carpet-ticket": "ticket-data-converter/carpet-ticket-data-converter.py",
+}
+GOD_LIST_BENCHMARK = "god-lists"
+STAGES = ["load", "transform", "export"]
+
+# The answers typed into converters which ask questions: the installation converter doesn't merge duplicates and
+# writes a catalogue import
+ANSWERS = {"installation-simpro": "n\nc\n"}
+
+# The folders the converters write to, inside their own folder
+OUTPUT_FOLDERS = ["carpet", "vinyl", "wood", "ancillaries", "installation"]
+
+
+class StageTimer:
+    """
+    Adds up the time spent in each stage. Functions are assigned to a stage with wrap. If a timed function calls
+    another (e.g. export_groups calls CatalogueWriter.write_frame), only the outer call is counted.
+    """
+
+    def __init__(self):
+        self.times = defaultdict(float)
+        self.active = None
+
+    def wrap(self, owner, name, stage):
+        function = getattr(owner, name)
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            if self.active is not None:
+                return function(*args, **kwargs)
+            self.active = stage
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.times[stage] += time.perf_counter() - start
+                self.active = None
+
+        setattr(owner, name, timed)
+
+    def stage(self, stage, function, *args, **kwargs):
+        """
+        Calls function, counting all of its time towards stage.
+        """
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.times[stage] += time.perf_counter() - start
+
+    def result(self, total, finished):
+        result = {stage: round(self.times[stage], 4) for stage in STAGES if stage != "transform"}
+        result["transform"] = round(max(0.0, total - sum(result.values())), 4)
+        result["total"] = round(total, 4)
+        result["finished"] = finished
+        return {key: result[key] for key in [*STAGES, "total", "finished"]}
+
+
+def run_converter(name, workspace, converter_args):
+    """
+    Runs one converter in the workspace (in this process), timing each stage.
+    """
+    workspace_tools = os.path.join(workspace, "tools")
+    sys.path.insert(0, workspace_tools)
+    import pandas as pd
+    import common.exports
+    import common.productdb
+    import common.suppliers
+
+    timer = StageTimer()
+    timer.wrap(common.productdb, "read_master_data", "load")
+    timer.wrap(common.suppliers, "load_supplier_directory", "load")
+    timer.wrap(common.exports, "export_groups", "export")
+    for method in ["write", "write_frame", "close"]:
+        timer.wrap(common.exports.CatalogueWriter, method, "export")
+    timer.wrap(pd.DataFrame, "to_csv", "export")
+
+    script_path = os.path.join(workspace_tools, converters[name])
+    os.chdir(os.path.dirname(script_path))
+    sys.path.insert(0, os.path.dirname(script_path))
+    sys.argv = [script_path] + converter_args
+    start = time.perf_counter()
+    try:
+        runpy.run_path(script_path, run_name="__main__")
+        finished = True
+    except SystemExit:
+        finished = False  # The converters only exit early if something is wrong, as in the batch runner
+    return timer.result(time.perf_counter() - start, finished)
+
+
+def run_god_lists(workspace, god_list_paths):
+    """
+    Loads the GOD Lists, matches the wood products against them and saves the result, timing each stage.
+    """
+    gl_dir = os.path.join(workspace, "tools", "god-list-utils")
+    sys.path.insert(0, gl_dir)
+    os.chdir(gl_dir)
+    from gl_loader import load_god_lists
+    from common.xlsx import read_sheet
+
+    timer = StageTimer()
+    start = time.perf_counter()
+    gl_data = timer.stage("load", load_god_lists, god_list_paths)
+    wood_data = timer.stage("load", read_sheet, os.path.join(workspace, "data", "wood.xlsx"),
+                            usecols=["Product", "Manufacturer"])
+    try:
+        from gl_matching import match_products
+    except ImportError:
+        print("rapidfuzz isn't installed, so the GOD List matching has been skipped.")
+    else:
+        timer.stage("transform", match_products, wood_data["Product"], wood_data["Manufacturer"], gl_data["Name"],
+                    gl_data["Supplier"])
+    os.makedirs("processed-data", exist_ok=True)
+    timer.stage("export", gl_data.to_csv, "./processed-data/gl-merge-wood-data.csv", index=False)
+    return timer.result(time.perf_counter() - start, True)
+
+
+def child_main(args):
+    """
+    Runs a single benchmark, in the process started by run_benchmark, and saves its result to a JSON file.
+    """
+    name, workspace, result_file, *converter_args = args
+    if name == GOD_LIST_BENCHMARK:
+        god_list_dir = os.path.join(workspace, "god-lists")
+        paths = [os.path.join(god_list_dir, supplier, file_name) for supplier, file_name, *_ in GOD_LISTS]
+        result = run_god_lists(workspace, paths)
+    else:
+        result = run_converter(name, workspace, converter_args)
+    with open(result_file, "w", encoding="UTF-8") as file:
+        json.dump(result, file)
+
+
+def synthetic_data(rows, god_list_rows, seed, regenerate=False):
+    """
+    The folder holding the synthetic data for a scale, generating it if it isn't there yet.
+    """
+    folder = os.path.abspath(os.path.join(data_cache_dir, f"{rows}-rows-{god_list_rows}-gl-rows-seed-{seed}"))
+    if regenerate and os.path.isdir(folder):
+        shutil.rmtree(folder)
+    if not os.path.isdir(folder):
+        print(f"Generating synthetic data ({rows:,} products per workbook)...")
+        start = time.perf_counter()
+        partial = folder + ".part"
+        shutil.rmtree(partial, ignore_errors=True)
+        write_data(partial, rows, god_list_rows, seed)
+        os.replace(partial, folder)
+        print(f"Generated in {time.perf_counter() - start:.2f}s")
+    return folder
+
+
+def create_workspace(workspace, data_folder):
+    """
+    Copies the tools and the synthetic data into the workspace, with empty processed-data folders.
+    """
+    shutil.copytree(os.path.abspath(tools_dir), os.path.join(workspace, "tools"),
+                    ignore=shutil.ignore_patterns("__pycache__", "processed-data", "results"))
+    shutil.copytree(os.path.join(data_folder, "data"), os.path.join(workspace, "data"))
+    shutil.copytree(os.path.join(data_folder, "god-lists"), os.path.join(workspace, "god-lists"))
+    os.makedirs(os.path.join(workspace, "db"))
+    for script in converters.values():
+        for folder in OUTPUT_FOLDERS:
+            os.makedirs(os.path.join(workspace, "tools", os.path.dirname(script), "processed-data", folder),
+                        exist_ok=True)
+
+
+def run_benchmark(name, workspace, converter_args, warm):
+    """
+    Runs one benchmark in a new Python process. Returns its result, and the converter's output. Any questions
+    the converter asks are answered from ANSWERS.
+    """
+    if not warm:
+        shutil.rmtree(os.path.join(workspace, ".workbook-cache"), ignore_errors=True)
+    codes_file = os.path.join(workspace, "db", "variant-codes.db")
+    if os.path.exists(codes_file):
+        os.remove(codes_file)  # So every run assigns its part numbers from scratch
+
+    result_file = os.path.join(workspace, "result.json")
+    command = [sys.executable, os.path.abspath(__file__), "--child", name, workspace, result_file, *converter_args]
+    completed = subprocess.run(command, input=ANSWERS.get(name, ""), capture_output=True, text=True,
+                               encoding="UTF-8")
+    output = completed.stdout + completed.stderr
+    if completed.returncode != 0 or not os.path.exists(result_file):
+        return None, output
+    with open(result_file, encoding="UTF-8") as file:
+        result = json.load(file)
+    os.remove(result_file)
+    return result, output
+
+
+def print_result(name, result):
+    if result is None or not result["finished"]:
+        print(f"{name:<22}FAILED")
+        return
+    times = "".join(f"{result[stage]:>11.3f}s" for stage in [*STAGES, "total"])
+    print(f"{name:<22}{times}")
+
+
+def load_results(path):
+    if path == "latest":
+        saved = sorted(glob.glob(os.path.join(results_dir, "*.json")))
+        if not saved:
+            sys.exit(print("\nError: there are no saved results to compare with.\n"))
+        path = saved[-1]
+    elif not os.path.exists(path) and os.path.exists(os.path.join(results_dir, f"{path}.json")):
+        path = os.path.join(results_dir, f"{path}.json")  # Saved with --save
+    try:
+        with open(path, encoding="UTF-8") as file:
+            return path, json.load(file)
+    except FileNotFoundError:
+        sys.exit(print(f"\nError: results file not found: {path}\n"))
+
+
+def compare_results(baseline_path, baseline, results, threshold):
+    """
+    Prints the change in each stage since the baseline. Returns the number of regressions.
+    """
+    print(f"\nChanges since {os.path.basename(baseline_path)} ({baseline['date']})\n---------------------")
+    print(f"{'':<22}{'rows':>8}" + "".join(f"{stage:>10}" for stage in [*STAGES, "total"]))
+    regressions = 0
+    for scale, scale_results in results["results"].items():
+        for name, result in scale_results.items():
+            before = baseline["results"].get(scale, {}).get(name)
+            if before is None or result is None or not before["finished"] or not result["finished"]:
+                continue
+            changes = []
+            for stage in [*STAGES, "total"]:
+                if before[stage] < 0.005:
+                    changes.append(f"{'':>9}")  # Too quick to compare
+                    continue
+                change = (result[stage] - before[stage]) / before[stage] * 100
+                flag = "!" if change > threshold and stage == "total" else " "
+                regressions += flag == "!"
+                changes.append(f"{change:>+8.0f}%{flag}")
+            print(f"{name:<22}{scale:>8}{''.join(changes)}")
+    if regressions:
+        print(f"\n{regressions} benchmark(s) marked ! are more than {threshold:g}% slower.\n")
+    else:
+        print(f"\nNothing is more than {threshold:g}% slower.\n")
+    return regressions
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        return child_main(sys.argv[2:])
+
+    benchmarks = list(converters) + [GOD_LIST_BENCHMARK]
+    parser = argparse.ArgumentParser(description="Benchmark the converters against synthetic data.")
+    parser.add_argument("names", nargs="*", help="Benchmarks to run (default: all)")
+    parser.add_argument("--list", action="store_true", help="List the available benchmarks and exit")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000],
+                        help="Products in each master workbook. Give several to benchmark each scale.")
+    parser.add_argument("--god-list-rows", type=int, default=1000, help="Products in each GOD List")
+    parser.add_argument("--seed", type=int, default=2024, help="Seed for the synthetic data")
+    parser.add_argument("--regenerate", action="store_true", help="Generate the synthetic data again")
+    parser.add_argument("--repeat", type=int, default=1, help="Run each benchmark N times and keep the fastest")
+    parser.add_argument("--warm", action="store_true", help="Load the workbooks from the workbook cache")
+    parser.add_argument("--parallel", nargs="?", const=0, type=int, metavar="N",
+                        help="Run the converters with --parallel (or --parallel=N)")
+    parser.add_argument("--save", metavar="NAME", help="Name for the results file (default: the date and time)")
+    parser.add_argument("--no-save", action="store_true", help="Don't save the results")
+    parser.add_argument("--compare", metavar="FILE",
+                        help="Compare with a results file (or the name it was saved with), or 'latest'")
+    parser.add_argument("--threshold", type=float, default=10,
+                        help="Percentage slowdown which counts as a regression (default: 10)")
+    args = parser.parse_args()
+
+    if args.list:
+        for name in benchmarks:
+            print(f"{name:<22}{converters.get(name, 'god-list-utils/gl_loader.py')}")
+        return
+
+    unknown = [name for name in args.names if name not in benchmarks]
+    if unknown:
+        sys.exit(print(f"\nUnknown benchmark(s): {', '.join(unknown)}. Use --list to see the options.\n"))
+    selected = args.names or benchmarks
+
+    # Read the baseline first, so a missing file is reported before anything is run
+    baseline = load_results(args.compare) if args.compare else None
+
+    converter_args = []
+    if args.parallel is not None:
+        converter_args.append(f"--parallel={args.parallel}" if args.parallel else "--parallel")
+
+    print("\nConverter Benchmark\n(c) 2024 Woven & Woods\nwj@wovenandwoods.com\n")
+    results = {}
+    for rows in args.rows:
+        data_folder = synthetic_data(rows, args.god_list_rows, args.seed, args.regenerate)
+        print(f"\n{rows:,} products per workbook\n{'':<22}" + "".join(f"{stage:>12}" for stage in [*STAGES, "total"]))
+        scale_results = results[str(rows)] = {}
+        with tempfile.TemporaryDirectory() as workspace:
+            create_workspace(workspace, data_folder)
+            for name in selected:
+                if args.warm:
+                    run_benchmark(name, workspace, converter_args, warm=True)
+                best, output = None, ""
+                for _ in range(max(1, args.repeat)):
+                    result, output = run_benchmark(name, workspace, converter_args, args.warm)
+                    if result is None or not result["finished"]:
+                        best = result
+                        break
+                    if best is None or result["total"] < best["total"]:
+                        best = result
+                scale_results[name] = best
+                print_result(name, best)
+                if best is None or not best["finished"]:
+                    print("\n".join("    " + line for line in output.strip().splitlines()[-10:]))
+
+    summary = {
+        "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
+        "machine": platform.node(),
+        "python": platform.python_version(),
+        "options": {"god_list_rows": args.god_list_rows, "seed": args.seed, "repeat": args.repeat,
+                    "warm": args.warm, "parallel": args.parallel},
+        "results": results,
+    }
+    if not args.no_save:
+        os.makedirs(results_dir, exist_ok=True)
+        name = args.save or datetime.datetime.now().strftime("%Y-%m-%d-%H%M%S")
+        path = os.path.join(results_dir, f"{name}.json")
+        with open(path, "w", encoding="UTF-8") as file:
+            json.dump(summary, file, indent=2)
+        print(f"\nResults saved to {os.path.abspath(path)}")
+
+    if baseline is not None:
+        regressions = compare_results(*baseline, summary, args.threshold)
+        if regressions:
+            sys.exit(1)
+    print()
+
+
+if __name__ == "__main__":
+    main()
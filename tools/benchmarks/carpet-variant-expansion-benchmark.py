@@ -0,0 +1,182 @@
+"""
+Carpet Variant Expansion Benchmark
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+This script compares the original row-by-row variant expansion used by the simPRO carpet converter
+(one single-row DataFrame per colour/width variation, concatenated onto the output) with the column-wise
+'expand_variants' function that replaced it.
+
+A synthetic carpet catalogue is generated so that the benchmark can be run without access to the master data.
+Both versions are run against the same catalogue, the resulting CSV output is checked to be identical and
+the timings are printed.
+
+Usage:
+    python carpet-variant-expansion-benchmark.py [--ranges 200] [--colours 12] [--widths 3]
+"""
+
+import argparse
+import datetime
+import hashlib
+import importlib.util
+import os
+import random
+import re
+import time
+
+import pandas as pd
+
+CONVERTER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "simpro-data-converter",
+                              "carpet-simpro-data-converter.py")
+
+
+def load_converter():
+    """
+    Imports the carpet converter. The file name contains hyphens, so it can't be imported normally.
+    """
+    spec = importlib.util.spec_from_file_location("carpet_simpro_data_converter", CONVERTER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def synthetic_catalogue(ranges, colours, widths, seed=2024):
+    """
+    Generates a carpet catalogue with the same columns as carpet.xlsx.
+    """
+    rng = random.Random(seed)
+    manufacturers = ["Abingdon Carpets", "Cormar Carpets", "Victoria Carpets", "Ulster Carpets", "Brockway"]
+    width_options = ["2.5", "3.66", "4", "5"]
+    rows = []
+    for i in range(ranges):
+        cost = round(rng.uniform(8, 60), 2)
+        sell_inc = round(cost * rng.uniform(1.8, 2.4))
+        colour_count = rng.choice([1, colours, colours])
+        rows.append({
+            "SKU": f"CA{10000 + i}SYN",
+            "Product": f"Range {i}",
+            "Manufacturer": rng.choice(manufacturers),
+            "Category": "Carpet",
+            "Type": "Carpet",
+            "Material": "80% Wool",
+            "Widths": ", ".join(rng.sample(width_options, min(widths, len(width_options)))),
+            "Colours": ", ".join(f"Colour {i}-{c}" for c in range(colour_count)),
+            "Cost ex VAT": cost,
+            "Sell ex VAT": sell_inc / 6 * 5,
+            "Sell inc VAT": sell_inc,
+            "Twickenham": rng.choice(["Yes", None]),
+            "Richmond": rng.choice(["Yes", None]),
+            "Show on Website?": "Yes",
+            "Discontinued?": "Yes" if rng.random() < 0.05 else None,
+        })
+    return pd.DataFrame(rows)
+
+
+def legacy_sku_field(sku, colour, width):
+    """
+    The original sku_field, which hashed every variation's colour and width.
+    """
+    return f"{sku}-{hashlib.sha1((colour + width).encode('UTF-8')).hexdigest()[:5].upper()}"
+
+
+def legacy_note_field(sell_price, twickenham, richmond):
+    """
+    The original note_field, which worked out the date and built the notes for every variation.
+    """
+    update_date = datetime.datetime.now().strftime("%d-%b-%Y")
+    location_data = [loc for loc, flag in zip(["Twickenham", "Richmond"], [twickenham, richmond]) if flag == "Yes"]
+    return (f"<div>Price per SQM: £{"{0:.2f}".format(sell_price)} inc VAT</div>"
+            f"<div>Locations: {', '.join(location_data) if len(location_data) > 0 else 'None'}</div>"
+            f"<br>"
+            f"<div>Updated: {update_date}</div>")
+
+
+def legacy_expand_variants(converter, df):
+    """
+    The original row-by-row expansion, kept here as the reference implementation.
+    """
+    transformed_data = pd.DataFrame(columns=[
+        "Description",
+        "Part Number",
+        "Manufacturer",
+        "Cost Price",
+        "Trade Price",
+        "Sell Price (Tier 1 (Buy))",
+        "Group (Ignored for Updates)",
+        "Subgroup 1 (Ignored for Updates)",
+        "Search Terms",
+        "Notes"
+    ])
+
+    for _, row in df.iterrows():
+        if row['Discontinued?'] == 'Yes':
+            continue
+
+        colour_list = str(row['Colours']).split(",") if row['Colours'] is not None else [""]
+        width_list = str(row['Widths']).split(",") if row['Widths'] is not None else [""]
+
+        if len(colour_list) <= 1:
+            colour_list = [None]
+
+        for colour in colour_list:
+            for width in width_list:
+                if colour is None:
+                    description = f"{row['Product']} ({width.strip()} M)"
+                    part_number = legacy_sku_field(row['SKU'], "", width.strip())
+                    search_terms = f"{row['Manufacturer']} {row['Product']} {width}"
+                else:
+                    description = f"{row['Product']} {colour} ({width.strip()} M)"
+                    part_number = legacy_sku_field(row['SKU'], colour.strip(), width.strip())
+                    search_terms = f"{row['Manufacturer']} {row['Product']} {colour} {width}"
+                new_data = pd.DataFrame({
+                    "Description": [re.sub(' +', ' ', description)],
+                    "Part Number": [part_number],
+                    "Manufacturer": [row['Manufacturer']],
+                    "Cost Price": [float(row['Cost ex VAT']) * float(width)],
+                    "Trade Price": [float(row['Cost ex VAT']) * float(width)],
+                    "Sell Price (Tier 1 (Buy))": [float(row['Sell ex VAT']) * float(width)],
+                    "Group (Ignored for Updates)": [row['Category']],
+                    "Subgroup 1 (Ignored for Updates)": [row['Type']],
+                    "Search Terms": search_terms,
+                    "Notes": [legacy_note_field(row['Sell inc VAT'], row['Twickenham'], row['Richmond'])]
+                })
+                transformed_data = pd.concat([transformed_data.astype(transformed_data.dtypes),
+                                              new_data.astype(transformed_data.dtypes)])
+
+    return transformed_data
+
+
+def time_it(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the carpet variant expansion.")
+    parser.add_argument("--ranges", type=int, default=200, help="Number of carpet ranges to generate")
+    parser.add_argument("--colours", type=int, default=12, help="Number of colours per multi-colour range")
+    parser.add_argument("--widths", type=int, default=3, help="Number of widths per range (max 4)")
+    args = parser.parse_args()
+
+    converter = load_converter()
+    df = synthetic_catalogue(args.ranges, args.colours, args.widths)
+
+    legacy_data, legacy_time = time_it(legacy_expand_variants, converter, df)
+    new_data, new_time = time_it(converter.expand_variants, df)
+
+    print("\nCarpet Variant Expansion Benchmark\n(c) 2024 Woven & Woods\nwj@wovenandwoods.com\n")
+    print(f"Ranges:             {len(df)}")
+    print(f"Variations:         {len(new_data)}")
+    print(f"Row-by-row:         {legacy_time:.3f}s")
+    print(f"Column-wise:        {new_time:.3f}s")
+    print(f"Speedup:            {legacy_time / new_time:.1f}x")
+
+    if legacy_data.to_csv(index=False) == new_data.to_csv(index=False):
+        print("\nOutput is identical.\n")
+    else:
+        print("\nWarning: the outputs do not match!\n")
+
+
+if __name__ == "__main__":
+    main()
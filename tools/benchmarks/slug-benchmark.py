@@ -0,0 +1,139 @@
+"""
+Slug and Image URL Benchmark
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+This script compares the original per-row generate_slug / generate_image_url functions used by the website
+converters with the column-wise slug_column / image_url_column functions in common/slugs.py.
+
+A synthetic catalogue of carpet ranges is generated (50,000 colours by default), including accented characters,
+apostrophes and other punctuation. Both versions are run against it, the slugs and image URLs are checked to be
+identical and the timings are printed.
+
+Usage:
+    python slug-benchmark.py [--colours 50000] [--colours-per-range 25]
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+import unicodedata
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.slugs import image_url_column, slug_column
+
+
+def legacy_generate_slug(product_name, colour):
+    """
+    The original generate_slug, kept here as the reference implementation.
+    """
+    if not colour.strip():
+        slug_str = product_name.lower()
+    else:
+        slug_str = f"{product_name}-{colour}"
+
+    slug = (
+        slug_str
+        .replace("-", " ")
+        .replace("'", "")
+        .translate(str.maketrans("", "", string.punctuation))
+        .replace(" ", "-")
+        .rstrip("-")
+    )
+    slug = unicodedata.normalize("NFKD", slug).encode("ascii", "ignore").decode("ascii")
+    return legacy_compress_dashes(slug.lower())
+
+
+def legacy_generate_image_url(category, manufacturer, product_name, colour):
+    """
+    The original generate_image_url from the carpet converter.
+    """
+    processed_product_name = (
+        product_name
+        .replace("-", " ")
+        .replace("'", "")
+        .translate(str.maketrans("", "", string.punctuation))
+        .replace(" ", "-")
+    )
+    image_url = (f"product-images/{category}/{manufacturer}/{processed_product_name}"
+                 f"/{legacy_generate_slug(product_name, colour)}.jpg")
+    return legacy_compress_dashes(image_url.replace(" ", "-").lower())
+
+
+def legacy_compress_dashes(text):
+    compressed_text = ""
+    prev_char = None
+    for char in text:
+        if char == "-" and prev_char == "-":
+            continue
+        compressed_text += char
+        prev_char = char
+    return compressed_text
+
+
+def synthetic_catalogue(colours, colours_per_range, seed=2024):
+    """
+    Generates lists of categories, manufacturers, product names and colours, one entry per colour.
+    """
+    rng = random.Random(seed)
+    manufacturers = ["Abingdon Carpets", "Cormar Carpets", "Hall’s Floorings", "Crucial Trading", "Kersaint Cobb"]
+    words = ["Grand", "Château", "Naturel", "Berber", "Twist", "Loop", "Saxony", "Velours", "d'Or", "Élan",
+             "Wool-Rich", "Heathers", "(Plus)", "80/20", "Ivory", "Crème", "Slate", "Moss", "Sable", "Noir"]
+    categories, makers, products, colour_names = [], [], [], []
+    for i in range(0, colours, colours_per_range):
+        manufacturer = rng.choice(manufacturers)
+        product = f"{' '.join(rng.sample(words, 3))} {i // colours_per_range}"
+        for c in range(min(colours_per_range, colours - i)):
+            categories.append("Carpet")
+            makers.append(manufacturer)
+            products.append(product)
+            colour_names.append("" if c == 0 and rng.random() < 0.1 else f"{' '.join(rng.sample(words, 2))} {c}")
+    return categories, makers, products, colour_names
+
+
+def time_it(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def legacy(categories, manufacturers, products, colours):
+    slugs = [legacy_generate_slug(product, colour) for product, colour in zip(products, colours)]
+    image_urls = [legacy_generate_image_url(category, manufacturer, product, colour)
+                  for category, manufacturer, product, colour in zip(categories, manufacturers, products, colours)]
+    return slugs, image_urls
+
+
+def column_wise(categories, manufacturers, products, colours):
+    slugs = slug_column(products, colours)
+    return slugs.tolist(), image_url_column(categories, manufacturers, products, colours, slugs=slugs).tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the slug and image URL generation.")
+    parser.add_argument("--colours", type=int, default=50000, help="Number of colours to generate")
+    parser.add_argument("--colours-per-range", type=int, default=25, help="Number of colours per range")
+    args = parser.parse_args()
+
+    catalogue = synthetic_catalogue(args.colours, args.colours_per_range)
+
+    legacy_data, legacy_time = time_it(legacy, *catalogue)
+    new_data, new_time = time_it(column_wise, *catalogue)
+
+    print("\nSlug and Image URL Benchmark\n(c) 2024 Woven & Woods\nwj@wovenandwoods.com\n")
+    print(f"Colours:            {len(catalogue[0])}")
+    print(f"Per row:            {legacy_time:.3f}s")
+    print(f"Column-wise:        {new_time:.3f}s")
+    print(f"Speedup:            {legacy_time / new_time:.1f}x")
+
+    if legacy_data == new_data:
+        print("\nSlugs and image URLs are identical.\n")
+    else:
+        print("\nWarning: the outputs do not match!\n")
+
+
+if __name__ == "__main__":
+    main()
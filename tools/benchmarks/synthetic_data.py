@@ -0,0 +1,295 @@
+"""
+Synthetic Product Data
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+Generates master workbooks and GOD Lists full of made-up products, so the converters can be benchmarked (see
+benchmark-converters.py) without access to the real data on Google Drive.
+
+The workbooks have the same file names, columns and column order as the ones in the data folder, and the values
+look like the real ones:
+- Carpets have 1 to 25 colours (about 10 on average) and 1 to 4 widths, runners a single width in mm
+- Vinyl has a few colours per range, wood has none
+- Product names, colours and manufacturers include accents, apostrophes and other punctuation
+- About 40% of products are in each showroom, 70% are on the website and 5% are discontinued
+- A few suppliers are left out of suppliers.xlsx, so the Rakata converters have unknown suppliers to report
+installation-rates.xlsx also has the 'SKU' and 'Type' columns the installation converter reads.
+
+The GOD Lists are laid out like the real ones: a title row above the column headers, with the names and cost
+columns each supplier's GOD List uses (see god-list-utils/gl_loader.py), plus columns the tools don't read. The
+wood products are named after GOD List products, so most of them can be matched.
+
+The same number of rows and seed always gives exactly the same files.
+
+Usage:
+    python synthetic_data.py [--rows 10000] [--god-list-rows 1000] [--seed 2024] [--output ./synthetic-data]
+"""
+
+import argparse
+import os
+import random
+
+from openpyxl import Workbook
+
+COLUMNS = {
+    "carpet": ["SKU", "Product", "Manufacturer", "Supplier", "Category", "Sub-Category", "Type", "Material", "Widths",
+               "Colours", "Cost ex VAT", "Sell ex VAT", "Sell inc VAT", "Twickenham", "Richmond", "Show on Website?",
+               "Discontinued?"],
+    "vinyl": ["SKU", "Product", "Manufacturer", "Supplier", "Category", "Type", "Thickness", "Pack Quantity", "Width",
+              "Length", "Colours", "Cost ex VAT", "Sell ex VAT", "Sell inc VAT", "Twickenham", "Richmond",
+              "Discontinued?", "Show on Website?"],
+    "wood": ["SKU", "Product", "Manufacturer", "Supplier", "Category", "Type", "Thickness", "Pack Quantity", "Species",
+             "Finish", "Width", "Length", "Cost ex VAT", "Sell ex VAT", "Sell inc VAT", "Twickenham", "Richmond",
+             "Discontinued?", "Show on Website?"],
+    "runners": ["SKU", "Product", "Manufacturer", "Category", "Material", "Width", "Colours", "Cost ex VAT",
+                "Sell ex VAT", "Sell inc VAT", "Twickenham", "Richmond", "Discontinued?", "Show on Website?"],
+    "ancillaries": ["SKU", "Product", "Manufacturer", "Supplier", "Category", "Type", "Cost ex VAT", "Sell ex VAT",
+                    "Sell inc VAT", "Discontinued?"],
+    "installation-rates": ["SKU", "Installation Item", "Unit", "Cost", "Sell (Exc.)", "Sell (Inc.)", "Category",
+                           "Type"],
+    "suppliers": ["Supplier ID", "Name", "Account No", "Email", "Work Phone", "Website", "Mail Street Address",
+                  "Mail Suburb", "Mail State", "Mail Post Code", "Mail Country"],
+}
+
+MANUFACTURERS = {
+    "carpet": ["Abingdon Carpets", "Cormar Carpets", "Victoria Carpets", "Ulster Carpets", "Brockway", "Westex",
+               "Crucial Trading", "Kersaint Cobb", "Alternative Flooring", "Hugh Mackay", "Brintons",
+               "Hall’s Floorings", "Riviera Home", "Fibre", "Jacaranda"],
+    "vinyl": ["Amtico", "Karndean", "Lamett", "Parador", "Woodpecker", "Harvey Maria", "Moduleo", "Polyflor"],
+    "runners": ["Fibre", "Off The Loom", "Roger Oates", "Alternative Flooring", "Crucial Trading"],
+    "ancillaries": ["Alternative Flooring", "Amtico", "Ballister", "Fibre", "Flooring Sales", "F. Ball", "Uzin",
+                    "Bona", "Osmo", "Interfloor"],
+}
+
+# The GOD Lists, as (supplier, file name, name column, cost column, SKU column or None)
+GOD_LISTS = [
+    ("Furlongs", "Furlongs (Wood).xlsx", "W&W Name", "Cost (exc.) (SQM)", None),
+    ("Lamett", "Lamett (Wood).xlsx", "Name", "Trade (exc.) (SQM)", None),
+    ("Panaget", "Panaget.xlsx", "Name", "Inc. Surcharge (< 1 Pallet) & Admin (exc.) (SQM)", "Panaget SKU"),
+    ("Parador", "Parador (Wood).xlsx", "Name", "Trade (exc.) (SQM)", "Parador SKU"),
+    ("Staki", "Staki.xlsx", "W&W Name", "Cost (exc.) (SQM)", None),
+    ("Ted Todd", "Ted Todd.xlsx", "Name", "Trade (exc.) (SQM)", None),
+    ("V4", "V4.xlsx", "Name", "Cost (exc.) (SQM)", None),
+    ("WFA", "WFA.xlsx", "W&W Name", "Trade (exc.) (SQM)", None),
+    ("Woodpecker", "Woodpecker (Wood).xlsx", "Name", "Cost (exc.) (SQM)", None),
+]
+
+# Suppliers which are deliberately left out of suppliers.xlsx
+UNKNOWN_SUPPLIERS = {"Hall’s Floorings", "Jacaranda", "Interfloor"}
+
+WORDS = ["Grand", "Château", "Naturel", "Berber", "Twist", "Loop", "Saxony", "Velours", "d'Or", "Élan", "Wool-Rich",
+         "Heathers", "Plus", "80/20", "Harbour", "Crème", "Meadow", "Highland", "Riviera", "Côte", "Balmoral",
+         "Windsor", "Oxford", "Kensington", "Soho", "Mayfair", "Chelsea", "Kew", "Richmond", "Barnes", "Fulham",
+         "Herringbone", "Chevron", "Rustic", "Select", "Prime", "Heritage", "Classic", "Naturals", "Tweed"]
+COLOURS = ["Ivory", "Slate", "Moss", "Sable", "Noir", "Pebble", "Linen", "Oatmeal", "Charcoal", "Silver", "Stone",
+           "Mink", "Pearl", "Storm Grey", "Sea Salt", "Biscuit", "Mocha", "Sage", "Olive", "Navy", "Teal", "Rouge",
+           "Café au Lait", "Crème Brûlée", "Jet", "Mercury", "Fern Green", "Desert Sands", "Arctic Fox", "Vanilla"]
+WIDTHS = ["2.5", "3.66", "4", "5"]
+MATERIALS = ["80% Wool, 20% Nylon", "100% Wool", "100% Polypropylene", "Sisal", "Seagrass", "Jute", "100% Nylon",
+             "75% Wool, 25% Nylon", "Coir"]
+SPECIES = ["European Oak", "American Walnut", "Ash", "Maple", "Cherry"]
+FINISHES = ["Oil", "Lacquer", "Hardwax Oil", "Brushed & Oiled", "Unfinished", "UV Oil"]
+
+
+def _flag(rng, chance):
+    return "Yes" if rng.random() < chance else None
+
+
+def _name(rng, words=2):
+    return " ".join(rng.sample(WORDS, words))
+
+
+def _prices(rng, low, high):
+    cost = round(rng.uniform(low, high), 2)
+    sell_inc = float(round(cost * rng.uniform(1.6, 2.4)))
+    return cost, sell_inc / 6 * 5, sell_inc
+
+
+def _sku(prefix, i, manufacturer):
+    letters = "".join(c for c in manufacturer.upper() if "A" <= c <= "Z")[:3]
+    return f"{prefix}{10000 + i}{letters}"
+
+
+def carpet(rows, rng):
+    records = []
+    for i in range(rows):
+        manufacturer = rng.choice(MANUFACTURERS["carpet"])
+        colours = rng.sample(COLOURS, min(len(COLOURS), max(1, int(rng.triangular(1, 25, 8)))))
+        records.append([
+            _sku("CA", i, manufacturer), f"{_name(rng)} {i}", manufacturer, manufacturer, "Carpet", "Carpet",
+            rng.choice(["Carpet", "Carpet", "Natural"]), rng.choice(MATERIALS),
+            ", ".join(sorted(rng.sample(WIDTHS, rng.choice([1, 2, 2, 3, 3, 4])), key=float)), ", ".join(colours),
+            *_prices(rng, 8, 60), _flag(rng, 0.4), _flag(rng, 0.4), _flag(rng, 0.7), _flag(rng, 0.05),
+        ])
+    return records
+
+
+def vinyl(rows, rng):
+    records = []
+    for i in range(rows):
+        manufacturer = rng.choice(MANUFACTURERS["vinyl"])
+        records.append([
+            _sku("RE", i, manufacturer), f"{_name(rng)} {i}", manufacturer, manufacturer, "Vinyl",
+            rng.choice(["Plank", "Tile"]), rng.choice(["2.5", "4+1", "5"]), round(rng.uniform(1.5, 3.5), 3),
+            rng.choice([123, 176, 180, 228]), rng.choice([615, 1213, 1220, 1524]),
+            ", ".join(rng.sample(COLOURS, rng.randint(1, 8))), *_prices(rng, 15, 45), _flag(rng, 0.4),
+            _flag(rng, 0.4), _flag(rng, 0.05), _flag(rng, 0.7),
+        ])
+    return records
+
+
+def god_list_names(rows, seed):
+    """
+    The names in each GOD List, as a list of (supplier, [names]). Shared by the GOD Lists and wood.xlsx.
+    """
+    rng = random.Random(seed)
+    return [(supplier, [f"{_name(rng)} {rng.choice(SPECIES)} {rng.choice(FINISHES)} {i}" for i in range(rows)])
+            for supplier, *_ in GOD_LISTS]
+
+
+def wood(rows, rng, names):
+    records = []
+    for i in range(rows):
+        supplier, supplier_names = names[i % len(names)]
+        product = supplier_names[(i // len(names)) % len(supplier_names)]
+        if rng.random() < 0.2:
+            product = product.replace(" ", "  ", 1).upper()  # Close, but not exactly the GOD List name
+        records.append([
+            _sku("WO", i, supplier), product, supplier, supplier, "Wood", rng.choice(["Plank", "Herringbone"]),
+            rng.choice(["14/3", "15/4", "20/6"]), rng.choice([None, round(rng.uniform(1.2, 2.8), 3)]),
+            rng.choice(SPECIES), rng.choice(FINISHES), rng.choice([150, 190, 220, 240]),
+            rng.choice(["600 - 1900", 1200, 2200]), *_prices(rng, 25, 90), _flag(rng, 0.4), _flag(rng, 0.4),
+            _flag(rng, 0.05), _flag(rng, 0.7),
+        ])
+    return records
+
+
+def runners(rows, rng):
+    records = []
+    for i in range(rows):
+        manufacturer = rng.choice(MANUFACTURERS["runners"])
+        records.append([
+            _sku("RU", i, manufacturer), f"{_name(rng)} Runner {i}", manufacturer, "Runner", rng.choice(MATERIALS),
+            rng.choice([600, 650, 700, 800]), ", ".join(rng.sample(COLOURS, rng.randint(1, 8))),
+            *_prices(rng, 40, 120), _flag(rng, 0.4), _flag(rng, 0.4), _flag(rng, 0.05), _flag(rng, 0.7),
+        ])
+    return records
+
+
+def ancillaries(rows, rng):
+    records = []
+    for i in range(rows):
+        manufacturer = rng.choice(MANUFACTURERS["ancillaries"])
+        kind = rng.choice(["Adhesive", "Underlay", "Maintenance", "Gripper", "Trim", "Plank"])
+        records.append([
+            _sku("AN", i, manufacturer), f"{manufacturer} {_name(rng)} {kind} ({rng.choice([1, 5, 6, 15])} KG) {i}",
+            manufacturer, manufacturer, "Ancillaries", kind, *_prices(rng, 2, 80), _flag(rng, 0.05),
+        ])
+    return records
+
+
+def installation(rows, rng):
+    records = []
+    categories = ["Carpet", "Flatwoven Runner", "Vinyl", "Wood", "Underlay", "Stairs", "Uplift"]
+    for i in range(rows):
+        category = rng.choice(categories)
+        cost = round(rng.uniform(5, 400), 2)
+        sell_inc = float(round(cost * rng.uniform(1.2, 1.6)))
+        unit = rng.choice(["Per SQM", "Per Flight", "Per Item"])
+        records.append([
+            f"IN{10000 + i}", f"{category} Installation ({_name(rng)}) {i}", unit, cost, sell_inc / 6 * 5, sell_inc,
+            category, rng.choice(["Labour", "Materials"]),
+        ])
+    return records
+
+
+def suppliers(rng):
+    names = sorted({name for family in MANUFACTURERS.values() for name in family} |
+                   {supplier for supplier, *_ in GOD_LISTS})
+    records = []
+    for i, name in enumerate(names):
+        if name in UNKNOWN_SUPPLIERS:
+            continue
+        domain = "".join(c for c in name.lower() if c.isalnum())
+        records.append([
+            float(i + 1), name, f"ACC{rng.randint(10000, 99999)}", f"sales@{domain}.co.uk",
+            f"01{rng.randint(100, 999)} {rng.randint(100000, 999999)}", f"https://www.{domain}.co.uk",
+            f"Unit {rng.randint(1, 40)}, {_name(rng, 1)} Business Park", _name(rng, 1), "Surrey",
+            f"KT{rng.randint(1, 24)} {rng.randint(1, 9)}AB", "United Kingdom",
+        ])
+    return records
+
+
+def write_workbook(path, columns, records, title=None):
+    """
+    Writes one sheet, with a title row above the column headers if given (as in a GOD List).
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Sheet1")
+    if title is not None:
+        sheet.append([title])
+    sheet.append(columns)
+    for record in records:
+        sheet.append(record)
+    workbook.save(path)
+
+
+def write_god_list(path, supplier, name_column, cost_column, sku_column, names, rng):
+    columns = ["Range"] if supplier == "V4" else []
+    columns += [name_column] + ([sku_column] if sku_column else [])
+    columns += ["Finish", cost_column, "Price (inc.) (SQM)", "Pack Quantity (SQM)", "Notes"]
+    records = []
+    for i, name in enumerate(names):
+        cost = round(rng.uniform(20, 80), 2)
+        record = [f"Range {i % 20}"] if supplier == "V4" else []
+        record += [name] + ([f"{supplier[:3].upper()}{100000 + i}"] if sku_column else [])
+        record += [rng.choice(FINISHES), cost, float(round(cost * rng.uniform(1.6, 2.2))),
+                   round(rng.uniform(1.2, 2.8), 3), rng.choice([None, "New for 2024", "Limited stock"])]
+        records.append(record)
+    write_workbook(path, columns, records, title=f"{supplier} GOD List")
+
+
+def write_data(folder, rows, god_list_rows=1000, seed=2024):
+    """
+    Writes the master workbooks to folder/data and the GOD Lists to folder/god-lists/<supplier>/.
+
+    Returns:
+        The paths of the GOD Lists, in the same order as gl-wood-data-sync.py.
+    """
+    data_dir = os.path.join(folder, "data")
+    os.makedirs(data_dir, exist_ok=True)
+    names = god_list_names(god_list_rows, seed)
+    families = {
+        "carpet": carpet, "vinyl": vinyl, "runners": runners, "ancillaries": ancillaries,
+        "installation-rates": installation, "wood": lambda n, rng: wood(n, rng, names),
+        "suppliers": lambda n, rng: suppliers(rng),
+    }
+    for offset, (family, generate) in enumerate(families.items()):
+        rng = random.Random(seed + offset)
+        write_workbook(os.path.join(data_dir, f"{family}.xlsx"), COLUMNS[family], generate(rows, rng))
+
+    paths = []
+    rng = random.Random(seed + len(families))
+    for (supplier, file_name, name_column, cost_column, sku_column), (_, supplier_names) in zip(GOD_LISTS, names):
+        supplier_dir = os.path.join(folder, "god-lists", supplier)
+        os.makedirs(supplier_dir, exist_ok=True)
+        path = os.path.join(supplier_dir, file_name)
+        write_god_list(path, supplier, name_column, cost_column, sku_column, supplier_names, rng)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic master workbooks and GOD Lists.")
+    parser.add_argument("--rows", type=int, default=10000, help="Products in each master workbook")
+    parser.add_argument("--god-list-rows", type=int, default=1000, help="Products in each GOD List")
+    parser.add_argument("--seed", type=int, default=2024, help="Seed for the random values")
+    parser.add_argument("--output", default="./synthetic-data", help="Folder to write the files to")
+    args = parser.parse_args()
+
+    write_data(args.output, args.rows, args.god_list_rows, args.seed)
+    print(f"\nSynthetic data saved to {os.path.abspath(args.output)}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""
+Shared components used by the converters in the tools folder.
+
+The converter scripts have hyphenated file names and are run directly from their own folders, so they add
+the tools folder to sys.path before importing from here.
+"""
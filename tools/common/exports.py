@@ -0,0 +1,250 @@
+"""
+Per-Manufacturer CSV Exports
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+Splits a converter's output into one CSV file per manufacturer (or supplier), as each converter's
+export_manufacturer_data / export_supplier_data function always has.
+
+CatalogueWriter writes rows as the converter generates them, to the master CSV and to each manufacturer's
+file at the same time, so the whole output never needs to be held in memory. export_groups does the same for
+a converter's finished DataFrame. Either way the output is only passed over once, rather than once for every
+manufacturer.
+
+In incremental mode (run a converter with --incremental), each manufacturer's rows are fingerprinted and
+compared with a manifest saved by the previous incremental run. Only the files for manufacturers whose rows
+have actually changed are written, and these are listed as the files to import. A delta CSV lists every part
+number which has been added, changed or removed since the last run.
+
+The "Updated: <date>" stamp in the notes changes every day, so it's ignored when comparing rows. Otherwise
+every file would be rewritten the first time a converter was run on a new day.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+
+import pandas as pd
+
+from common.instrument import stage
+
+# Parts of a row which change on every run without the product changing
+VOLATILE = re.compile(r"Updated: \d{2}-\w{3}-\d{4}")
+
+
+def incremental_mode():
+    """
+    True if the converter was run with --incremental.
+    """
+    return "--incremental" in sys.argv[1:]
+
+
+def row_hashes(df):
+    """
+    A hash of each row, ignoring the date stamps in the notes. Returned as hex strings for the manifest.
+    """
+    return [row_hash(cells(row)) for row in df.itertuples(index=False, name=None)]
+
+
+def cells(values):
+    """
+    A row's values as the text pandas' to_csv would write for them. Missing values are written as empty cells.
+    """
+    return ["" if value is None or (not isinstance(value, str) and pd.isna(value)) else str(value)
+            for value in values]
+
+
+def row_hash(row_cells):
+    """
+    The hash of one row's cells, ignoring the date stamps in the notes.
+    """
+    text = VOLATILE.sub("", "\x1f".join(row_cells))
+    return hashlib.blake2b(text.encode("UTF-8"), digest_size=8).hexdigest()
+
+
+class CatalogueWriter:
+    """
+    Writes a converter's output as it is generated, to the master CSV (if there is one) and to the CSV for each
+    row's group (manufacturer or supplier), in a single pass. A file is opened for each group the first time one
+    of its rows is written, and kept open until the writer is closed, so only one row is held in memory at a time.
+
+    Args:
+        columns: The column names, in order.
+        group_column: The column to split on (e.g. 'Manufacturer' or 'Default Supplier').
+        folder: The folder the group files are saved to.
+        file_name: A function which returns the file name for a group.
+        key_column: The column which identifies each row (e.g. 'Part Number' or 'SKU'), used for the delta.
+        master_file: Where to save the master CSV, or None.
+        incremental: If True, only groups which have changed since the last run are written.
+        manifest_file: Where the fingerprints from the last run are kept (incremental mode only).
+        delta_file: Where to save the delta CSV (incremental mode only).
+
+    In incremental mode each group is written to a '.part' file next to its CSV, which replaces it when the
+    writer is closed if the group has changed (and is deleted if not).
+    """
+
+    def __init__(self, columns, group_column, folder, file_name, key_column, master_file=None, incremental=False,
+                 manifest_file=None, delta_file=None):
+        self.columns = list(columns)
+        self.group_index = self.columns.index(group_column)
+        self.key_index = self.columns.index(key_column)
+        self.folder = folder
+        self.file_name = file_name
+        self.incremental = incremental
+        self.manifest_file = manifest_file
+        self.delta_file = delta_file
+        self.groups = {}  # Group -> (path, file, csv writer), in the order they were first seen
+        self.manifest = {}
+        self.written = None
+
+        self.master = None
+        if master_file is not None:
+            self.master = open(master_file, "w", encoding="UTF-8", newline="")
+            self.master_writer = self._writer(self.master)
+            self.master_writer.writerow(self.columns)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._close_files()
+
+    @staticmethod
+    def _writer(file):
+        # The same dialect as pandas' to_csv
+        return csv.writer(file, lineterminator=os.linesep)
+
+    def write(self, values):
+        """
+        Writes one row, given as a sequence of values in column order.
+        """
+        row = cells(values)
+        group = values[self.group_index]
+        if self.master is not None:
+            self.master_writer.writerow(row)
+
+        if group not in self.groups:
+            path = os.path.join(self.folder, self.file_name(group))
+            file = open(path + ".part" if self.incremental else path, "w", encoding="UTF-8", newline="")
+            writer = self._writer(file)
+            writer.writerow(self.columns)
+            self.groups[group] = (path, file, writer)
+            self.manifest[str(group)] = {"file": self.file_name(group), "rows": {}}
+        self.groups[group][2].writerow(row)
+
+        if self.incremental:
+            rows = self.manifest[str(group)]["rows"]
+            key = row[self.key_index]
+            # A part number listed more than once is treated as a single entry made up of all its rows
+            rows[key] = rows.get(key, "") + row_hash(row)
+
+    def write_frame(self, df):
+        """
+        Writes every row of a DataFrame whose columns are in the same order.
+        """
+        with stage("export"):
+            for values in df.itertuples(index=False, name=None):
+                self.write(values)
+
+    def _close_files(self):
+        if self.master is not None:
+            self.master.close()
+            self.master = None
+        for _, file, _ in self.groups.values():
+            file.close()
+
+    def close(self):
+        """
+        Closes every file. In incremental mode, the changed group files are put in place and the manifest and
+        delta are saved.
+
+        Returns:
+            The paths of the group files which were written.
+        """
+        if self.written is None:
+            with stage("export"):
+                self.written = self._finish()
+        return self.written
+
+    def _finish(self):
+        self._close_files()
+        if not self.incremental:
+            return [path for path, _, _ in self.groups.values()]
+
+        try:
+            with open(self.manifest_file, encoding="UTF-8") as file:
+                previous = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            previous = {}
+
+        written = []
+        with open(self.delta_file, "w", encoding="UTF-8", newline="") as file:
+            delta = self._writer(file)
+            delta.writerow(["Change", "Group", "Key"] + self.columns)
+            for group, (path, _, _) in self.groups.items():
+                rows = self.manifest[str(group)]["rows"]
+                old_rows = previous.get(str(group), {}).get("rows", {})
+
+                # The rows which have been added or changed are read back from the new file
+                with open(path + ".part", encoding="UTF-8", newline="") as part:
+                    reader = csv.reader(part)
+                    next(reader)
+                    for row in reader:
+                        key = row[self.key_index]
+                        if key not in old_rows:
+                            delta.writerow(["Added", str(group), key] + row)
+                        elif old_rows[key] != rows[key]:
+                            delta.writerow(["Changed", str(group), key] + row)
+                for key in old_rows:
+                    if key not in rows:
+                        delta.writerow(["Removed", str(group), key] + [""] * len(self.columns))
+
+                if rows != old_rows or list(rows) != list(old_rows) or not os.path.exists(path):
+                    os.replace(path + ".part", path)
+                    written.append(path)
+                else:
+                    os.remove(path + ".part")
+
+            # Groups which have disappeared completely
+            for group, entry in previous.items():
+                if group not in self.manifest:
+                    for key in entry["rows"]:
+                        delta.writerow(["Removed", group, key] + [""] * len(self.columns))
+
+        with open(self.manifest_file, "w", encoding="UTF-8") as file:
+            json.dump(self.manifest, file, ensure_ascii=False, indent=1)
+
+        return written
+
+
+def export_groups(df, group_column, folder, file_name, key_column, incremental=False, manifest_file=None,
+                  delta_file=None):
+    """
+    Writes a CSV file for every distinct value of group_column, for converters which build their whole output
+    before exporting it. The arguments are the same as for CatalogueWriter.
+
+    Returns:
+        The paths of the files which were written.
+    """
+    with CatalogueWriter(df.columns, group_column, folder, file_name, key_column, incremental=incremental,
+                         manifest_file=manifest_file, delta_file=delta_file) as writer:
+        writer.write_frame(df)
+    return writer.close()
+
+
+def report_changes(written, delta_file):
+    """
+    Prints the files written in incremental mode, which are the only ones that need importing.
+    """
+    if written:
+        print("\nChanged files to import\n---------------------")
+        print("\n".join(written))
+    else:
+        print("\nNo changes since the last run.")
+    print(f"\nA list of added, changed and removed products has been saved to {delta_file}\n")
@@ -0,0 +1,224 @@
+"""
+Converter Instrumentation
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+Times each stage of a converter run, and measures the memory it uses, when the converter is run with
+--instrument. Nothing is measured otherwise.
+
+    --instrument        Times each stage, and records the most memory in use during it (using tracemalloc)
+    --instrument=time   Only times each stage. tracemalloc makes Python noticeably slower, so use this when
+                        the timings need to be as close as possible to a normal run.
+
+The shared code marks its own stages (reading the workbook, checking the columns, part numbers, notes, slugs,
+writing the CSV files...), so every converter is instrumented without any changes. Converters mark their own
+work with:
+
+    with stage("convert"):
+        ...
+
+Stages can be inside each other (e.g. "read XLSX" happens inside "convert"). Each stage's time is only the time
+spent in it and not in the stages inside it, so the times add up to the total. Anything which isn't inside a
+stage is listed as "(other)". The peak memory of a stage is the most memory Python had allocated at any point
+while it (or a stage inside it) was running.
+
+When the converter finishes, a table of the stages is printed, slowest first, and the same figures are saved as
+JSON to processed-data/<converter>-profile.json (or the current folder, if there's no processed-data folder).
+The batch runner reports each converter separately.
+
+To see which functions the time goes on, run the converter with --profile (see common/profiling.py), which is
+started and stopped along with the stages.
+"""
+
+import atexit
+import datetime
+import json
+import multiprocessing
+import os
+import sys
+import time
+import tracemalloc
+
+from common import profiling
+
+# The profile of the current run, or None if the converter isn't being instrumented
+_profile = None
+_started = False
+_registered = False
+
+
+def instrument_mode():
+    """
+    None if the converter wasn't run with --instrument, otherwise "time" or "memory" (see the top of this file).
+    """
+    for arg in sys.argv[1:]:
+        if arg == "--instrument":
+            return "memory"
+        if arg == "--instrument=time":
+            return "time"
+        if arg.startswith("--instrument="):
+            sys.exit(print(f"\nError: --instrument can only be given 'time', not '{arg.split('=', 1)[1]}'\n"))
+    return None
+
+
+class Profile:
+    def __init__(self, name, memory):
+        self.name = name
+        self.memory = memory
+        self.stages = {}  # Stage -> [calls, seconds, peak bytes], in the order they were first entered
+        self.stack = []  # [stage, start, time in inner stages, peak bytes] for each stage which is running
+        self.start = time.perf_counter()
+        self.peak = 0
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def enter(self, name):
+        if self.memory:
+            if self.stack:
+                self.stack[-1][3] = max(self.stack[-1][3], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self.stack.append([name, time.perf_counter(), 0.0, 0])
+
+    def exit(self):
+        name, start, inner, peak = self.stack.pop()
+        elapsed = time.perf_counter() - start
+        if self.memory:
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            self.peak = max(self.peak, peak)
+            tracemalloc.reset_peak()
+        if self.stack:
+            self.stack[-1][2] += elapsed
+            self.stack[-1][3] = max(self.stack[-1][3], peak)
+
+        totals = self.stages.setdefault(name, [0, 0.0, 0])
+        totals[0] += 1
+        totals[1] += elapsed - inner
+        totals[2] = max(totals[2], peak)
+
+    def summary(self):
+        total = time.perf_counter() - self.start
+        stages = [{"stage": name, "calls": calls, "seconds": round(seconds, 4),
+                   "peak_mb": round(peak / 1e6, 1) if self.memory else None}
+                  for name, (calls, seconds, peak) in self.stages.items()]
+        stages.sort(key=lambda row: row["seconds"], reverse=True)
+        other = max(0.0, total - sum(calls_seconds[1] for calls_seconds in self.stages.values()))
+        stages.append({"stage": "(other)", "calls": None, "seconds": round(other, 4), "peak_mb": None})
+        return {
+            "converter": self.name,
+            "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "memory": self.memory,
+            "total_seconds": round(total, 4),
+            "peak_mb": round(max(self.peak, tracemalloc.get_traced_memory()[1]) / 1e6, 1) if self.memory else None,
+            "stages": stages,
+        }
+
+
+class _Stage:
+    __slots__ = ("name", "profile")
+
+    def __init__(self, name):
+        self.name = name
+        self.profile = None
+
+    def __enter__(self):
+        self.profile = current_profile()
+        if self.profile is not None:
+            self.profile.enter(self.name)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.profile is not None and self.profile.stack:
+            self.profile.exit()
+        self.profile = None
+
+
+def stage(name):
+    """
+    A context manager which times the code inside it as the named stage (if the converter is instrumented).
+    """
+    return _Stage(name)
+
+
+def current_profile():
+    """
+    The profile of the current run. The first time it's needed, a profile is started if the converter was run
+    with --instrument, along with the profiler if it was run with --profile. Worker processes (see
+    common/parallel.py) are never profiled themselves.
+    """
+    global _profile, _started, _registered
+    if multiprocessing.parent_process() is not None:
+        return None
+    if _started:
+        return _profile
+    _started = True
+    name = os.path.splitext(os.path.basename(sys.argv[0]))[0]
+    mode = instrument_mode()
+    if mode is not None:
+        _profile = Profile(name, mode == "memory")
+    if (profiling.start(name) or _profile is not None) and not _registered:
+        atexit.register(finish)
+        _registered = True
+    return _profile
+
+
+def _forget_in_worker():
+    # Worker processes started by forking (see common/parallel.py) inherit the profile, but aren't profiled
+    global _profile
+    if _profile is not None and _profile.memory:
+        tracemalloc.stop()
+    _profile = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_in_worker)
+
+
+def start():
+    """
+    Starts profiling a converter, if it was run with --instrument or --profile. Only needed to start timing before
+    the first stage, e.g. in the batch runner. Any profile which was already running is discarded.
+    """
+    finish(report=False, save=False)
+    return current_profile()
+
+
+def finish(report=True, save=True):
+    """
+    Stops profiling, then prints the table of stages and saves the JSON profile (see the top of this file).
+    Returns the profile as a dict, or None if the converter wasn't being instrumented.
+    """
+    global _profile, _started
+    profile, _profile, _started = _profile, None, False
+    folder = "./processed-data" if os.path.isdir("./processed-data") else "."
+    profiling.finish(report, save, folder)
+    if profile is None:
+        return None
+    while profile.stack:
+        profile.exit()
+    summary = profile.summary()
+    if profile.memory:
+        tracemalloc.stop()
+    if report:
+        print_summary(summary)
+    if save:
+        save_summary(summary, folder)
+    return summary
+
+
+def print_summary(summary):
+    total = summary["total_seconds"]
+    print(f"\nProfile: {summary['converter']}\n---------------------")
+    print(f"{'Stage':<28}{'Calls':>7}{'Time':>11}{'%':>8}{'Peak memory':>14}")
+    for row in summary["stages"]:
+        calls = "" if row["calls"] is None else row["calls"]
+        share = row["seconds"] / total * 100 if total else 0
+        peak = "" if row["peak_mb"] is None else f"{row['peak_mb']:.1f} MB"
+        print(f"{row['stage']:<28}{calls:>7}{row['seconds']:>10.3f}s{share:>7.1f}%{peak:>14}")
+    peak = "" if summary["peak_mb"] is None else f"{summary['peak_mb']:.1f} MB"
+    print(f"{'Total':<28}{'':>7}{total:>10.3f}s{'':>8}{peak:>14}")
+
+
+def save_summary(summary, folder="."):
+    path = os.path.join(folder, f"{summary['converter']}-profile.json")
+    with open(path, "w", encoding="UTF-8") as file:
+        json.dump(summary, file, indent=2)
+    print(f"\nProfile saved to {path}\n")
@@ -0,0 +1,137 @@
+"""
+Product Notes
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+Renders the notes written into the simPRO 'Notes' and Rakata 'Description' fields, e.g.
+
+    simPRO:  <div>Price per SQM: £55.00 inc VAT</div><div>Locations: Twickenham</div><br>
+             <div>Updated: 01-Jan-2024</div>
+    Rakata:  Price per SQM: £1,055.00 inc VAT; Locations: Twickenham; Updated: 01-Jan-2024
+
+The text is exactly the same as each converter's original note_field function.
+
+The "Updated" date is worked out once, the first time it's needed, so every note written in one run (or one
+batch of converters) has the same date, even if it runs past midnight. Each template is only parsed once, and
+notes are rendered for whole columns at a time: prices and locations are formatted once for each distinct
+value rather than once per row.
+"""
+
+import datetime
+from functools import lru_cache
+
+from common.instrument import stage
+
+# Templates. The simPRO templates have a slot for the pack quantity, which is left empty for carpet.
+SIMPRO_NOTE = ("<div>Price per SQM: £{price} inc VAT</div>{pack}<div>Locations: {locations}</div><br>"
+               "<div>Updated: {date}</div>").format
+SIMPRO_PACK = "Pack quantity: {} SQM".format
+LEGACY_SIMPRO_NOTE = ("<div>Price per SQM: £{price} inc VAT</div><div>Locations: {locations}</div>{pack}<br>"
+                      "<div><em>Updated: {date}</em></div>").format
+LEGACY_SIMPRO_PACK = "<div>Pack Quantity: {} SQM</div>".format
+RAKATA_NOTE = "Price per SQM: £{price} inc VAT; Locations: {locations}; Updated: {date}".format
+RAKATA_UNDATED_NOTE = "Price per SQM: £{price} inc VAT; Locations: None".format
+RAKATA_ANCILLARY_NOTE = "Manufacturer: {manufacturer}; Updated: {date}".format
+INSTALLATION_NOTE = ("<div>Labour cost: £{cost} ex VAT</div><div>Sell price: £{price} inc VAT</div><br>"
+                     "<div><em>Updated: {date}</em></div>").format
+
+
+@lru_cache(maxsize=None)
+def update_date():
+    """
+    The date stamped on every note, e.g. 01-Jan-2024. Worked out the first time it's needed.
+    """
+    return datetime.datetime.now().strftime("%d-%b-%Y")
+
+
+def location_text(twickenham, richmond):
+    """
+    The showrooms each product is in, for whole columns of 'Twickenham' and 'Richmond' flags ("Yes" if it's
+    there). Products which aren't in either showroom get an empty string.
+    """
+    names = {}
+    for in_twickenham in (False, True):
+        for in_richmond in (False, True):
+            names[(in_twickenham, in_richmond)] = ", ".join(
+                loc for loc, flag in zip(["Twickenham", "Richmond"], [in_twickenham, in_richmond]) if flag)
+    return [names[(t == "Yes", r == "Yes")] for t, r in zip(twickenham, richmond)]
+
+
+def _formatted(values, spec):
+    """
+    Formats a column of values with a format spec, formatting each distinct value once.
+    """
+    cache = {}
+    result = []
+    for value in values:
+        try:
+            text = cache[value]
+        except (KeyError, TypeError):
+            text = format(value, spec)
+            try:
+                cache[value] = text
+            except TypeError:
+                pass
+        result.append(text)
+    return result
+
+
+def simpro_notes(sell_prices, twickenham, richmond, pack_quantities=None):
+    """
+    The simPRO notes for whole columns of products. The pack quantity is only included if given (vinyl and wood).
+    """
+    with stage("notes"):
+        date = update_date()
+        prices = _formatted(sell_prices, ".2f")
+        packs = [""] * len(prices) if pack_quantities is None else [SIMPRO_PACK(qty) for qty in pack_quantities]
+        return [SIMPRO_NOTE(price=price, pack=pack, locations=locations or "None", date=date)
+                for price, pack, locations in zip(prices, packs, location_text(twickenham, richmond))]
+
+
+def legacy_simpro_notes(sell_prices, twickenham, richmond, pack_quantities=None):
+    """
+    The notes for the legacy simPRO converters. The pack quantity is only included if given.
+    """
+    with stage("notes"):
+        date = update_date()
+        prices = _formatted(sell_prices, ".2f")
+        packs = [""] * len(prices) if pack_quantities is None else [LEGACY_SIMPRO_PACK(qty) for qty in pack_quantities]
+        return [LEGACY_SIMPRO_NOTE(price=price, pack=pack, locations=locations or "None", date=date)
+                for price, pack, locations in zip(prices, packs, location_text(twickenham, richmond))]
+
+
+def rakata_notes(sell_prices, twickenham, richmond, always_dated=False):
+    """
+    The Rakata notes for whole columns of products. Products which aren't in either showroom are only dated if
+    always_dated is True (as the wood converter does).
+    """
+    with stage("notes"):
+        date = update_date()
+        notes = []
+        for price, locations in zip(_formatted(sell_prices, ",.2f"), location_text(twickenham, richmond)):
+            if locations:
+                notes.append(RAKATA_NOTE(price=price, locations=locations, date=date))
+            elif always_dated:
+                notes.append(RAKATA_NOTE(price=price, locations="None", date=date))
+            else:
+                notes.append(RAKATA_UNDATED_NOTE(price=price))
+        return notes
+
+
+def rakata_ancillary_notes(manufacturers):
+    """
+    The Rakata notes for a column of ancillary products.
+    """
+    with stage("notes"):
+        date = update_date()
+        return [RAKATA_ANCILLARY_NOTE(manufacturer=manufacturer, date=date) for manufacturer in manufacturers]
+
+
+def installation_notes(cost_prices, sell_prices):
+    """
+    The simPRO notes for a column of installation rates.
+    """
+    with stage("notes"):
+        date = update_date()
+        return [INSTALLATION_NOTE(cost=cost, price=price, date=date)
+                for cost, price in zip(_formatted(cost_prices, ".2f"), _formatted(sell_prices, ".2f"))]
@@ -0,0 +1,70 @@
+"""
+Parallel Processing
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+Runs part of a converter in a pool of processes, one partition of the master data (e.g. one manufacturer) at a
+time, when the converter is run with --parallel (one process per core) or --parallel=N (N processes).
+
+Each partition keeps the index of the master data, so once the results are back they can be put into exactly
+the order the converter would have produced them in on a single core (see merge_partitions). Anything which
+has to see the data in order (part number assignment, duplicate warnings, supplier lookups) should be done
+after merging, in the main process.
+
+The function given to map_partitions must be defined at the top level of its module, and a converter script
+which uses it must keep its module-level code under 'if __name__ == "__main__":', as Windows starts each
+worker process by importing the script again.
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from common.instrument import stage
+
+
+def parallel_workers():
+    """
+    The number of processes the converter was asked to use, or None if it wasn't run with --parallel.
+    """
+    for arg in sys.argv[1:]:
+        if arg == "--parallel":
+            return os.cpu_count() or 1
+        if arg.startswith("--parallel="):
+            try:
+                return max(1, int(arg.split("=", 1)[1]))
+            except ValueError:
+                sys.exit(print(f"\nError: --parallel expects a number of processes, not '{arg.split('=', 1)[1]}'\n"))
+    return None
+
+
+def partitions(df, column):
+    """
+    Splits df into one DataFrame for each distinct value of column, in the order the values first appear.
+    """
+    return [partition for _, partition in df.groupby(column, sort=False, dropna=False, observed=True)]
+
+
+def map_partitions(function, df, column, workers):
+    """
+    Calls function on each partition of df (see partitions), using up to 'workers' processes. The results are
+    returned in partition order. With one worker (or one partition), everything is done in this process.
+    """
+    parts = partitions(df, column)
+    if workers is None or workers <= 1 or len(parts) <= 1:
+        return [function(part) for part in parts]
+    with stage("parallel"), ProcessPoolExecutor(max_workers=min(workers, len(parts))) as pool:
+        return list(pool.map(function, parts))
+
+
+def merge_partitions(results, columns=None):
+    """
+    Combines the DataFrames returned by map_partitions, restoring the order of the master data. Rows which came
+    from the same master row stay in the order they were produced in. If there are no results, an empty
+    DataFrame with the given columns is returned.
+    """
+    if not results:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(results).sort_index(kind="stable")
@@ -0,0 +1,387 @@
+"""
+Product Database
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+Loads the master workbooks (carpet, wood, vinyl, runners, ancillaries and installation rates) into the product
+database (db/product-data.db), and reads them back out again for the converters.
+
+The data is split across these tables:
+    categories          The existing table of category names. Products without a category are filed under
+                        'Uncategorised'
+    products            One row per product, with its family (e.g. 'carpet'), SKU, name, manufacturer, supplier
+                        and category, plus any family specific columns (e.g. Thickness) in 'details'
+    prices              Cost ex VAT, sell ex VAT and sell inc VAT for each product
+    suppliers           Supplier names and email addresses (from suppliers.xlsx)
+    locations           The showrooms (Twickenham, Richmond)
+    product_locations   Which products are on display at each showroom
+    variants            One row per colour / width combination
+    sources             The workbook each family was loaded from, its SHA-256 hash and its columns
+
+Converters can read their data from the database instead of the XLSX file by being run with --db. The result
+is the same DataFrame that reading the workbook would give (same columns, order and types), so the output files
+are identical. If the workbook has changed since it was loaded, the workbook is used instead.
+"""
+
+import datetime
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+
+from common.instrument import stage
+from common.workbooks import read_workbook
+
+DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "db", "product-data.db")
+
+# Family: master workbook in the data folder
+FAMILIES = {
+    "carpet": "carpet.xlsx",
+    "wood": "wood.xlsx",
+    "vinyl": "vinyl.xlsx",
+    "runners": "runners.xlsx",
+    "ancillaries": "ancillaries.xlsx",
+    "installation": "installation-rates.xlsx",
+}
+
+# Workbook columns which are stored in their own table columns. Anything else is kept in products.details.
+FIELDS = {
+    "SKU": "sku",
+    "Product": "product_name",
+    "Installation Item": "product_name",
+    "Manufacturer": "manufacturer",
+    "Supplier": "supplier",
+    "Category": "category",
+    "Cost ex VAT": "cost_ex_vat",
+    "Cost": "cost_ex_vat",
+    "Sell ex VAT": "sell_ex_vat",
+    "Sell (Exc.)": "sell_ex_vat",
+    "Sell inc VAT": "sell_inc_vat",
+    "Sell (Inc.)": "sell_inc_vat",
+    "Twickenham": "location",
+    "Richmond": "location",
+}
+TEXT_FIELDS = {"sku", "product_name", "manufacturer", "supplier", "category"}
+PRICE_FIELDS = ["cost_ex_vat", "sell_ex_vat", "sell_inc_vat"]
+
+# The category for products without one, as products.category_id can't be NULL
+UNCATEGORISED = "Uncategorised"
+
+SCHEMA = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_category_name ON categories (category_name);
+
+CREATE TABLE IF NOT EXISTS suppliers (
+    supplier_id INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    supplier_name NVARCHAR(160) NOT NULL UNIQUE,
+    email NVARCHAR(160)
+);
+
+CREATE TABLE IF NOT EXISTS prices (
+    product_id INTEGER PRIMARY KEY NOT NULL,
+    cost_ex_vat REAL,
+    sell_ex_vat REAL,
+    sell_inc_vat REAL,
+    FOREIGN KEY (product_id) REFERENCES products(product_id)
+);
+
+CREATE TABLE IF NOT EXISTS locations (
+    location_id INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    location_name NVARCHAR(160) NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS product_locations (
+    product_id INTEGER NOT NULL,
+    location_id INTEGER NOT NULL,
+    PRIMARY KEY (product_id, location_id),
+    FOREIGN KEY (product_id) REFERENCES products(product_id),
+    FOREIGN KEY (location_id) REFERENCES locations(location_id)
+);
+CREATE INDEX IF NOT EXISTS idx_product_locations_location_id ON product_locations (location_id);
+
+CREATE TABLE IF NOT EXISTS variants (
+    variant_id INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    product_id INTEGER NOT NULL,
+    colour NVARCHAR(160),
+    width NVARCHAR(20),
+    FOREIGN KEY (product_id) REFERENCES products(product_id)
+);
+CREATE INDEX IF NOT EXISTS idx_variants_product_id ON variants (product_id);
+
+CREATE TABLE IF NOT EXISTS sources (
+    family NVARCHAR(20) PRIMARY KEY NOT NULL,
+    file_name NVARCHAR(160) NOT NULL,
+    sha256 CHAR(64) NOT NULL,
+    columns TEXT NOT NULL,
+    loaded NVARCHAR(20) NOT NULL
+);
+"""
+
+# Columns added to the original products table
+PRODUCT_COLUMNS = {
+    "family": "NVARCHAR(20)",
+    "position": "INTEGER",
+    "sku": "NVARCHAR(40)",
+    "manufacturer": "NVARCHAR(160)",
+    "supplier_id": "INTEGER REFERENCES suppliers(supplier_id)",
+    "details": "TEXT",
+}
+
+PRODUCT_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_products_family ON products (family, position);
+CREATE INDEX IF NOT EXISTS idx_products_sku ON products (sku);
+CREATE INDEX IF NOT EXISTS idx_products_manufacturer ON products (manufacturer);
+CREATE INDEX IF NOT EXISTS idx_products_supplier_id ON products (supplier_id);
+"""
+
+
+def connect(db_file=DB_FILE):
+    """
+    Opens the database, adding any tables, columns and indexes which don't exist yet.
+    """
+    connection = sqlite3.connect(db_file)
+    connection.executescript(SCHEMA)
+    existing = {row[1] for row in connection.execute("PRAGMA table_info(products)")}
+    for column, column_type in PRODUCT_COLUMNS.items():
+        if column not in existing:
+            connection.execute(f"ALTER TABLE products ADD COLUMN {column} {column_type}")
+    connection.executescript(PRODUCT_INDEXES)
+    return connection
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _plain(value):
+    """
+    Converts numpy values to plain Python values, and missing values to None.
+    """
+    if _missing(value):
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
+def _split(value):
+    return [item.strip() for item in str(value).split(",")] if not _missing(value) else [None]
+
+
+def _lookup_id(connection, table, key_column, name, cache):
+    if name not in cache:
+        row = connection.execute(f"SELECT rowid FROM {table} WHERE {key_column} = ?", (name,)).fetchone()
+        if row is None:
+            row = (connection.execute(f"INSERT INTO {table} ({key_column}) VALUES (?)", (name,)).lastrowid,)
+        cache[name] = row[0]
+    return cache[name]
+
+
+def column_map(df):
+    """
+    Works out where each of the workbook's columns is stored: [column, dtype, field], where field is None if
+    the column is kept in products.details.
+    """
+    columns = []
+    for column in df.columns:
+        field = FIELDS.get(column)
+        dtype = str(df[column].dtype)
+        values = df[column].dropna()
+        if field in TEXT_FIELDS and dtype != "str":
+            field = None
+        elif field in PRICE_FIELDS and dtype not in ("float64", "int64"):
+            field = None
+        elif field == "location" and (dtype != "str" or not (values == "Yes").all()):
+            field = None
+        columns.append([column, dtype, field])
+    return columns
+
+
+def load_suppliers(connection, path):
+    """
+    Adds (or updates) the suppliers and their email addresses from suppliers.xlsx.
+    """
+    df = read_workbook(path)
+    for name, email in zip(df["Name"], df["Email"]):
+        if _missing(name):
+            continue
+        connection.execute(
+            "INSERT INTO suppliers (supplier_name, email) VALUES (?, ?) "
+            "ON CONFLICT (supplier_name) DO UPDATE SET email = excluded.email",
+            (name, _plain(email))
+        )
+    return len(df)
+
+
+def load_family(connection, family, path):
+    """
+    Replaces all of a family's products with the contents of its workbook. Returns the number of products.
+    """
+    df = read_workbook(path)
+    columns = column_map(df)
+    delete_family(connection, family)
+
+    categories, suppliers, locations = {}, {}, {}
+    for position, row in enumerate(df.itertuples(index=False, name=None)):
+        fields = {}
+        details = {}
+        location_names = []
+        for (column, dtype, field), value in zip(columns, row):
+            value = _plain(value)
+            if field is None:
+                details[column] = value
+            elif field == "location":
+                if value == "Yes":
+                    location_names.append(column)
+            else:
+                fields[field] = value
+        if fields.get("product_name") is None and "product_name" in fields:
+            details[next(c for c, _, f in columns if f == "product_name")] = None  # The column can't be NULL
+        if fields.get("category") is None and "category" in fields:
+            details[next(c for c, _, f in columns if f == "category")] = None  # Stored as UNCATEGORISED
+
+        category_id = _lookup_id(connection, "categories", "category_name",
+                                 fields["category"] if fields.get("category") is not None else UNCATEGORISED,
+                                 categories)
+        supplier_id = _lookup_id(connection, "suppliers", "supplier_name", fields["supplier"], suppliers) \
+            if fields.get("supplier") is not None else None
+        product_id = connection.execute(
+            "INSERT INTO products (product_name, category_id, family, position, sku, manufacturer, supplier_id, "
+            "details) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (fields.get("product_name") or "", category_id, family, position,
+             fields.get("sku"), fields.get("manufacturer"), supplier_id, json.dumps(details, ensure_ascii=False))
+        ).lastrowid
+
+        if any(field in fields for field in PRICE_FIELDS):
+            connection.execute(
+                "INSERT INTO prices (product_id, cost_ex_vat, sell_ex_vat, sell_inc_vat) VALUES (?, ?, ?, ?)",
+                (product_id, *(fields.get(field) for field in PRICE_FIELDS))
+            )
+        for name in location_names:
+            connection.execute("INSERT INTO product_locations (product_id, location_id) VALUES (?, ?)",
+                               (product_id, _lookup_id(connection, "locations", "location_name", name, locations)))
+
+        # Colour / width combinations, for querying. The original text is kept in details for the converters.
+        record = dict(zip(df.columns, row))
+        colours = _split(record.get("Colours"))
+        widths = _split(record.get("Widths", record.get("Width")))
+        connection.executemany("INSERT INTO variants (product_id, colour, width) VALUES (?, ?, ?)",
+                               [(product_id, colour, width) for colour in colours for width in widths])
+
+    connection.execute(
+        "INSERT OR REPLACE INTO sources (family, file_name, sha256, columns, loaded) VALUES (?, ?, ?, ?, ?)",
+        (family, os.path.basename(path), file_hash(path), json.dumps(columns),
+         datetime.datetime.now().strftime("%Y-%m-%d %H:%M"))
+    )
+    return len(df)
+
+
+def delete_family(connection, family):
+    product_ids = "SELECT product_id FROM products WHERE family = ?"
+    for table in ("prices", "product_locations", "variants"):
+        connection.execute(f"DELETE FROM {table} WHERE product_id IN ({product_ids})", (family,))
+    connection.execute("DELETE FROM products WHERE family = ?", (family,))
+    connection.execute("DELETE FROM sources WHERE family = ?", (family,))
+
+
+def source(connection, family):
+    """
+    Returns (file name, SHA-256, columns) for the workbook a family was loaded from, or None.
+    """
+    row = connection.execute("SELECT file_name, sha256, columns FROM sources WHERE family = ?", (family,)).fetchone()
+    return (row[0], row[1], json.loads(row[2])) if row else None
+
+
+def read_family(connection, family, wanted=None):
+    """
+    Rebuilds the DataFrame for a family, exactly as read_excel would return it from the original workbook.
+    If wanted (a tuple of column names) is given, only those columns are rebuilt.
+    """
+    loaded = source(connection, family)
+    if loaded is None:
+        raise KeyError(f"No {family} data has been loaded into the product database.")
+    columns = loaded[2] if wanted is None else [column for column in loaded[2] if column[0] in wanted]
+
+    rows = connection.execute(
+        "SELECT p.product_id, p.sku, p.product_name, p.manufacturer, s.supplier_name, c.category_name, "
+        "pr.cost_ex_vat, pr.sell_ex_vat, pr.sell_inc_vat, p.details "
+        "FROM products p "
+        "LEFT JOIN suppliers s ON s.supplier_id = p.supplier_id "
+        "LEFT JOIN categories c ON c.category_id = p.category_id "
+        "LEFT JOIN prices pr ON pr.product_id = p.product_id "
+        "WHERE p.family = ? ORDER BY p.position",
+        (family,)
+    ).fetchall()
+    locations = {}
+    for product_id, name in connection.execute(
+            "SELECT pl.product_id, l.location_name FROM product_locations pl "
+            "JOIN locations l ON l.location_id = pl.location_id "
+            "JOIN products p ON p.product_id = pl.product_id WHERE p.family = ?", (family,)):
+        locations.setdefault(product_id, set()).add(name)
+
+    names = ["sku", "product_name", "manufacturer", "supplier", "category"] + PRICE_FIELDS
+    data = {column: [] for column, _, _ in columns}
+    for product_id, *values, details in rows:
+        fields = dict(zip(names, values))
+        details = json.loads(details)
+        product_locations = locations.get(product_id, ())
+        for column, _, field in columns:
+            if column in details:
+                data[column].append(details[column])
+            elif field == "location":
+                data[column].append("Yes" if column in product_locations else None)
+            else:
+                data[column].append(fields[field])
+
+    df = pd.DataFrame(index=pd.RangeIndex(len(rows)))
+    for i, (column, dtype, _) in enumerate(columns):
+        if dtype == "object":
+            values = pd.Series([float("nan") if value is None else value for value in data[column]], dtype=object)
+        else:
+            values = pd.Series(data[column], dtype=object).astype(dtype)
+        df.insert(i, column, values, allow_duplicates=True)
+    return df
+
+
+def read_master_data(path, schema=None):
+    """
+    Reads a master workbook, or the copy of it in the product database if the converter was run with --db.
+
+    If a schema is given (see common/schemas.py), only its columns are read, and the converter stops with a
+    message if any of them are missing.
+    """
+    df = _read_master_data(path, schema.names if schema is not None else None)
+    return df if schema is None else schema.project(df, path)
+
+
+def _read_master_data(path, columns):
+    family = next((name for name, file_name in FAMILIES.items() if file_name == os.path.basename(path)), None)
+    if "--db" not in sys.argv[1:] or family is None:
+        return read_workbook(path, columns)
+
+    connection = sqlite3.connect(DB_FILE)
+    try:
+        loaded = source(connection, family) if _has_sources(connection) else None
+        if loaded is None:
+            print(f"\nNo {family} data in the product database, reading {path} instead.\n")
+            return read_workbook(path, columns)
+        if os.path.exists(path) and file_hash(path) != loaded[1]:
+            print(f"\n{path} has changed since it was loaded into the product database, reading it instead.\n")
+            return read_workbook(path, columns)
+        with stage("read product database"):
+            return read_family(connection, family, columns)
+    finally:
+        connection.close()
+
+
+def _has_sources(connection):
+    return connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sources'").fetchone()
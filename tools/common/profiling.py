@@ -0,0 +1,305 @@
+"""
+Hot-Path Profiling
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+Finds the functions a converter spends its time in, when the converter is run with --profile. Where
+--instrument (see common/instrument.py) says which stage is slow, this says which functions inside it are, e.g.
+a per-row generate_slug or lookup_supplier_email, or fuzz.ratio in the GOD List matching.
+
+    --profile           Profiles every function call with cProfile. Exact call counts and times, but every call
+                        is slowed down, so very small functions look slower than they really are.
+    --profile=sample    Looks at what the converter is doing every few milliseconds instead (SAMPLE_INTERVAL).
+                        Hardly slows the converter down, and records the real call stacks, but there are no
+                        call counts and anything quicker than a few samples may be missed.
+
+Profiling starts with the converter's first stage, as with --instrument, and the two can be used together.
+When the converter finishes, two tables are printed:
+- The functions in tools/ (the converters and common code), by the total time spent in them and in everything
+  they call
+- The functions the most time was spent in themselves, from anywhere (pandas, the standard library...)
+
+The call stacks are saved in the collapsed ("folded") format used by flame graph tools, one line per stack
+with the time spent in it, to processed-data/<converter>-stacks.folded, e.g.
+
+    flamegraph.pl processed-data/carpet-rakata-data-converter-stacks.folded > flame.svg
+
+or drag the file into https://www.speedscope.app. cProfile only records which function called which, not whole
+stacks, so with --profile the stacks are estimated by sharing each function's time between its callers. The
+cProfile statistics are also saved to processed-data/<converter>.pstats, for use with pstats or snakeviz.
+
+Only the converter's own process, and its main thread, are profiled. With --parallel (or while the GOD Lists
+are read, see god-list-utils/gl_loader.py), the time spent in the workers shows up as waiting for them.
+"""
+
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+# How often the converter is sampled with --profile=sample, in seconds
+SAMPLE_INTERVAL = 0.005
+
+# Stacks with less than this share of the total time are left out of the folded stacks estimated from cProfile
+MIN_STACK_SHARE = 0.0001
+
+# The number of functions listed in each table
+TABLE_ROWS = 20
+
+TOOLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_INSTRUMENT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "instrument.py")
+
+# The profiler which is running, if any
+_profiler = None
+
+
+def profile_mode():
+    """
+    None if the converter wasn't run with --profile, otherwise "cprofile" or "sample" (see the top of this file).
+    """
+    for arg in sys.argv[1:]:
+        if arg == "--profile":
+            return "cprofile"
+        if arg == "--profile=sample":
+            return "sample"
+        if arg.startswith("--profile="):
+            sys.exit(print(f"\nError: --profile can only be given 'sample', not '{arg.split('=', 1)[1]}'\n"))
+    return None
+
+
+def location(filename):
+    """
+    A short name for a source file: its path within tools/, within site-packages, or otherwise just its name.
+    Pseudo-filenames such as "<frozen posixpath>" or "<string>" are returned as they are.
+    """
+    if filename.startswith("<"):
+        return filename
+    path = os.path.abspath(filename)
+    if path.startswith(TOOLS_DIR + os.sep):
+        return os.path.relpath(path, TOOLS_DIR).replace(os.sep, "/")
+    parts = path.split(os.sep)
+    for folder in ("site-packages", "dist-packages"):
+        if folder in parts:
+            return "/".join(parts[parts.index(folder) + 1:])
+    return os.path.basename(path)
+
+
+def in_tools(filename):
+    """
+    True for the converters and common code, apart from the instrumentation itself.
+    """
+    if filename.startswith("<"):
+        return False  # Not a real file, e.g. "<frozen posixpath>", even if the current folder is in tools/
+    path = os.path.abspath(filename)
+    return path.startswith(TOOLS_DIR + os.sep) and path not in (os.path.abspath(__file__), _INSTRUMENT_FILE)
+
+
+class FunctionTimes:
+    """
+    The time spent in one function: in itself (self_seconds), and in itself and everything it calls
+    (total_seconds). calls is None when sampling.
+    """
+    __slots__ = ("name", "in_tools", "calls", "self_seconds", "total_seconds")
+
+    def __init__(self, name, tools, calls, self_seconds, total_seconds):
+        self.name = name
+        self.in_tools = tools
+        self.calls = calls
+        self.self_seconds = self_seconds
+        self.total_seconds = total_seconds
+
+
+class CProfiler:
+    def __init__(self, name):
+        self.name = name
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+        self.stats = pstats.Stats(self.profiler).stats
+
+    @staticmethod
+    def label(function):
+        filename, _, name = function
+        if filename == "~":  # Built in, e.g. "<built-in method builtins.sorted>"
+            return name.strip("<>")
+        return f"{location(filename)}:{name}"
+
+    def functions(self):
+        return [FunctionTimes(self.label(function), in_tools(function[0]), calls, self_seconds, total_seconds)
+                for function, (_, calls, self_seconds, total_seconds, _) in self.stats.items()]
+
+    def stacks(self):
+        """
+        Estimates the folded stacks, in microseconds. The time a function spent when called from one place is
+        shared out between the places it was called from in turn, in proportion to their time.
+        """
+        callees = defaultdict(dict)
+        for function, (_, _, _, _, callers) in self.stats.items():
+            for caller, times in callers.items():
+                callees[caller][function] = times[3]
+        roots = [function for function, row in self.stats.items() if not row[4]]
+        minimum = sum(self.stats[function][3] for function in roots) * MIN_STACK_SHARE
+
+        stacks = Counter()
+        path, on_path = [self.name], set()
+
+        def walk(function, seconds):
+            _, _, self_seconds, total_seconds, _ = self.stats[function]
+            share = seconds / total_seconds if total_seconds else 0
+            path.append(self.label(function))
+            on_path.add(function)
+            microseconds = round(self_seconds * share * 1e6)
+            if microseconds:
+                stacks[";".join(path)] += microseconds
+            for callee, callee_seconds in callees[function].items():
+                if callee not in on_path and callee_seconds * share >= minimum:
+                    walk(callee, callee_seconds * share)
+            on_path.discard(function)
+            path.pop()
+
+        for function in roots:
+            walk(function, self.stats[function][3])
+        return stacks
+
+    def save(self, folder):
+        path = os.path.join(folder, f"{self.name}.pstats")
+        self.profiler.dump_stats(path)
+        return path
+
+
+class Sampler:
+    def __init__(self, name, interval=SAMPLE_INTERVAL):
+        self.name = name
+        self.interval = interval
+        self.samples = Counter()  # Stack (a tuple of code objects, outermost first) -> samples
+        self.script = os.path.basename(sys.argv[0])
+        self.thread_id = threading.get_ident()
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self._sample, daemon=True)
+        self.thread.start()
+
+    def _sample(self):
+        while not self.stopping.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            stack.reverse()
+            # Anything outside the converter itself (e.g. the batch runner) is left out
+            script = next((i for i, code in enumerate(stack)
+                           if code.co_name == "<module>" and os.path.basename(code.co_filename) == self.script), 0)
+            self.samples[tuple(stack[script:])] += 1
+
+    def stop(self):
+        self.stopping.set()
+        self.thread.join()
+
+    @staticmethod
+    def label(code):
+        return f"{location(code.co_filename)}:{code.co_qualname}"
+
+    def functions(self):
+        self_samples, total_samples = Counter(), Counter()
+        for stack, samples in self.samples.items():
+            if stack:
+                self_samples[stack[-1]] += samples
+            for code in set(stack):
+                total_samples[code] += samples
+        return [FunctionTimes(self.label(code), in_tools(code.co_filename), None,
+                              self_samples[code] * self.interval, samples * self.interval)
+                for code, samples in total_samples.items()]
+
+    def stacks(self):
+        """
+        The folded stacks, in samples.
+        """
+        stacks = Counter()
+        for stack, samples in self.samples.items():
+            stacks[";".join([self.name] + [self.label(code) for code in stack])] += samples
+        return stacks
+
+    def save(self, folder):
+        return None
+
+
+def _forget_in_worker():
+    # Worker processes started by forking inherit the profiler, but aren't profiled (see the top of this file)
+    global _profiler
+    if isinstance(_profiler, CProfiler):
+        _profiler.profiler.disable()
+    _profiler = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_in_worker)
+
+
+def start(name):
+    """
+    Starts profiling, if the converter was run with --profile. Returns True if it was.
+    """
+    global _profiler
+    mode = profile_mode()
+    if _profiler is None and mode is not None:
+        _profiler = CProfiler(name) if mode == "cprofile" else Sampler(name)
+    return _profiler is not None
+
+
+def finish(report=True, save=True, folder="."):
+    """
+    Stops profiling, then prints the tables and saves the stacks (see the top of this file).
+    """
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is None:
+        return
+    started = time.perf_counter()
+    profiler.stop()
+    functions = profiler.functions()
+    if report:
+        print_functions(profiler, functions)
+    if save:
+        path = os.path.join(folder, f"{profiler.name}-stacks.folded")
+        with open(path, "w", encoding="UTF-8") as file:
+            for stack, count in sorted(profiler.stacks().items()):
+                file.write(f"{stack} {count}\n")
+        print(f"\nFlame graph stacks saved to {path}")
+        pstats_file = profiler.save(folder)
+        if pstats_file is not None:
+            print(f"cProfile statistics saved to {pstats_file}")
+        print(f"(in {time.perf_counter() - started:.2f}s)\n")
+
+
+def print_functions(profiler, functions):
+    method = "cProfile" if isinstance(profiler, CProfiler) else f"sampled every {profiler.interval * 1000:g}ms"
+    tools = sorted((function for function in functions if function.in_tools),
+                   key=lambda function: function.total_seconds, reverse=True)
+    print(f"\nHot spots: {profiler.name} ({method})\n---------------------")
+    print("tools/ functions, by total time")
+    _print_table(tools[:TABLE_ROWS])
+    print("\nAll functions, by time spent in the function itself")
+    busy = [function for function in functions if function.self_seconds > 0]
+    _print_table(sorted(busy, key=lambda function: function.self_seconds, reverse=True)[:TABLE_ROWS])
+
+
+def _print_table(functions):
+    print(f"{'Function':<64}{'Calls':>10}{'Self':>11}{'Total':>11}{'Per call':>12}")
+    for function in functions:
+        name = function.name if len(function.name) <= 62 else "..." + function.name[-59:]
+        calls = "" if function.calls is None else function.calls
+        per_call = "" if not function.calls else _duration(function.total_seconds / function.calls)
+        print(f"{name:<64}{calls:>10}{function.self_seconds:>10.3f}s{function.total_seconds:>10.3f}s{per_call:>12}")
+
+
+def _duration(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f}s"
+    if seconds >= 0.001:
+        return f"{seconds * 1e3:.1f}ms"
+    return f"{seconds * 1e6:.1f}us"
@@ -0,0 +1,147 @@
+"""
+Rakata Records
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+Builds the Rakata import records for the carpet, vinyl, wood and ancillaries converters in
+rakata-data-converter, e.g.
+
+    records = rakata_records(df, notes, "Vinyl", "Per m2", pack_coverage=True, wastage=True)
+
+Every record has the same 22 columns (COLUMNS). Most of them are the same for every product in a family
+('Standard', '20', 'Per m2', the flooring type...), so they are filled in once for the whole column rather than
+once per product. The rest are worked out a column at a time:
+- Product names, ranges and suppliers have their accents removed (e.g. 'Création' -> 'Creation', see
+  common/text.py)
+- The pack coverage is the pack quantity without any letters (e.g. '2.2 SQM' -> '2.2')
+- The wastage is 5% for planks and 10% for everything else
+- Products marked "Yes" in 'Discontinued?' are Inactive, the rest are Active
+Anything which depends on a single value (accents, pack coverage, wastage, status) is only worked out once for
+each distinct value, as most of them repeat from one product to the next.
+
+The records are the same, value for value, as the ones each converter used to build one product at a time.
+The supplier emails are left empty, to be looked up by the converter in the order of the master data, so that
+unknown suppliers are reported in the same order as before.
+"""
+
+import pandas as pd
+
+from common.instrument import stage
+from common.text import remove_accents_column
+
+COLUMNS = [
+    'SKU',
+    'Product Name',
+    'Description',
+    'Cost (Ex VAT)',
+    'Price (Ex VAT)',
+    'Product Type',
+    'VAT Rate',
+    'Pack Coverage',
+    'Pack Linear Meterage',
+    'Available Stock Quantity',
+    'Active / Inactive',
+    'Product Range',
+    'Quote Script',
+    'Available Widths',
+    'Colours',
+    'Flooring Type',
+    'Calculation Type',
+    'Wastage %',
+    'Outgoing Labour Cost (per m2)',
+    'Labour Retail Price (per m2)',
+    'Default Supplier',
+    'Default Supplier Email',
+]
+
+
+def remove_alpha(string):
+    modified_string = ''.join(c for c in str(string) if c in "0123456789.")
+    return modified_string
+
+
+def product_status(discontinued):
+    """
+    'Inactive' if a product is marked "Yes" (in any case) in 'Discontinued?', otherwise 'Active'.
+    """
+    return 'Inactive' if isinstance(discontinued, str) and discontinued.lower() == "yes" else 'Active'
+
+
+def wastage_percent(product_type):
+    """
+    The wastage % for a product 'Type': 5 for planks, 10 for anything else.
+    """
+    return '5' if str(product_type).lower() == 'plank' else '10'
+
+
+def list_text(value):
+    """
+    A comma-separated list (e.g. 'Widths') as Rakata expects it, separated by semi-colons.
+    """
+    return str(value).replace(',', ';')
+
+
+def _per_value(function, values):
+    """
+    Calls function on each value in a column, calling it once for each distinct value.
+    """
+    cache = {}
+    result = []
+    for value in values:
+        try:
+            converted = cache[value]
+        except (KeyError, TypeError):
+            converted = function(value)
+            try:
+                cache[value] = converted
+            except TypeError:
+                pass
+        result.append(converted)
+    return result
+
+
+def rakata_records(df, notes, flooring_type, calculation_type, pack_coverage=False, widths_and_colours=False,
+                   wastage=False):
+    """
+    Builds the Rakata record for every product in df, keeping the index of df.
+
+    Args:
+        df: The master data, with 'SKU', 'Product', 'Manufacturer', 'Supplier', 'Cost ex VAT', 'Sell ex VAT' and
+            'Discontinued?' columns, and any used by the options below.
+        notes: The 'Description' for each product (see common/notes.py).
+        flooring_type: e.g. 'Vinyl'.
+        calculation_type: e.g. 'Per m2'.
+        pack_coverage: If True, the pack coverage is taken from 'Pack Quantity'. Otherwise it's left empty.
+        widths_and_colours: If True, 'Widths' and 'Colours' are listed. Otherwise they're left empty.
+        wastage: If True, the wastage depends on 'Type' (see the top of this file). Otherwise it's 0.
+    """
+    with stage("Rakata records"):
+        products = df['Product'].tolist()
+        ranges = [f"{manufacturer} - {product}" for manufacturer, product in zip(df['Manufacturer'].tolist(), products)]
+        names = remove_accents_column(products)
+        ranges = remove_accents_column(ranges)
+
+        return pd.DataFrame({
+            'SKU': df['SKU'].tolist(),
+            'Product Name': names,
+            'Description': list(notes),
+            'Cost (Ex VAT)': df['Cost ex VAT'].tolist(),
+            'Price (Ex VAT)': df['Sell ex VAT'].tolist(),
+            'Product Type': 'Standard',
+            'VAT Rate': '20',
+            'Pack Coverage': _per_value(remove_alpha, df['Pack Quantity']) if pack_coverage else '',
+            'Pack Linear Meterage': '',
+            'Available Stock Quantity': '0',
+            'Active / Inactive': _per_value(product_status, df['Discontinued?']),
+            'Product Range': ranges,
+            'Quote Script': ranges,
+            'Available Widths': _per_value(list_text, df['Widths']) if widths_and_colours else '',
+            'Colours': _per_value(list_text, df['Colours']) if widths_and_colours else '',
+            'Flooring Type': flooring_type,
+            'Calculation Type': calculation_type,
+            'Wastage %': _per_value(wastage_percent, df['Type']) if wastage else '0',
+            'Outgoing Labour Cost (per m2)': '0',
+            'Labour Retail Price (per m2)': '0',
+            'Default Supplier': remove_accents_column(df['Supplier']),
+            'Default Supplier Email': None,
+        }, columns=COLUMNS, index=df.index, dtype=object)
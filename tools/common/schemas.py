@@ -0,0 +1,156 @@
+"""
+Column Schemas
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+Each converter declares the columns it uses from its master workbook as a Schema, e.g.
+
+    SCHEMA = Schema("Rakata vinyl website data", {
+        "SKU": TEXT,
+        "Product": TEXT,
+        "Sell inc VAT": NUMBER,
+        ...
+    })
+
+and reads the workbook with read_master_data(path, SCHEMA) (see common/productdb.py). Only those columns are
+parsed from the XLSX file, and the converter gets them in the same order as they are in the workbook.
+
+If a column is missing from the workbook, the converter stops straight away with a message naming the workbook
+and the missing columns, rather than failing with a KeyError part of the way through.
+
+Each column has a type:
+    TEXT        Text, such as product names. May be blank throughout.
+    CATEGORY    Text which repeats a handful of values across the whole workbook, such as 'Manufacturer',
+                'Category' and the "Yes" flags ('Twickenham', 'Discontinued?'). These are converted to pandas
+                Categoricals (see below).
+    NUMBER      Prices and quantities. Any values which aren't numbers are reported, with their row numbers.
+                Numbers stored as text (e.g. '12.50') are converted.
+    MIXED       Columns which can hold text or numbers, such as 'Widths' (4 or "3.66, 4").
+TEXT and MIXED columns are left exactly as they were read, so the output files don't change.
+
+CATEGORY columns store each distinct value once, with a small integer code for each row, so comparisons such
+as df['Discontinued?'] != 'Yes', grouping by manufacturer and copying the columns into expanded variant tables
+work on the codes. The categories come from one dictionary per column name, shared by every converter in the
+process (e.g. the batch runner), so 'Manufacturer' has the same codes whichever workbook it was read from and
+DataFrames from different converters can be joined without converting back to text. Blank cells stay missing,
+and the values read out of the column (e.g. by records) are the same strings as before.
+
+Converters which work through the products one at a time use schema.records(df) rather than df.iterrows().
+Each product is a named tuple with one field per column, named after it ('Cost ex VAT' -> cost_ex_vat,
+'Discontinued?' -> discontinued), e.g.
+
+    for product in SCHEMA.records(df):
+        if product.discontinued != "Yes":
+            ...
+
+The records are built straight from the columns, without creating a pandas Series for every row, and hold the
+same values iterrows would give. Text which is repeated from one product to the next (manufacturers, categories,
+"Yes" flags) is stored once and shared between the records, rather than once per product.
+"""
+
+import os
+import re
+import sys
+from collections import namedtuple
+
+import pandas as pd
+
+from common.instrument import stage
+
+TEXT = "text"
+CATEGORY = "category"
+NUMBER = "number"
+MIXED = "mixed"
+
+# Column name -> {value: code}, in the order the values were first seen. See CATEGORY above.
+_categories = {}
+
+
+class Schema:
+    def __init__(self, name, columns):
+        """
+        Args:
+            name: What the converter produces, for error messages, e.g. "simPRO carpet data".
+            columns: A dict of column name -> TEXT, CATEGORY, NUMBER or MIXED.
+        """
+        self.name = name
+        self.columns = dict(columns)
+        self.record = namedtuple("Record", [field_name(column) for column in self.columns])
+
+    @property
+    def names(self):
+        """
+        The column names, as a tuple (for common.workbooks.read_workbook).
+        """
+        return tuple(self.columns)
+
+    def missing(self, df):
+        """
+        The columns which aren't in df.
+        """
+        return [column for column in self.columns if column not in df.columns]
+
+    def project(self, df, path):
+        """
+        Checks df has every column in the schema, drops any columns which aren't in the schema and converts the
+        CATEGORY and NUMBER columns. Stops the converter with a message if a column is missing or has values which
+        aren't numbers.
+        """
+        missing = self.missing(df)
+        if missing:
+            columns = "columns" if len(missing) > 1 else "column"
+            sys.exit(print(f"\nError: {os.path.basename(path)} is missing the {columns} needed for the {self.name}: "
+                           f"{', '.join(missing)}\n"))
+
+        with stage("check columns"):
+            df = df.loc[:, [column in self.columns for column in df.columns]]
+            for i, column in enumerate(df.columns):
+                if self.columns[column] == NUMBER and not pd.api.types.is_numeric_dtype(df.iloc[:, i]):
+                    df.isetitem(i, _numbers(df.iloc[:, i], column, path))
+                elif self.columns[column] == CATEGORY:
+                    df.isetitem(i, categorical(df.iloc[:, i], column))
+            return df
+
+    def records(self, df):
+        """
+        Returns a record (see the top of this file) for each row of df, in order. df must have every column in
+        the schema, e.g. a DataFrame from read_master_data(path, schema) or a selection of its rows.
+        """
+        columns = []
+        for column, kind in self.columns.items():
+            values = df[column].tolist()
+            if kind == TEXT:
+                shared = {}
+                values = [shared.setdefault(value, value) if isinstance(value, str) else value for value in values]
+            columns.append(values)
+        return list(map(self.record._make, zip(*columns)))
+
+
+def categorical(values, column):
+    """
+    Converts a Series to a Categorical, using the shared categories for the column name. Any values which
+    haven't been seen before are added to the end of the categories.
+    """
+    categories = _categories.setdefault(column, {})
+    for value in values.dropna().unique():
+        categories.setdefault(value, len(categories))
+    return values.astype(pd.CategoricalDtype(list(categories)))
+
+
+def field_name(column):
+    """
+    The record field for a column: lower case, with anything other than letters and digits replaced by
+    underscores, e.g. 'Sell (Exc.)' -> sell_exc.
+    """
+    return re.sub(r"[^0-9a-z]+", "_", column.lower()).strip("_")
+
+
+def _numbers(values, column, path):
+    numbers = pd.to_numeric(values, errors="coerce")
+    invalid = values.notna() & numbers.isna()
+    if invalid.any():
+        # Row numbers as shown in Excel: the header is row 1
+        examples = [f"row {i + 2}: {value!r}" for i, value in values[invalid].head(5).items()]
+        sys.exit(print(f"\nError: the '{column}' column in {os.path.basename(path)} should only hold numbers "
+                       f"({', '.join(examples)}{', ...' if invalid.sum() > 5 else ''})\n"))
+    return numbers
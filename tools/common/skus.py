@@ -0,0 +1,155 @@
+"""
+Variant Part Numbers
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+Assigns the part numbers used for each colour / width variation in the simPRO catalogue. A variation's part
+number is the range's SKU followed by the first five hex digits of a SHA-1 hash of its colour and width, e.g.
+CA80356ABI-6FB80.
+
+Every code which has been assigned is saved in db/variant-codes.db (CODES_FILE), so a variation keeps the same
+part number from one run to the next, and each distinct colour and width is only hashed once. This is kept apart
+from db/product-data.db, which is in git, and is ignored by git itself, so converting never changes the tracked
+files and checking out or reloading the product database leaves the part numbers alone. If variant-codes.db is
+deleted, the codes are simply assigned again: every variation gets the same part number as before, apart from
+any which collided, whose new codes depend on the order the variations are found in the data.
+
+Five hex digits leave room for collisions, where two different variations of the same range end up with the
+same part number. These are caught as each code is assigned, by checking it against every code already in
+use (including codes saved by earlier runs for variations which aren't in the data any more). A variation
+which collides is given a new code by hashing its colour and width again with a counter added (e.g. '#1'),
+and that code is saved so it doesn't change. Part numbers which are repeated because the same variation
+appears twice in the data are reported, as they always have been.
+"""
+
+import datetime
+import hashlib
+import os
+import sqlite3
+
+import pandas as pd
+
+from common.instrument import stage
+
+CODES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "db", "variant-codes.db")
+
+CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS variant_codes (
+    sku NVARCHAR(40) NOT NULL,
+    colour NVARCHAR(160) NOT NULL,
+    width NVARCHAR(20) NOT NULL,
+    code NVARCHAR(60) NOT NULL UNIQUE,
+    assigned NVARCHAR(20) NOT NULL,
+    PRIMARY KEY (sku, colour, width)
+)
+"""
+
+
+def variant_hash(colour, width, attempt=0):
+    """
+    The five hex digit hash of a colour and width. Later attempts are only used after a collision.
+    """
+    text = colour + width if attempt == 0 else f"{colour}{width}#{attempt}"
+    return hashlib.sha1(text.encode("UTF-8")).hexdigest()[:5].upper()
+
+
+class VariantCodes:
+    def __init__(self, db_file=CODES_FILE):
+        """
+        Loads the codes assigned by earlier runs. If db_file is None, codes are only kept for this run.
+        """
+        self.connection = None
+        self.codes = {}  # (sku, colour, width) -> part number
+        if db_file is not None:
+            self.connection = sqlite3.connect(db_file)
+            self.connection.execute(CREATE_TABLE)
+            for sku, colour, width, code in self.connection.execute(
+                    "SELECT sku, colour, width, code FROM variant_codes"):
+                self.codes[(sku, colour, width)] = code
+
+        self.owners = {code: key for key, code in self.codes.items()}  # Part number -> what it was assigned to
+        self.new_codes = []
+        self.collisions = []
+        self.used = {}  # Part numbers used in this run -> (manufacturer, description)
+        self.duplicates = []
+
+    def code(self, sku, colour="", width="", manufacturer=None, description=None):
+        """
+        Returns the part number for a colour / width variation of a range.
+        """
+        key = (str(sku), colour, width)
+        code = self.codes.get(key)
+        if code is None:
+            code = self._assign(key)
+        self._use(code, manufacturer, description)
+        return code
+
+    def plain(self, sku, manufacturer=None, description=None):
+        """
+        For products without variations, whose SKU is used as the part number as it is.
+        """
+        self._use(sku, manufacturer, description)
+        return sku
+
+    def codes_for(self, skus, colours, widths, manufacturers, descriptions):
+        """
+        Batched version of code.
+        """
+        with stage("part numbers"):
+            return [self.code(*values) for values in zip(skus, colours, widths, manufacturers, descriptions)]
+
+    def _assign(self, key):
+        sku, colour, width = key
+        attempt = 0
+        code = f"{sku}-{variant_hash(colour, width)}"
+        while code in self.owners:
+            self.collisions.append((key, code, self.owners[code]))
+            attempt += 1
+            code = f"{sku}-{variant_hash(colour, width, attempt)}"
+        self.codes[key] = code
+        self.owners[code] = key
+        self.new_codes.append(key)
+        return code
+
+    def _use(self, code, manufacturer, description):
+        if code in self.used:
+            self.duplicates.append((code, manufacturer, description))
+        else:
+            self.used[code] = (manufacturer, description)
+
+    def save(self):
+        """
+        Saves any codes assigned during this run.
+        """
+        with stage("save part numbers"):
+            if self.connection is None or not self.new_codes:
+                return
+            assigned = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO variant_codes (sku, colour, width, code, assigned) VALUES (?, ?, ?, ?, ?)",
+                [(*key, self.codes[key], assigned) for key in self.new_codes]
+            )
+            self.connection.commit()
+            self.new_codes = []
+
+    def close(self):
+        self.save()
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def report(self):
+        """
+        Prints any collisions which were resolved and any part numbers which were used more than once.
+        """
+        if self.collisions:
+            print("\nWarning: Variant code collisions found. These variations have been given new codes.\n")
+            for (sku, colour, width), code, (_, other_colour, other_width) in self.collisions:
+                print(f"{sku} '{colour}' '{width}' clashed with '{other_colour}' '{other_width}' ({code}) "
+                      f"-> {self.codes[(sku, colour, width)]}")
+            print("\n")
+
+        if self.duplicates:
+            print("\nWarning: Duplicate entries found in the 'Part Number' column.\n")
+            print(pd.DataFrame(self.duplicates, columns=["Part Number", "Manufacturer", "Description"]))
+            print("\n")
@@ -0,0 +1,147 @@
+"""
+Slugs and Image URLs
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+Generates the WooCommerce slugs and product image URLs used by the website converters. The results are
+exactly the same as the original generate_slug / generate_image_url functions in each converter.
+
+The column functions work on whole pandas columns. Each distinct product / colour combination is only
+processed once (a carpet range with 30 colours has 30 slugs, but only one product folder), using pandas'
+string methods with regular expressions which are only compiled once. Accents are removed with fold_accents
+from common/text.py. Slugs for single products are remembered, up to CACHE_SIZE of them, as the accents are.
+"""
+
+import re
+import string
+from functools import lru_cache
+
+import pandas as pd
+
+from common.instrument import stage
+from common.text import CACHE_SIZE, fold_accents, fold_accents_column
+
+# Any punctuation character. A regular expression is much quicker than str.translate with a deletion table.
+PUNCTUATION = re.compile(f"[{re.escape(string.punctuation)}]")
+
+# Two or more dashes in a row
+DASHES = re.compile(r"-{2,}")
+
+
+def compress_dashes(text):
+    """
+    Replaces consecutive dashes with a single dash.
+    """
+    return DASHES.sub("-", text)
+
+
+def _clean(text):
+    """
+    Hyphens become spaces (for handling multiple words), apostrophes and other punctuation are removed, then
+    spaces become hyphens.
+    """
+    return PUNCTUATION.sub("", text.replace("-", " ")).replace(" ", "-")
+
+
+def _clean_column(column):
+    return (column.str.replace("-", " ", regex=False).str.replace(PUNCTUATION, "", regex=True)
+            .str.replace(" ", "-", regex=False))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def generate_slug(product_name, colour=""):
+    """
+    The slug for a product, or for one colour of a product.
+    """
+    slug_str = product_name.lower() if not colour.strip() else f"{product_name}-{colour}"
+    slug = _clean(slug_str).rstrip("-")
+    slug = fold_accents(slug)
+    return compress_dashes(slug.lower())
+
+
+def generate_image_url(category, manufacturer, product_name, colour="", colourless_slug=True, product_folders=True):
+    """
+    The image URL for a product, or for one colour of a product. Images are kept in a folder for each product.
+
+    If colourless_slug is False, products without a colour are stored as '<product>.jpg' next to the folder,
+    rather than inside it (as the runner and vinyl converters do). If product_folders is False, there are no
+    product folders and every image is stored as '<slug>.jpg' in the manufacturer's folder (as the wood
+    converter does).
+    """
+    if not product_folders:
+        image_url = f"product-images/{category}/{manufacturer}/{generate_slug(product_name, colour)}.jpg"
+        return compress_dashes(image_url.replace(" ", "-").lower())
+    product_folder = f"product-images/{category}/{manufacturer}/{_clean(product_name)}"
+    if len(colour) > 0 or colourless_slug:
+        image_url = f"{product_folder}/{generate_slug(product_name, colour)}.jpg"
+    else:
+        image_url = f"{product_folder}.jpg"
+    return compress_dashes(image_url.replace(" ", "-").lower())
+
+
+def slug_column(product_names, colours=None):
+    """
+    generate_slug for whole columns of product names and colours.
+    """
+    with stage("slugs"):
+        products = pd.Series(product_names, dtype=object).reset_index(drop=True)
+        colours = pd.Series([""] * len(products) if colours is None else colours, dtype=object).reset_index(drop=True)
+        unique, codes = _unique_pairs(products, colours)
+
+        blank = unique["colour"].str.strip() == ""
+        slug_str = unique["product"].where(~blank, unique["product"].str.lower())
+        slug_str = slug_str.where(blank, unique["product"] + "-" + unique["colour"])
+        slugs = pd.Series(fold_accents_column(_clean_column(slug_str).str.rstrip("-")), dtype=object).str.lower()
+        slugs = slugs.str.replace(DASHES, "-", regex=True)
+        return pd.Series(slugs.to_numpy()[codes], index=_index(product_names), dtype=object)
+
+
+def image_url_column(categories, manufacturers, product_names, colours=None, colourless_slug=True, slugs=None,
+                     product_folders=True):
+    """
+    generate_image_url for whole columns. If the slugs have already been generated, they can be passed in.
+    """
+    index = _index(product_names)
+    products = pd.Series(product_names, dtype=object).reset_index(drop=True)
+    colours = pd.Series([""] * len(products) if colours is None else colours, dtype=object).reset_index(drop=True)
+    slugs = slug_column(products, colours) if slugs is None else pd.Series(slugs, dtype=object).reset_index(drop=True)
+
+    with stage("image URLs"):
+        folders = "product-images/" + _text(categories) + "/" + _text(manufacturers)
+        if product_folders:
+            folders = folders + "/" + _clean_product_names(products)
+        with_slug = pd.Series(True, index=products.index)
+        if product_folders and not colourless_slug:
+            with_slug = colours.str.len() > 0
+        image_urls = (folders + "/" + slugs + ".jpg").where(with_slug, folders + ".jpg")
+        image_urls = image_urls.str.replace(" ", "-", regex=False).str.lower().str.replace(DASHES, "-", regex=True)
+        return pd.Series(image_urls.to_numpy(), index=index, dtype=object)
+
+
+def _clean_product_names(products):
+    codes, unique = pd.factorize(products)
+    return pd.Series(_clean_column(pd.Series(unique, dtype=object)).to_numpy()[codes], index=products.index,
+                     dtype=object)
+
+
+def _text(values):
+    """
+    The values as strings, in the same way an f-string would format them. These are kept as object columns,
+    as pandas' own string type lower cases some non-ASCII characters differently to Python.
+    """
+    return pd.Series([str(value) for value in values], dtype=object)
+
+
+def _unique_pairs(products, colours):
+    """
+    The distinct (product, colour) pairs, and the position of each row's pair among them.
+    """
+    pairs = pd.MultiIndex.from_arrays([products, colours])
+    codes, unique = pd.factorize(pairs)
+    unique = pd.DataFrame({"product": unique.get_level_values(0), "colour": unique.get_level_values(1)},
+                          dtype=object)
+    return unique, codes
+
+
+def _index(values):
+    return values.index if isinstance(values, pd.Series) else pd.RangeIndex(len(values))
@@ -0,0 +1,124 @@
+"""
+Snapshot Diff Engine
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+Compares two snapshots of the same master data (e.g. 'archived/Carpet 2024-02-05.xlsx' and 'data/carpet.xlsx'),
+matching rows by a key column such as SKU or Part Number.
+
+Both files are read a row at a time, without loading them into DataFrames. The old snapshot is read first and
+each row is hashed and indexed by its key. The new snapshot is then streamed past the index, so each row is
+only looked at once and the whole comparison takes linear time. Only rows whose hashes differ are compared
+column by column.
+
+Snapshots can be XLSX files (the first sheet is used, with the header in the first row) or CSV files, such as
+the converters' output.
+"""
+
+import csv
+import hashlib
+import os
+from collections import Counter, namedtuple
+
+from common.xlsx import sheet_rows
+
+# Change is one of 'Added', 'Removed', 'Price Changed' or 'Changed'. Old and new are the rows as dicts (None if
+# the row doesn't exist in that snapshot), and columns lists the columns whose values are different.
+Change = namedtuple("Change", ["change", "key", "old", "new", "columns"])
+
+PRICE_COLUMNS = ["Cost ex VAT", "Sell ex VAT", "Sell inc VAT"]
+
+
+def iter_rows(path):
+    """
+    Yields the header of the snapshot, followed by each of its rows as a tuple.
+    """
+    if os.path.splitext(path)[1].lower() == ".csv":
+        with open(path, newline="", encoding="UTF-8") as file:
+            yield from (tuple(row) for row in csv.reader(file) if any(row))  # Skip blank lines
+        return
+
+    for row in sheet_rows(path):
+        if any(value is not None for value in row):  # Skip blank rows
+            yield row
+
+
+def row_hash(values):
+    return hashlib.blake2b(repr(values).encode("UTF-8"), digest_size=16).digest()
+
+
+def diff_snapshots(old_path, new_path, key="SKU", price_columns=None, ignore_columns=()):
+    """
+    Compares two snapshots and yields a Change for every row which has been added, removed or changed.
+
+    Args:
+        old_path: The earlier snapshot.
+        new_path: The later snapshot.
+        key: The column which identifies each row.
+        price_columns: Columns which count as a price change (defaults to the cost and sell prices).
+        ignore_columns: Columns which aren't compared.
+
+    Only columns which appear in both snapshots are compared, so a column being added to the master data
+    doesn't mark every row as changed. If a key appears more than once, each occurrence is matched with the
+    same occurrence in the other snapshot.
+    """
+    price_columns = PRICE_COLUMNS if price_columns is None else price_columns
+    old_rows = iter_rows(old_path)
+    new_rows = iter_rows(new_path)
+    old_header = [str(column) for column in next(old_rows, ())]
+    new_header = [str(column) for column in next(new_rows, ())]
+    for header, path in ((old_header, old_path), (new_header, new_path)):
+        if key not in header:
+            raise KeyError(f"'{key}' is not a column in {path}")
+
+    compared = [column for column in new_header if column in old_header and column not in ignore_columns]
+    old_positions = [old_header.index(column) for column in compared]
+    new_positions = [new_header.index(column) for column in compared]
+    old_key = old_header.index(key)
+    new_key = new_header.index(key)
+
+    # Index the old snapshot: (key, occurrence) -> (hash of the compared columns, row)
+    index = {}
+    occurrences = Counter()
+    for row in old_rows:
+        row_key = _occurrence(occurrences, _value(row, old_key))
+        index[row_key] = (row_hash([_value(row, i) for i in old_positions]), row)
+
+    seen = set()
+    occurrences = Counter()
+    for row in new_rows:
+        row_key = _occurrence(occurrences, _value(row, new_key))
+        seen.add(row_key)
+        entry = index.get(row_key)
+        if entry is None:
+            yield Change("Added", row_key[0], None, dict(zip(new_header, row)), [])
+            continue
+
+        old_hash, old_row = entry
+        if old_hash == row_hash([_value(row, i) for i in new_positions]):
+            continue
+        changed = [column for column, i, j in zip(compared, old_positions, new_positions)
+                   if _value(old_row, i) != _value(row, j)]
+        if not changed:
+            continue  # e.g. 12 and 12.0, which hash differently but are the same value
+        change = "Price Changed" if any(column in price_columns for column in changed) else "Changed"
+        yield Change(change, row_key[0], dict(zip(old_header, old_row)), dict(zip(new_header, row)), changed)
+
+    for row_key, (_, old_row) in index.items():
+        if row_key not in seen:
+            yield Change("Removed", row_key[0], dict(zip(old_header, old_row)), None, [])
+
+
+def _value(row, i):
+    # Rows from openpyxl stop at the last cell with a value, and CSV files can have short rows
+    return row[i] if i < len(row) else None
+
+
+def _occurrence(occurrences, key):
+    """
+    Returns (key, n) for the nth time a key has been seen, so duplicate keys are matched up in order.
+    occurrences counts how many times each key has been seen so far.
+    """
+    n = occurrences[key]
+    occurrences[key] = n + 1
+    return key, n
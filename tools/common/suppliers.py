@@ -0,0 +1,94 @@
+"""
+Supplier Directory
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+Loads the supplier data (suppliers.xlsx) once per process and indexes it by normalised supplier name, so that
+supplier details can be looked up for each product without re-reading the XLSX file every time.
+
+The directory also keeps track of which suppliers were found and which weren't, so that converters can print
+a list of unknown suppliers at the end of a run. When several converters are run in one process (see
+batch-runner/run-converters.py), reset_counts is called before each one so each only reports its own.
+"""
+
+import os
+import sys
+from collections import Counter
+
+from common.instrument import stage
+from common.workbooks import read_workbook
+
+# Directories which have already been loaded, keyed by the absolute path of the XLSX file
+_directories = {}
+
+
+def normalise_name(name):
+    """
+    Normalises a supplier name for matching: case-insensitive and ignoring repeated or surrounding whitespace.
+    Anything which isn't a string (e.g. an empty cell) becomes "".
+    """
+    return " ".join(name.split()).casefold() if isinstance(name, str) else ""
+
+
+class SupplierDirectory:
+    def __init__(self, df):
+        self.emails = {}
+        for name, email in zip(df['Name'], df['Email']):
+            key = normalise_name(name)
+            # Keep the first entry if a supplier appears more than once. Rows without a name are left out.
+            if key:
+                self.emails.setdefault(key, email)
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets which suppliers have been looked up so far.
+        """
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def email(self, supplier_name):
+        """
+        Returns the email address of the named supplier, or None if the supplier isn't in the directory.
+        """
+        key = normalise_name(supplier_name)
+        if key in self.emails:
+            self.hits[supplier_name] += 1
+            return self.emails[key]
+        self.misses[supplier_name] += 1
+        return None
+
+    def report(self):
+        """
+        Prints a list of any suppliers which couldn't be found, with the number of products affected.
+        """
+        print("\nUnknown Suppliers\n---------------------")
+        if len(self.misses) > 0:
+            for supplier_name, count in self.misses.most_common():
+                print(f"{supplier_name} ({count} product{'s' if count != 1 else ''})")
+            print("\nThese products have been exported without a supplier email.\n")
+        else:
+            print("None\n")
+
+
+def load_supplier_directory(supplier_xlsx):
+    """
+    Returns the SupplierDirectory for the given file, reading the file the first time it is requested.
+    """
+    path = os.path.abspath(supplier_xlsx)
+    if path not in _directories:
+        with stage("supplier directory"):
+            try:
+                df = read_workbook(path)
+            except FileNotFoundError:
+                sys.exit(print("Supplier data not found."))
+            _directories[path] = SupplierDirectory(df)
+    return _directories[path]
+
+
+def reset_counts():
+    """
+    Resets the found and unknown suppliers of every directory which has been loaded, for the start of a new run.
+    """
+    for directory in _directories.values():
+        directory.reset()
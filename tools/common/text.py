@@ -0,0 +1,76 @@
+"""
+Text Normalisation
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+Removes accents from product names, ranges and suppliers, for the Rakata converters and the website slugs.
+There are two versions, as the converters have always done it in one of two ways:
+
+    remove_accents('Création Æ')  -> 'Creation Æ'     Only the accents are removed (the Rakata converters)
+    fold_accents('Création Æ')    -> 'Creation '      Anything which isn't ASCII is removed too (slugs)
+
+Most names are repeated many times (every colour of a range, every product from a supplier), so each distinct
+string is only normalised once: the results are remembered, up to CACHE_SIZE strings each, with the least
+recently used ones forgotten first so the memory used stays bounded however much data is converted. Strings
+which are already plain ASCII are returned straight away, as they have no accents.
+
+The column functions work on whole columns (any sequence of strings, such as a pandas Series) and return a list,
+normalising each distinct value once.
+"""
+
+import unicodedata
+from functools import lru_cache
+
+import pandas as pd
+
+# The most strings remembered by each of remove_accents and fold_accents
+CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _remove_accents(text):
+    nfkd_form = unicodedata.normalize('NFKD', text)
+    return ''.join([c for c in nfkd_form if not unicodedata.combining(c)])
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _fold_accents(text):
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+
+
+def remove_accents(text):
+    """
+    Removes the accents from a string, leaving any other characters as they are, e.g. 'Création' -> 'Creation'.
+    """
+    if text.isascii():
+        return text
+    return _remove_accents(text)
+
+
+def fold_accents(text):
+    """
+    Removes accents, and any other characters which can't be written in ASCII.
+    """
+    if text.isascii():
+        return text
+    return _fold_accents(text)
+
+
+def remove_accents_column(values):
+    """
+    remove_accents for a whole column of strings.
+    """
+    return _per_distinct_value(remove_accents, values)
+
+
+def fold_accents_column(values):
+    """
+    fold_accents for a whole column of strings.
+    """
+    return _per_distinct_value(fold_accents, values)
+
+
+def _per_distinct_value(function, values):
+    codes, unique = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=False)
+    converted = [function(value) for value in unique]
+    return [converted[code] for code in codes]
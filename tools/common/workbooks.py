@@ -0,0 +1,185 @@
+"""
+Workbook Loader
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+Reads XLSX files into DataFrames for the converters. Parsed workbooks are kept in memory for the rest of the
+process, so when several converters are run together (see tools/batch-runner) each master workbook is only
+parsed once, however many converters use it.
+
+Parsed workbooks are also saved to an on-disk cache (.workbook-cache in the root of the repository) as Parquet
+files, named after a SHA-256 hash of the XLSX file's contents and the options it was read with. As long as a
+workbook hasn't changed, later runs load the Parquet file instead of parsing the XLSX file again. Editing the
+workbook changes its hash, so a stale copy is never used. The cache is skipped if pyarrow isn't installed.
+
+Excel columns often mix text and numbers (e.g. widths of 4 and "3.66, 4"), which Parquet can't store in a
+single column. These columns are saved as text with a prefix recording each value's original type, and are
+converted back when the cache is loaded, so the DataFrame is exactly the same as the one read_excel returns.
+
+Converters which only use some of a workbook's columns can ask for just those (see common/schemas.py). Only
+those columns are parsed, unless the whole workbook has already been read in this process (e.g. by the batch
+runner's preload), in which case they're taken from that copy.
+"""
+
+import hashlib
+import json
+import math
+import os
+
+import pandas as pd
+
+from common.instrument import stage
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Set to None to turn the on-disk cache off
+cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".workbook-cache")
+
+# Change this if the way files are stored in the cache changes, so that older files are ignored
+CACHE_VERSION = 1
+
+# Parsed workbooks, keyed by the absolute path of the file, the options it was read with and the columns read
+_frames = {}
+
+
+def read_workbook(path, columns=None, **kwargs):
+    """
+    Returns the workbook as a DataFrame, parsing it only the first time it's requested.
+    Accepts the same keyword arguments as pd.read_excel.
+
+    If columns (a tuple of column names) is given, only those columns are read. Any which aren't in the
+    workbook are simply left out. The columns are kept in the workbook's order.
+
+    Each caller gets its own copy, so converters can modify the DataFrame without affecting each other.
+    """
+    path_key, options_key = os.path.abspath(path), repr(sorted(kwargs.items()))
+    key = (path_key, options_key, columns)
+    if key not in _frames:
+        whole = _frames.get((path_key, options_key, None))
+        if columns is not None and whole is not None:
+            _frames[key] = whole.loc[:, [column in columns for column in whole.columns]]
+        else:
+            _frames[key] = _load(path, kwargs, columns)
+    return _frames[key].copy()
+
+
+def preload(paths):
+    """
+    Parses each of the workbooks in advance. Any which can't be found are skipped and returned.
+    """
+    missing = []
+    for path in paths:
+        try:
+            read_workbook(path)
+        except FileNotFoundError:
+            missing.append(path)
+    return missing
+
+
+def cache_key(path, options):
+    """
+    SHA-256 of the workbook's contents, the options it's read with and the versions which affect the result.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    digest.update(repr((sorted(options.items()), pd.__version__, CACHE_VERSION)).encode("UTF-8"))
+    return digest.hexdigest()
+
+
+def _load(path, options, columns=None):
+    """
+    Loads a workbook from the on-disk cache if possible, otherwise parses it and adds it to the cache.
+    """
+    read_options = dict(options)
+    if columns is not None:
+        read_options["usecols"] = lambda column: column in columns
+        options = dict(options, columns=columns)  # Each set of columns is cached separately
+
+    if cache_dir is None or pa is None:
+        with stage("read XLSX"):
+            return pd.read_excel(path, **read_options)
+
+    cache_file = os.path.join(cache_dir, f"{cache_key(path, options)}.parquet")
+    if os.path.exists(cache_file):
+        try:
+            with stage("read workbook cache"):
+                return _read_cache(cache_file)
+        except (OSError, ValueError, pa.ArrowException):
+            pass  # A damaged cache file is simply replaced
+
+    with stage("read XLSX"):
+        df = pd.read_excel(path, **read_options)
+    try:
+        with stage("write workbook cache"):
+            _write_cache(df, cache_file)
+    except (OSError, TypeError, ValueError, pa.ArrowException):
+        pass  # Anything which can't be cached is just read from the XLSX file each time
+    return df
+
+
+# Prefixes for each type of value in a mixed column
+_encoders = {
+    str: ("s", str),
+    bool: ("b", str),
+    int: ("i", str),
+    float: ("f", repr),
+}
+_decoders = {
+    "s": str,
+    "b": lambda text: text == "True",
+    "i": int,
+    "f": float,
+}
+
+
+def _encode_value(value):
+    if value is None:
+        return "0"
+    if isinstance(value, float) and math.isnan(value):
+        return "n"
+    prefix, encode = _encoders[type(value)]  # Any other type raises a KeyError and isn't cached
+    return prefix + encode(value)
+
+
+def _decode_value(text):
+    if text == "0":
+        return None
+    if text == "n":
+        return float("nan")
+    return _decoders[text[0]](text[1:])
+
+
+def _write_cache(df, cache_file):
+    # Columns of plain text or numbers already have their own dtype, so only mixed columns are left as objects
+    mixed = [i for i in range(df.shape[1]) if df.iloc[:, i].dtype == object]
+    encoded = df.copy()
+    for i in mixed:
+        try:
+            encoded.isetitem(i, [_encode_value(value) for value in df.iloc[:, i]])
+        except KeyError:
+            raise TypeError(f"Column {df.columns[i]} can't be cached")
+
+    table = pa.Table.from_pandas(encoded)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b"workbook-cache"] = json.dumps({"mixed": mixed}).encode("UTF-8")
+    table = table.replace_schema_metadata(metadata)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_file = f"{cache_file}.{os.getpid()}.tmp"
+    pq.write_table(table, temp_file)
+    os.replace(temp_file, cache_file)  # Only complete files ever appear in the cache
+
+
+def _read_cache(cache_file):
+    table = pq.read_table(cache_file)
+    mixed = json.loads(table.schema.metadata[b"workbook-cache"])["mixed"]
+    df = table.to_pandas()
+    for i in mixed:
+        df.isetitem(i, pd.Series([_decode_value(text) for text in df.iloc[:, i]], index=df.index, dtype=object))
+    return df
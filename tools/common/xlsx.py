@@ -0,0 +1,76 @@
+"""
+Fast XLSX Reader
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+Reads values from large XLSX files, such as the GOD Lists and the Ted Todd summary, as quickly as possible.
+
+If python-calamine is installed (pip install python-calamine), workbooks are read with calamine, which is
+written in Rust and is several times faster than openpyxl. Otherwise openpyxl is used in read-only mode, which
+streams the sheet from the file rather than building the whole workbook in memory, and only reads the cached
+values of formulas.
+
+Only the columns which are needed should be asked for (usecols), so the rest are never turned into Python
+objects. sheet_rows yields one row at a time, as a tuple, for scripts which don't need the whole sheet at once.
+
+Both engines give the same values: blank cells are None (NaN in a DataFrame), whole numbers are ints and dates
+are datetimes.
+"""
+
+import datetime
+
+import pandas as pd
+from openpyxl import load_workbook
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
+ENGINE = "calamine" if CalamineWorkbook is not None else "openpyxl"
+
+
+def read_sheet(path, sheet_name=0, header=0, skiprows=None, usecols=None):
+    """
+    Reads one sheet into a DataFrame. sheet_name=None reads every sheet, returning a dict of DataFrames keyed
+    by sheet name. usecols is a list of column names, or a function which is given each column name and returns
+    True for the columns to keep.
+    """
+    return pd.read_excel(path, sheet_name=sheet_name, header=header, skiprows=skiprows, usecols=usecols,
+                         engine=ENGINE)
+
+
+def sheet_rows(path, sheet_name=0):
+    """
+    Yields every row of a sheet as a tuple of values, starting with the first. Blank rows are included.
+    """
+    if CalamineWorkbook is not None:
+        workbook = CalamineWorkbook.from_path(path)
+        if isinstance(sheet_name, int):
+            sheet = workbook.get_sheet_by_index(sheet_name)
+        else:
+            sheet = workbook.get_sheet_by_name(sheet_name)
+        for row in sheet.iter_rows():
+            yield tuple(_calamine_value(value) for value in row)
+        return
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        if isinstance(sheet_name, int):
+            sheet = workbook.worksheets[sheet_name]
+        else:
+            sheet = workbook[sheet_name]
+        yield from sheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _calamine_value(value):
+    # calamine gives blank cells as empty strings, every number as a float and dates without a time as dates
+    if value == "":
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if type(value) is datetime.date:
+        return datetime.datetime.combine(value, datetime.time())
+    return value
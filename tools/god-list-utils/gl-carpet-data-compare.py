@@ -1,7 +1,15 @@
+import os
+import sys
 import tkinter as tk
 from tkinter import filedialog
 import pandas as pd
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.xlsx import read_sheet
+
+# The columns used from the GOD List. Nothing else is read from the workbook.
+GOD_LIST_COLUMNS = {"Name", "Cost (exc.) (SQM)", "Trade (exc.) (SQM)", "Price (inc.) (SQM)"}
+
 
 def clean_currency(text):
     digits = "".join(char for char in str(text) if char.isdigit() or char == ".")
@@ -14,7 +22,7 @@ def clean_currency(text):
 def process_data(input_data, gl_data, output_data):
     # Read input_file and gl_file into pandas DataFrames
     input_df = pd.read_excel(input_data, header=0)
-    gl_df = pd.read_excel(gl_data, header=1)
+    gl_df = read_sheet(gl_data, header=1, usecols=lambda column: column in GOD_LIST_COLUMNS)
 
     # Create new columns in input_df
     input_df.insert(8, 'GL Cost ex VAT', None)
@@ -1,45 +1,4 @@
-import pandas as pd
-import glob
-import os
-
-
-def merge_xlsx(file_list):
-    """
-  Merges a list of XLSX files, ignoring first row, merging specific data and adding a new field.
-
-  Args:
-    file_list: A list of paths to XLSX files.
-
-  Returns:
-    A pandas DataFrame containing the merged data.
-  """
-    merged_df = None
-    for filename in file_list:
-        df = pd.read_excel(filename, skiprows=1)
-
-        # Combine 'Name' and 'W&W Name' (if both exist)
-        if 'Name' in df.columns:
-            df.rename(columns={'Name': 'Name'}, inplace=True)
-        elif 'W&W Name' in df.columns:
-            df.rename(columns={'W&W Name': 'Name'}, inplace=True)
-        else:
-            raise ValueError(f"File {filename} has no 'Name' or 'W&W Name' column")
-
-        # Create 'Supplier' column with filename
-        df['Supplier'] = os.path.basename(filename).replace('.xlsx', '').replace(' (Wood)', '')
-
-        # Select only 'Name' and 'Supplier' columns
-        if 'Pack Quantity (SQM)' in df.columns:
-            df = df[['Name', 'Supplier', 'Pack Quantity (SQM)']]
-        else:
-            df = df[['Name', 'Supplier']]
-
-        # Append data to merged dataframe
-        if merged_df is None:
-            merged_df = df.copy()
-        else:
-            merged_df = merged_df._append(df, ignore_index=True)
-    return merged_df
+from gl_loader import load_god_lists
 
 
 # List of XLSX files to merge
@@ -58,4 +17,5 @@ wood_data = [
 
 output_csv = "./processed-data/gl-merge-wood-data.csv"
 
-merge_xlsx(wood_data).to_csv(output_csv, index=False)
+# The GOD Lists are read at the same time, keeping only the names, suppliers and pack quantities
+load_god_lists(wood_data, detailed=False).to_csv(output_csv, index=False)
@@ -14,13 +14,18 @@ It will also use the value of 'Price (inc.) (SQM)' to calculate the field 'Sell
 
 Due to discrepancies between how products are named in the GOD Lists and the master data file,
 the script uses a fuzzy search to attempt to match the items. This search will only accept a
-match with a score of at least 100, however it is still important to manually check all
-matches before the data is pushed through.
+match with a score of at least 90 (set by match_threshold), however it is still important to manually
+check all matches before the data is pushed through. The matching itself is done by gl_matching.py.
+
+Accepted matches are cached in the product database (see gl_match_cache.py), so repeat syncs only need to score
+products which are new or whose GOD List entries have changed. Matches which have been checked by hand can be
+confirmed in the cache, and will then be kept between runs.
 
 PROCESS
 ----------
 1.  Import the GOD Lists from a set list and attempt to merge them, taking into account
-    various difference between different versions of the GOD List format.
+    various difference between different versions of the GOD List format. The GOD Lists are read
+    at the same time, by gl_loader.py.
 2.  Take the master wood data file and use the merged GOD List data to perform a fuzzy search,
     to attempt to match up the product names.
 3.  Create a new column in the master data file called 'GOD List Match'. If a match is found,
@@ -41,9 +46,15 @@ TO DO
 3.  Improve reliability.
 """
 
-import pandas as pd
-from fuzzywuzzy import fuzz
 import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.instrument import stage
+from gl_loader import load_god_lists
+from gl_match_cache import MatchCache
 
 
 def format_price(df, col):
@@ -61,109 +72,32 @@ def create_sell_ex_vat(df, col_name, new_col_name):
     return df
 
 
-def merge_gl(file_list):
-    """
-  Merges a list of XLSX files, ignoring first row, merging specific data and adding a new field.
-
-  Args:
-    file_list: A list of paths to XLSX files.
-
-  Returns:
-    A pandas DataFrame containing the merged data.
-  """
-    merged_df = None
-    for filename in file_list:
-        df = pd.read_excel(filename, skiprows=1)
-
-        # Combine 'Name' and 'W&W Name' (if both exist)
-        if 'Name' in df.columns:
-            pass
-        elif 'W&W Name' in df.columns:
-            df.rename(columns={'W&W Name': 'Name'}, inplace=True)
-        else:
-            raise ValueError(f"File {filename} has no 'Name' or 'W&W Name' column")
-
-        # Merge Range and Name, if applicable
-        if 'Range' in df.columns and 'V4' in filename:
-            df['Name'] = df['Range'] + ' ' + df['Name']
-
-        # Merge Name and SKU
-        if 'Panaget SKU' in df.columns:
-            df['Name'] = df['Name'] + ' ' + df['Panaget SKU'].astype(str)
-        elif 'Parador SKU' in df.columns:
-            df['Name'] = df['Name'] + ' ' + df['Parador SKU'].astype(str)
-
-
-        # Set cost column names to 'Cost ex VAT'
-        cost_col_names = ['Inc. Surcharge (< 1 Pallet) & Admin (exc.) (SQM)',
-                          'Trade (exc.) (SQM)',
-                          'Cost (exc.) (SQM)']
-
-        potential_cost_cols = set(cost_col_names)
-        if potential_cost_cols.intersection(df.columns):
-            for col in df.columns:
-                if col in potential_cost_cols:
-                    df.rename(columns={col: 'Cost ex VAT'}, inplace=True)
-                    break  # Exit the loop after the first match
-        else:
-            df['Cost ex VAT'] = "CHECK PRICE"
-
-        if 'Price (inc.) (SQM)' in df.columns:
-            df.rename(columns={'Price (inc.) (SQM)': 'Sell inc VAT'}, inplace=True)
-
-        # Create 'Supplier' column with filename
-        df['Supplier'] = os.path.basename(filename).replace('.xlsx', '').replace(' (Wood)', '')
-
-        # Select only 'Name' and 'Supplier' columns
-        if 'Pack Quantity (SQM)' in df.columns:
-            df = df[['Name', 'Supplier', 'Pack Quantity (SQM)', 'Cost ex VAT', 'Sell inc VAT']]
-        else:
-            df = df[['Name', 'Supplier', 'Cost ex VAT', 'Sell inc VAT']]
-
-        # Append data to merged dataframe
-        if merged_df is None:
-            merged_df = df.copy()
-        else:
-            merged_df = merged_df._append(df, ignore_index=True)
-
-    return merged_df
-
-
-def sync_data(gl_data, wood_data_file, output_file):
+def sync_data(gl_data, wood_data_file, output_file, threshold=90, db_file="../../db/product-data.db"):
     """
     This function merges 'Pack Quantity (SQM)' data from gl-data to 'Pack Quantity' in wood-data based on fuzzy
     matching of product names and suppliers.
 
     Args:
-        gl_data (str): Path to the gl-data file.
+        gl_data (DataFrame): The merged GOD List data.
         wood_data_file (str): Path to the wood-data file.
         output_file (str): Path to the output csv file.
+        threshold (int): The minimum score for a match to be accepted.
+        db_file (str): Path to the product database used to cache matches.
     """
     # Read dataframes
     # gl_data = pd.read_csv(gl_data_file)
 
     wood_data = pd.read_excel(wood_data_file)
 
-    # Perform fuzzy matching on product names and suppliers
-    matched_names = []
-    matched_gl_names = []  # To store the matched gl_data names
-    match_scores = []  # To store the match scores
-    failed_matches = []
-    for wood_product, wood_supplier in zip(wood_data['Product'], wood_data['Manufacturer']):
-        best_match = None
-        best_score = 0
-        for gl_product, gl_supplier in zip(gl_data['Name'], gl_data['Supplier']):
-            name_score = fuzz.ratio(wood_product, gl_product)  # Use fuzz.ratio for stricter matching
-            supplier_score = fuzz.ratio(wood_supplier, gl_supplier)  # Use fuzz.ratio for stricter matching
-            total_score = (name_score + supplier_score) / 2  # Average of name and supplier scores
-            if total_score > best_score:
-                best_score = total_score
-                best_match = gl_product
-        matched_names.append(best_match)
-        matched_gl_names.append(
-            best_match if best_score >= 90 else failed_matches.append(
-                f"{wood_supplier} - {wood_product}"))  # Only include if score >= 90
-        match_scores.append(best_score)  # Store the match score
+    # Perform fuzzy matching on product names and suppliers (the average of both scores must reach the threshold)
+    # Products with a cached match aren't scored again
+    match_cache = MatchCache(db_file)
+    with stage("matching"):
+        matched_names, matched_gl_names, match_scores, failed_matches = match_cache.match_products(
+            wood_data['Product'], wood_data['Manufacturer'], gl_data['Name'], gl_data['Supplier'], threshold
+        )
+    match_cache.report()
+    match_cache.close()
 
     # Create a mapping of matched names to Pack Quantity (SQM)
     name_to_pack_qty = dict(zip(gl_data['Name'], gl_data['Pack Quantity (SQM)']))
@@ -190,7 +124,8 @@ def sync_data(gl_data, wood_data_file, output_file):
     wood_data.loc[empty_god_list_match, wood_data.columns.difference(['Product', 'Supplier'])] = None
 
     # Export
-    wood_data[cols_to_keep].to_csv(output_file, index=False)
+    with stage("export"):
+        wood_data[cols_to_keep].to_csv(output_file, index=False)
 
     print(f"Merged data saved to: {output_file}")
     print("\nFAILED MATCHES\n--------------------")
@@ -212,8 +147,13 @@ gl_data_files = [
 ]
 
 wood_data_xlsx = "../../data/wood.xlsx"
+product_db = "../../db/product-data.db"
 output_csv = "./processed-data/gl-wood-data-synced.csv"
 output_xlsx = "./processed-data/gl-wood-data-synced.xlsx"
 
+# Minimum average of the name and supplier scores for a match to be accepted
+match_threshold = 90
+
 # Run the merge function
-sync_data(merge_gl(gl_data_files), wood_data_xlsx, output_csv)
+with stage("sync"):
+    sync_data(load_god_lists(gl_data_files), wood_data_xlsx, output_csv, match_threshold, product_db)
@@ -0,0 +1,136 @@
+"""
+GOD List Loader
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+Reads a set of GOD List workbooks and combines them into a single DataFrame, for gl-wood-data-sync.py and
+gl-merge-wood-data.py.
+
+The workbooks are read at the same time in a pool of threads. They usually live in the Google Drive sync
+folder, where most of the time spent reading a file can be waiting for Drive to fetch it, so reading them all
+at once is much quicker than one after the other. Threads are used rather than processes because the GOD List
+scripts run at the top level, and on macOS each worker process would run the whole script again.
+
+Each GOD List has its own layout, so every workbook is first converted into one schema:
+- 'W&W Name' is renamed to 'Name'
+- With detailed=True (gl-wood-data-sync.py):
+    - V4 names have their range added to the front
+    - Panaget and Parador names have their SKU added to the end
+    - Whichever of the three cost columns the GOD List has becomes 'Cost ex VAT' ("CHECK PRICE" if none)
+    - 'Price (inc.) (SQM)' becomes 'Sell inc VAT'
+- The supplier is taken from the file name
+
+The results are then joined together in one go, in the same order as the list of files, and the time taken to
+read each file is printed.
+
+Only the columns listed in GOD_LIST_COLUMNS are read from each workbook, using the fast reader in common/xlsx.py.
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.instrument import stage
+from common.xlsx import read_sheet
+
+# The cost columns used by different GOD Lists. The first one found (in the GOD List's own column order) is used.
+COST_COLUMNS = ['Inc. Surcharge (< 1 Pallet) & Admin (exc.) (SQM)',
+                'Trade (exc.) (SQM)',
+                'Cost (exc.) (SQM)']
+
+# Suppliers whose product names are made unique by adding their SKU
+SKU_COLUMNS = ['Panaget SKU', 'Parador SKU']
+
+# Every column normalise_god_list uses. Nothing else is read from the workbooks.
+GOD_LIST_COLUMNS = {'Name', 'W&W Name', 'Range', 'Price (inc.) (SQM)', 'Pack Quantity (SQM)',
+                    *COST_COLUMNS, *SKU_COLUMNS}
+
+
+def supplier_name(filename):
+    """
+    The supplier a GOD List belongs to, from its file name, e.g. 'Lamett (Wood).xlsx' -> 'Lamett'.
+    """
+    return os.path.basename(filename).replace('.xlsx', '').replace(' (Wood)', '')
+
+
+def normalise_god_list(df, filename, detailed=True):
+    """
+    Converts one GOD List into the common schema. See the top of this file for what's changed.
+    """
+    if 'Name' in df.columns:
+        pass
+    elif 'W&W Name' in df.columns:
+        df = df.rename(columns={'W&W Name': 'Name'})
+    else:
+        raise ValueError(f"File {filename} has no 'Name' or 'W&W Name' column")
+
+    if detailed:
+        # Merge Range and Name, if applicable
+        if 'Range' in df.columns and 'V4' in filename:
+            df['Name'] = df['Range'] + ' ' + df['Name']
+
+        # Merge Name and SKU
+        for sku_column in SKU_COLUMNS:
+            if sku_column in df.columns:
+                df['Name'] = df['Name'] + ' ' + df[sku_column].astype(str)
+                break
+
+        # Set cost column names to 'Cost ex VAT'
+        cost_column = next((column for column in df.columns if column in COST_COLUMNS), None)
+        if cost_column is not None:
+            df = df.rename(columns={cost_column: 'Cost ex VAT'})
+        else:
+            df['Cost ex VAT'] = "CHECK PRICE"
+
+        if 'Price (inc.) (SQM)' in df.columns:
+            df = df.rename(columns={'Price (inc.) (SQM)': 'Sell inc VAT'})
+
+    df['Supplier'] = supplier_name(filename)
+
+    columns = ['Name', 'Supplier']
+    if 'Pack Quantity (SQM)' in df.columns:
+        columns.append('Pack Quantity (SQM)')
+    if detailed:
+        columns += ['Cost ex VAT', 'Sell inc VAT']
+    return df[columns]
+
+
+def read_god_list(filename, detailed=True):
+    """
+    Reads and normalises one GOD List, ignoring its first row. Returns the DataFrame and the time taken.
+    """
+    start = time.perf_counter()
+    df = read_sheet(filename, skiprows=1, usecols=lambda column: column in GOD_LIST_COLUMNS)
+    df = normalise_god_list(df, filename, detailed)
+    return df, time.perf_counter() - start
+
+
+def load_god_lists(file_list, detailed=True, workers=8):
+    """
+    Reads every GOD List in file_list at the same time, and joins them into one DataFrame.
+
+    Args:
+        file_list: A list of paths to XLSX files.
+        detailed: If True, names are made unique and the prices are kept (see the top of this file).
+        workers: The most files to read at once.
+
+    Returns:
+        A pandas DataFrame containing the merged data, or None if file_list is empty.
+    """
+    if not file_list:
+        return None
+
+    start = time.perf_counter()
+    with stage("read GOD Lists"), ThreadPoolExecutor(max_workers=max(1, min(workers, len(file_list)))) as pool:
+        results = list(pool.map(lambda filename: read_god_list(filename, detailed), file_list))
+
+    print("\nGOD Lists\n--------------------")
+    for filename, (df, duration) in zip(file_list, results):
+        print(f"{supplier_name(filename):<24}{len(df):>6} rows  {duration:.2f}s")
+    print(f"Loaded {len(file_list)} GOD Lists in {time.perf_counter() - start:.2f}s\n")
+
+    return pd.concat([df for df, _ in results], ignore_index=True, sort=False)
@@ -0,0 +1,177 @@
+"""
+GOD List Match Cache
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+Stores accepted GOD List matches in the product database (db/product-data.db), so that a repeat sync only
+needs to score products which are new, or whose GOD List block has changed since they were last matched.
+
+Each entry is keyed on the normalised product name and supplier. Alongside the matched GOD List name and score,
+it records a hash of the GOD List names the product was matched against. Prices aren't part of the hash, so a
+price update to a GOD List doesn't invalidate its matches, but adding, removing or renaming a product does.
+
+Matches can also be confirmed by hand. A confirmed match is used for as long as its GOD List name still
+exists, regardless of score or hash, so operators' checks survive between runs.
+
+This file can also be run directly to confirm, forget or list matches:
+    python gl_match_cache.py confirm "Lamett" "Albi Biscuit" "Albi Biscuit (190)"
+    python gl_match_cache.py forget "Lamett" "Albi Biscuit"
+    python gl_match_cache.py list
+"""
+
+import argparse
+import datetime
+import hashlib
+import sqlite3
+
+from gl_matching import MatchResult, as_text, match_products, normalise, supplier_blocks
+
+CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS gl_match_cache (
+    product_key NVARCHAR(160) NOT NULL,
+    supplier_key NVARCHAR(160) NOT NULL,
+    gl_name NVARCHAR(160) NOT NULL,
+    score REAL NOT NULL,
+    block_hash CHAR(64),
+    confirmed INTEGER NOT NULL DEFAULT 0,
+    updated NVARCHAR(20) NOT NULL,
+    PRIMARY KEY (product_key, supplier_key)
+)
+"""
+
+
+def block_hash(gl_names, gl_suppliers, rows):
+    """
+    SHA-256 of the GOD List names (and their suppliers) in a block of candidate rows.
+    """
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update(f"{gl_suppliers[row]}\t{gl_names[row]}\n".encode("UTF-8"))
+    return digest.hexdigest()
+
+
+class MatchCache:
+    def __init__(self, db_file):
+        self.connection = sqlite3.connect(db_file)
+        self.connection.execute(CREATE_TABLE)
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+    def load(self):
+        """
+        Reads every cached match into a dict keyed on (normalised product, normalised supplier).
+        """
+        rows = self.connection.execute(
+            "SELECT product_key, supplier_key, gl_name, score, block_hash, confirmed FROM gl_match_cache"
+        )
+        return {(product_key, supplier_key): entry for product_key, supplier_key, *entry in rows}
+
+    def store(self, product, supplier, gl_name, score, gl_block_hash, confirmed=False):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO gl_match_cache "
+            "(product_key, supplier_key, gl_name, score, block_hash, confirmed, updated) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (normalise(product), normalise(supplier), gl_name, score, gl_block_hash, int(confirmed),
+             datetime.datetime.now().strftime("%Y-%m-%d %H:%M"))
+        )
+
+    def forget(self, product, supplier):
+        self.connection.execute("DELETE FROM gl_match_cache WHERE product_key = ? AND supplier_key = ?",
+                                (normalise(product), normalise(supplier)))
+
+    def entries(self):
+        return self.connection.execute(
+            "SELECT supplier_key, product_key, gl_name, score, confirmed, updated FROM gl_match_cache "
+            "ORDER BY supplier_key, product_key"
+        ).fetchall()
+
+    def match_products(self, products, suppliers, gl_names, gl_suppliers, threshold=90):
+        """
+        Same as gl_matching.match_products, but only products without a valid cached match are scored.
+        Newly accepted matches are added to the cache.
+        """
+        products = list(products)
+        suppliers = list(suppliers)
+        supplier_names = as_text(suppliers)
+        gl_names = as_text(gl_names)
+        gl_suppliers = as_text(gl_suppliers)
+        known_names = set(gl_names) - {""}
+
+        blocks, _ = supplier_blocks(supplier_names, gl_suppliers, threshold)
+        hashes = {supplier: block_hash(gl_names, gl_suppliers, rows) for supplier, rows in blocks.items()}
+        cached = self.load()
+
+        matched_names = [None] * len(products)
+        match_scores = [0.0] * len(products)
+        to_score = []
+        for i, (product, supplier) in enumerate(zip(products, supplier_names)):
+            entry = cached.get((normalise(product), normalise(supplier)))
+            if entry is not None:
+                gl_name, score, cached_hash, confirmed = entry
+                # Confirmed matches are kept as long as the GOD List still has the product
+                if gl_name in known_names and (confirmed or (cached_hash == hashes[supplier] and score >= threshold)):
+                    matched_names[i] = gl_name
+                    match_scores[i] = score
+                    self.hits += 1
+                    continue
+            to_score.append(i)
+        self.misses += len(to_score)
+
+        if to_score:
+            result = match_products([products[i] for i in to_score], [suppliers[i] for i in to_score],
+                                    gl_names, gl_suppliers, threshold)
+            for i, name, accepted, score in zip(to_score, result.matched_names, result.matched_gl_names,
+                                                result.match_scores):
+                matched_names[i] = name
+                match_scores[i] = score
+                if accepted is not None:
+                    self.store(products[i], suppliers[i], accepted, score, hashes[supplier_names[i]])
+            self.connection.commit()
+
+        matched_gl_names = []
+        failed_matches = []
+        for product, supplier, name, score in zip(products, suppliers, matched_names, match_scores):
+            if score >= threshold:
+                matched_gl_names.append(name)
+            else:
+                matched_gl_names.append(None)
+                failed_matches.append(f"{supplier} - {product}")
+        return MatchResult(matched_names, matched_gl_names, match_scores, failed_matches)
+
+    def report(self):
+        print(f"\nMatch cache: {self.hits} reused, {self.misses} scored\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the GOD List match cache.")
+    parser.add_argument("--db", default="../../db/product-data.db", help="Path to the product database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    confirm = subparsers.add_parser("confirm", help="Confirm a match by hand")
+    confirm.add_argument("supplier")
+    confirm.add_argument("product")
+    confirm.add_argument("gl_name")
+    forget = subparsers.add_parser("forget", help="Remove a product's cached match")
+    forget.add_argument("supplier")
+    forget.add_argument("product")
+    subparsers.add_parser("list", help="List all cached matches")
+    args = parser.parse_args()
+
+    cache = MatchCache(args.db)
+    if args.command == "confirm":
+        cache.store(args.product, args.supplier, args.gl_name, 100.0, None, confirmed=True)
+        print(f"Confirmed: {args.supplier} - {args.product} -> {args.gl_name}")
+    elif args.command == "forget":
+        cache.forget(args.product, args.supplier)
+        print(f"Forgotten: {args.supplier} - {args.product}")
+    else:
+        for supplier_key, product_key, gl_name, score, confirmed, updated in cache.entries():
+            print(f"{supplier_key} - {product_key} -> {gl_name} ({'confirmed' if confirmed else score}, {updated})")
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+GOD List Matching Engine
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+Matches products from a master data file against merged GOD List data, using the same scoring as the
+original nested loop in gl-wood-data-sync.py: the average of the fuzzy ratio of the product names and
+the fuzzy ratio of the supplier names, accepted if it reaches the threshold.
+
+Rather than scoring every product against every GOD List row, the GOD List is split into blocks by supplier.
+Each product is only scored against the blocks whose supplier either matches its own (after normalising) or
+is close enough that a match could still reach the threshold. A product whose supplier scores S can't do
+better than (100 + S) / 2, so any supplier scoring below (2 * threshold) - 100 is skipped without changing
+the result. The names within each block are then scored in one batch with rapidfuzz's cdist.
+
+Products which don't reach the threshold within their blocks are rescored against the whole GOD List, so the
+best score reported for failed matches is the same as before.
+
+Blank product names (including empty cells) score 0 against every GOD List name, and blank GOD List names score
+0 against every product, so products without a name always end up in the failed matches.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+MatchResult = namedtuple("MatchResult", ["matched_names", "matched_gl_names", "match_scores", "failed_matches"])
+
+
+def normalise(text):
+    """
+    Lower case, with repeated and surrounding whitespace removed. Anything which isn't a string becomes empty.
+    """
+    return " ".join(text.split()).casefold() if isinstance(text, str) else ""
+
+
+def as_text(values):
+    return [value if isinstance(value, str) else "" for value in values]
+
+
+def ratio_matrix(queries, choices):
+    """
+    Scores every query against every choice, rounded to whole numbers as fuzzywuzzy's fuzz.ratio does.
+    """
+    return np.round(process.cdist(queries, choices, scorer=fuzz.ratio, dtype=np.float64))
+
+
+def name_matrix(queries, choices):
+    """
+    Same as ratio_matrix, but blank names score 0 against everything, rather than 100 against each other.
+    """
+    scores = ratio_matrix(queries, choices)
+    scores[np.array([not query for query in queries], dtype=bool)] = 0
+    scores[:, np.array([not choice for choice in choices], dtype=bool)] = 0
+    return scores
+
+
+def supplier_blocks(suppliers, gl_suppliers, threshold=90):
+    """
+    Splits the GOD List into a block of candidate rows for each distinct supplier.
+
+    Args:
+        suppliers: The supplier (or manufacturer) of each product.
+        gl_suppliers: The supplier of each GOD List row.
+        threshold: The minimum average score for a match to be accepted.
+
+    Returns:
+        A dict of supplier -> array of candidate GOD List row numbers (in their original order), and a dict of
+        supplier -> array of that supplier's score against the supplier of each GOD List row.
+    """
+    suppliers = as_text(suppliers)
+    gl_suppliers = as_text(gl_suppliers)
+
+    # Supplier scores only depend on the pair of suppliers, so they're calculated once per distinct pair
+    distinct_suppliers = list(dict.fromkeys(suppliers))
+    distinct_gl_suppliers = list(dict.fromkeys(gl_suppliers))
+    gl_supplier_codes = {supplier: code for code, supplier in enumerate(distinct_gl_suppliers)}
+    gl_row_suppliers = np.array([gl_supplier_codes[supplier] for supplier in gl_suppliers], dtype=int)
+    supplier_scores = ratio_matrix(distinct_suppliers, distinct_gl_suppliers)
+    min_supplier_score = 2 * threshold - 100
+
+    blocks = {}
+    row_scores = {}
+    for supplier, scores_for_supplier in zip(distinct_suppliers, supplier_scores):
+        candidate_suppliers = [
+            code for code, gl_supplier in enumerate(distinct_gl_suppliers)
+            if normalise(gl_supplier) == normalise(supplier) or scores_for_supplier[code] >= min_supplier_score
+        ]
+        blocks[supplier] = np.flatnonzero(np.isin(gl_row_suppliers, candidate_suppliers))
+        row_scores[supplier] = scores_for_supplier[gl_row_suppliers]
+    return blocks, row_scores
+
+
+def match_products(products, suppliers, gl_names, gl_suppliers, threshold=90):
+    """
+    Finds the best GOD List match for each product.
+
+    Args:
+        products: Product names from the master data file.
+        suppliers: The supplier (or manufacturer) of each product.
+        gl_names: Product names from the merged GOD List.
+        gl_suppliers: The supplier of each GOD List row.
+        threshold: The minimum average score for a match to be accepted.
+
+    Returns:
+        A MatchResult containing, for each product, the best GOD List name, the accepted GOD List name
+        (None if the score is below the threshold) and the best score, plus a list of failed matches.
+    """
+    failed_labels = [f"{supplier} - {product}" for product, supplier in zip(products, suppliers)]
+    products = as_text(products)
+    suppliers = as_text(suppliers)
+    gl_names = as_text(gl_names)
+
+    blocks, supplier_scores = supplier_blocks(suppliers, gl_suppliers, threshold)
+
+    matched_names = [None] * len(products)
+    match_scores = [0] * len(products)
+    unmatched = []
+
+    rows_by_supplier = {}
+    for i, supplier in enumerate(suppliers):
+        rows_by_supplier.setdefault(supplier, []).append(i)
+
+    for supplier, rows in rows_by_supplier.items():
+        candidates = blocks[supplier]
+        if len(candidates) == 0:
+            unmatched.extend(rows)
+            continue
+
+        name_scores = name_matrix([products[i] for i in rows], [gl_names[c] for c in candidates])
+        total_scores = (name_scores + supplier_scores[supplier][candidates]) / 2
+        best = total_scores.argmax(axis=1)  # The first of any equally good matches, as before
+
+        for row, column, scores in zip(rows, best, total_scores):
+            if scores[column] >= threshold:
+                matched_names[row] = gl_names[candidates[column]]
+                match_scores[row] = scores[column]
+            else:
+                unmatched.append(row)
+
+    # Anything which didn't match within its blocks is scored against the whole GOD List
+    if unmatched and gl_names:
+        unmatched.sort()
+        name_scores = name_matrix([products[i] for i in unmatched], gl_names)
+        for row, scores in zip(unmatched, name_scores):
+            totals = (scores + supplier_scores[suppliers[row]]) / 2
+            column = totals.argmax()
+            if totals[column] > 0:
+                matched_names[row] = gl_names[column]
+                match_scores[row] = totals[column]
+
+    matched_gl_names = []
+    failed_matches = []
+    for label, name, score in zip(failed_labels, matched_names, match_scores):
+        if score >= threshold:
+            matched_gl_names.append(name)
+        else:
+            matched_gl_names.append(None)
+            failed_matches.append(label)
+
+    return MatchResult(matched_names, matched_gl_names, [float(score) for score in match_scores], failed_matches)
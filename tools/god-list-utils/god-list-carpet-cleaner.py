@@ -14,10 +14,18 @@ To do list:
 """
 
 import os
+import sys
 from tkinter import Tk
 import pandas as pd
 from tkinter.filedialog import askopenfilename
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.xlsx import read_sheet
+
+# The columns used from the GOD List. Nothing else is read from the workbook.
+GOD_LIST_COLUMNS = {"Name", "Material", "Width(s) (M)", "Cost (exc.) (SQM)", "Trade (exc.) (SQM)", "Price (inc.) (SQM)",
+                    "Display @ Twickenham", "Display @ Richmond", "Display on Richmond Stand"}
+
 
 def generate_location(twickenham, richmond):
     loc_list = []
@@ -38,7 +46,7 @@ def get_manufacturer(input_xlsx):
 
 def process_data(input_xlsx, output_csv):
     # Open the dataframe and set the header row
-    df = pd.read_excel(input_xlsx, header=1)
+    df = read_sheet(input_xlsx, header=1, usecols=lambda column: column in GOD_LIST_COLUMNS)
 
     # Create a new DataFrame to store the transformed data
     transformed_data = pd.DataFrame(
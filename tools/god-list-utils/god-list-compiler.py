@@ -4,6 +4,13 @@ import datetime
 import os
 from PyQt6.QtWidgets import QApplication, QFileDialog
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.xlsx import read_sheet
+
+# The columns used from each GOD List. Nothing else is read from the workbooks.
+GOD_LIST_COLUMNS = {"Name", "Material", "Width(s) (M)", "Cost (exc.) (SQM)", "Price (inc.) (SQM)",
+                    "Display @ Twickenham", "Display @ Richmond"}
+
 def get_manufacturer(input_xlsx):
     file_name = os.path.basename(input_xlsx)
     last_dot_index = file_name.rfind('.')
@@ -30,7 +37,7 @@ def process_xlsx_files(input_xlsx_files, output_csv):
     for input_xlsx in input_xlsx_files:
         
         # Open the dataframe and set the header row
-        df = pd.read_excel(input_xlsx, header=1)
+        df = read_sheet(input_xlsx, header=1, usecols=lambda column: column in GOD_LIST_COLUMNS)
 
         # Iterate through each row in the original DataFrame
         for _, row in df.iterrows():
@@ -8,10 +8,19 @@ This script takes one of Murray's God List files and converts it to CSV.
 """
 
 import os
+import sys
 from tkinter import Tk
 import pandas as pd
 from tkinter.filedialog import askopenfilename
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.xlsx import read_sheet
+
+# The columns used from the GOD List. Nothing else is read from the workbook.
+GOD_LIST_COLUMNS = {"Product", "Collection", "Thickness (mm)", "Pack Quantity (SQM)", "Cost (exc.) (SQM)",
+                    "Trade (exc.) (SQM)", "Price (inc.) (SQM)", "Display @ Twickenham", "Display @ Richmond",
+                    "Display on Richmond Stand"}
+
 
 def generate_location(twickenham, richmond):
     loc_list = []
@@ -24,7 +33,7 @@ def generate_location(twickenham, richmond):
 
 def process_data(input_xlsx, output_csv):
     # Open the dataframe and set the header row
-    df = pd.read_excel(input_xlsx, header=1)
+    df = read_sheet(input_xlsx, header=1, usecols=lambda column: column in GOD_LIST_COLUMNS)
 
     manufacturer_name = input("What's the manufacturer's name?: ")
 
@@ -5,31 +5,43 @@ wj@wovenandwoods.com
 """
 from tkinter import Tk
 import pandas as pd
-import datetime
+import os
+import sys
 from tkinter.filedialog import askopenfilename
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.instrument import stage
+from common.notes import legacy_simpro_notes
+from common.productdb import read_master_data
+from common.schemas import MIXED, NUMBER, TEXT, Schema
+
+# The columns used from the workbook
+SCHEMA = Schema("simPRO carpet data", {
+    "Part Number": TEXT,
+    "Description": TEXT,
+    "Manufacturer": TEXT,
+    "Group": TEXT,
+    "Width": MIXED,
+    "SQM Cost ex VAT": NUMBER,
+    "SQM Sell inc VAT": NUMBER,
+    "Location": TEXT,
+    "Discontinued?": TEXT,
+})
+
 
 def lm_price(sqm_price, width):
     return sqm_price * width if width > 0 else sqm_price
 
 
-def note_field(sell_price, twickenham, richmond):
-    update_date = datetime.datetime.now().strftime("%d-%b-%Y")
-    location_data = [loc for loc, flag in zip(["Twickenham", "Richmond"], [twickenham, richmond]) if flag == "Yes"]
-    return (f"<div>Price per SQM: £{"{0:.2f}".format(sell_price)} inc VAT</div>"
-            f"<div>Locations: {', '.join(location_data) if len(location_data) > 0 else 'None'}</div>"
-            f"<br>"
-            f"<div><em>Updated: {update_date}</em></div>")
-
-
 def process_data(input_data, output_data):
     try:
-        df = pd.read_excel(input_data)
+        df = read_master_data(input_data, SCHEMA)
     except Exception as e:
         print(f"\nError: {e}\n")
         return
 
-    transformed_data = pd.DataFrame(columns=[
+    # Columns for the transformed data
+    columns = [
         "Description",
         "Part Number",
         "Manufacturer",
@@ -39,33 +51,34 @@ def process_data(input_data, output_data):
         "Group (Ignored for Updates)",
         "Search Terms",
         "Notes"
-    ])
+    ]
 
     discontinued_ranges = [
-        f"{row['Part Number']},{row['Description']}" for _, row in df.iterrows() if row['Discontinued?'] == 'Yes'
+        f"{product.part_number},{product.description}" for product in SCHEMA.records(df[df['Discontinued?'] == 'Yes'])
     ]
 
-    for _, row in df.iterrows():
-        if row['Discontinued?'] == 'Yes':
-            continue
-
-        # Set the locations values
-        loc_twickenham = "Yes" if "Twickenham" in str(row['Location']) else ""
-        loc_richmond = "Yes" if "Richmond" in str(row['Location']) else ""
-
-        new_data = pd.DataFrame({
-            "Description": [row['Description']],
-            "Part Number": [row['Part Number']],
-            "Manufacturer": [row['Manufacturer']],
-            "Cost Price": [lm_price(row['SQM Cost ex VAT'], row['Width'])],
-            "Trade Price": [lm_price(row['SQM Cost ex VAT'], row['Width'])],
-            "Sell Price (Tier 1 (Buy))": [(lm_price(row['SQM Sell inc VAT'], row['Width'])) / 6 * 5],
-            "Group (Ignored for Updates)": [row['Group']],
-            "Search Terms": f"{row['Manufacturer']} {row['Description']}",
-            "Notes": [note_field(row['SQM Sell inc VAT'], loc_twickenham, loc_richmond)]
-        })
-        transformed_data = pd.concat([transformed_data.astype(transformed_data.dtypes),
-                                      new_data.astype(transformed_data.dtypes)])
+    # Set the locations values
+    active = df[df['Discontinued?'] != 'Yes']
+    locations = active['Location'].map(str)
+    notes = legacy_simpro_notes(active['SQM Sell inc VAT'],
+                                ["Yes" if "Twickenham" in location else "" for location in locations],
+                                ["Yes" if "Richmond" in location else "" for location in locations])
+
+    # Each product is collected as a list, then turned into a DataFrame at the end
+    rows = []
+    for product, note in zip(SCHEMA.records(active), notes):
+        rows.append([
+            product.description,
+            product.part_number,
+            product.manufacturer,
+            lm_price(product.sqm_cost_ex_vat, product.width),
+            lm_price(product.sqm_cost_ex_vat, product.width),
+            (lm_price(product.sqm_sell_inc_vat, product.width)) / 6 * 5,
+            product.group,
+            f"{product.manufacturer} {product.description}",
+            note,
+        ])
+    transformed_data = pd.DataFrame(rows, columns=columns, dtype=object)
 
     print("\nLegacy simPRO Carpet Data Converter\n(c) 2024 Woven & Woods\nwj@wovenandwoods.com")
     print("\nDiscontinued Ranges\n---------------------")
@@ -92,7 +105,8 @@ def process_data(input_data, output_data):
     # Sort the data
     transformed_data = transformed_data.sort_values(by=['Description'], ascending=True, na_position='first')
 
-    transformed_data.to_csv(output_data, index=False)
+    with stage("export"):
+        transformed_data.to_csv(output_data, index=False)
     print(f"\nCSV file '{output_data}' created successfully!\n")
 
 
@@ -103,6 +117,7 @@ output_dir = "./processed-data"
 if input_file:
     print(f"Selected file: {input_file}")
     output_file = f"{output_dir}/simpro-{input_file.split('/')[-1].replace('.xlsx', '')}.csv"
-    process_data(input_file, output_file)
+    with stage("convert"):
+        process_data(input_file, output_file)
 else:
     print("No file selected.")
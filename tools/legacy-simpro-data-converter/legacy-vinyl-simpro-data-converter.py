@@ -5,28 +5,39 @@ wj@wovenandwoods.com
 """
 from tkinter import Tk
 import pandas as pd
-import datetime
+import os
+import sys
 from tkinter.filedialog import askopenfilename
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.instrument import stage
+from common.notes import legacy_simpro_notes
+from common.productdb import read_master_data
+from common.schemas import MIXED, NUMBER, TEXT, Schema
 
-def note_field(sell_price, twickenham, richmond, pack_qty):
-    update_date = datetime.datetime.now().strftime("%d-%b-%Y")
-    location_data = [loc for loc, flag in zip(["Twickenham", "Richmond"], [twickenham, richmond]) if flag == "Yes"]
-    return (f"<div>Price per SQM: £{"{0:.2f}".format(sell_price)} inc VAT</div>"
-            f"<div>Locations: {', '.join(location_data) if len(location_data) > 0 else 'None'}</div>"
-            f"<div>Pack Quantity: {pack_qty} SQM</div>"
-            f"<br>"
-            f"<div><em>Updated: {update_date}</em></div>")
+# The columns used from the workbook
+SCHEMA = Schema("simPRO vinyl data", {
+    "Part Number": TEXT,
+    "Description": TEXT,
+    "Manufacturer": TEXT,
+    "Group": TEXT,
+    "Pack Quantity": MIXED,
+    "SQM cost ex VAT": NUMBER,
+    "SQM sell inc VAT": NUMBER,
+    "Location": TEXT,
+    "Discontinued?": TEXT,
+})
 
 
 def process_data(input_data, output_data):
     try:
-        df = pd.read_excel(input_data)
+        df = read_master_data(input_data, SCHEMA)
     except Exception as e:
         print(f"\nError: {e}\n")
         return
 
-    transformed_data = pd.DataFrame(columns=[
+    # Columns for the transformed data
+    columns = [
         "Description",
         "Part Number",
         "Manufacturer",
@@ -36,35 +47,36 @@ def process_data(input_data, output_data):
         "Group (Ignored for Updates)",
         "Search Terms",
         "Notes"
-    ])
+    ]
 
     discontinued_ranges = [
-        f"{row['Part Number']},{row['Description']}" for _, row in df.iterrows() if
-        row['Discontinued?'] == 'Yes'
+        f"{product.part_number},{product.description}" for product in SCHEMA.records(df[df['Discontinued?'] == 'Yes'])
     ]
 
-    for _, row in df.iterrows():
-        if row['Discontinued?'] == 'Yes':
-            continue
-
-        # Set the locations values
-        loc_twickenham = "Yes" if "Twickenham" in str(row['Location']) else ""
-        loc_richmond = "Yes" if "Richmond" in str(row['Location']) else ""
+    # Set the locations values
+    active = df[df['Discontinued?'] != 'Yes']
+    locations = active['Location'].map(str)
+    notes = legacy_simpro_notes(active['SQM sell inc VAT'],
+                                ["Yes" if "Twickenham" in location else "" for location in locations],
+                                ["Yes" if "Richmond" in location else "" for location in locations],
+                                active['Pack Quantity'])
 
-        new_data = pd.DataFrame({
-            "Description": [row['Description']],
-            "Part Number": [row['Part Number']],
-            "Manufacturer": [row['Manufacturer']],
-            "Cost Price": [row['SQM cost ex VAT']],
-            "Trade Price": [row['SQM cost ex VAT']],
-            "Sell Price (Tier 1 (Buy))": [row['SQM sell inc VAT'] / 6 * 5],
-            "Group (Ignored for Updates)": [row['Group']],
-            "Search Terms": f"{row['Manufacturer']} {row['Description']}",
-            "Notes": [note_field(row['SQM sell inc VAT'], loc_twickenham, loc_richmond, row['Pack Quantity'])]
-        })
-        transformed_data = (pd.concat([transformed_data.astype(transformed_data.dtypes),
-                                       new_data.astype(transformed_data.dtypes)])
-                            .sort_values(by=["Description"], ascending=[True]))
+    # Each product is collected as a list, then turned into a DataFrame at the end
+    rows = []
+    for product, note in zip(SCHEMA.records(active), notes):
+        rows.append([
+            product.description,
+            product.part_number,
+            product.manufacturer,
+            product.sqm_cost_ex_vat,
+            product.sqm_cost_ex_vat,
+            product.sqm_sell_inc_vat / 6 * 5,
+            product.group,
+            f"{product.manufacturer} {product.description}",
+            note,
+        ])
+    transformed_data = pd.DataFrame(rows, columns=columns, dtype=object)
+    transformed_data = transformed_data.sort_values(by=["Description"], ascending=[True], kind="stable")
 
     print("\nLegacy simPRO Vinyl Data Converter\n(c) 2024 Woven & Woods\nwj@wovenandwoods.com")
     print("\nDiscontinued Ranges\n---------------------")
@@ -88,7 +100,8 @@ def process_data(input_data, output_data):
     else:
         print("\nNo duplicate Part Numbers detected.")
 
-    transformed_data.to_csv(output_data, index=False)
+    with stage("export"):
+        transformed_data.to_csv(output_data, index=False)
     print(f"\nCSV file '{output_data}' created successfully!\n")
 
 
@@ -99,6 +112,7 @@ output_dir = "./processed-data"
 if input_file:
     print(f"Selected file: {input_file}")
     output_file = f"{output_dir}/simpro-{input_file.split('/')[-1].replace('.xlsx', '')}.csv"
-    process_data(input_file, output_file)
+    with stage("convert"):
+        process_data(input_file, output_file)
 else:
     print("No file selected.")
@@ -0,0 +1,61 @@
+"""
+Product Database Loader
+(c) 2024 Woven & Woods
+wj@wovenandwoods.com
+
+This script loads the master workbooks in the data folder into the product database (db/product-data.db).
+Each family's products are replaced in full, so it can be re-run whenever a workbook has been updated.
+
+Once loaded, the converters can be run with --db to read their data from the database instead of parsing
+the XLSX files. See common/productdb.py for the tables.
+
+Usage:
+    python load-product-db.py                  # Load every workbook
+    python load-product-db.py carpet wood      # Load only the named families
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.productdb import DB_FILE, FAMILIES, connect, load_family, load_suppliers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load the master workbooks into the product database.")
+    parser.add_argument("families", nargs="*", help=f"Families to load (default: all of {', '.join(FAMILIES)})")
+    parser.add_argument("--data", default="../../data", help="Folder containing the master workbooks")
+    parser.add_argument("--db", default=DB_FILE, help="Path to the product database")
+    args = parser.parse_args()
+
+    unknown = [family for family in args.families if family not in FAMILIES]
+    if unknown:
+        sys.exit(print(f"\nUnknown famil{'ies' if len(unknown) > 1 else 'y'}: {', '.join(unknown)}\n"))
+
+    print("\nProduct Database Loader\n(c) 2024 Woven & Woods\nwj@wovenandwoods.com\n")
+
+    connection = connect(args.db)
+    try:
+        supplier_file = os.path.join(args.data, "suppliers.xlsx")
+        if os.path.exists(supplier_file):
+            print(f"{'suppliers':<16}{load_suppliers(connection, supplier_file):>6} rows")
+
+        for family in args.families or FAMILIES:
+            path = os.path.join(args.data, FAMILIES[family])
+            if not os.path.exists(path):
+                print(f"{family:<16}  Not found: {path}")
+                continue
+            start = time.perf_counter()
+            count = load_family(connection, family, path)
+            print(f"{family:<16}{count:>6} products in {time.perf_counter() - start:.2f}s")
+        connection.commit()
+    finally:
+        connection.close()
+
+    print(f"\nProduct database updated: {os.path.abspath(args.db)}\n")
+
+
+if __name__ == "__main__":
+    main()
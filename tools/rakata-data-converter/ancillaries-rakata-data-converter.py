@@ -9,127 +9,63 @@ using the import module.
 The script generates a master CSV containing all products from all manufacturers, saved in the 'processed-data' folder.
 """
 
-import pandas as pd
 import sys
-import unicodedata
-import datetime
-
-
-def remove_alpha(string):
-    modified_string = ''.join(c for c in str(string) if c in "0123456789.")
-    return modified_string
-
-def export_supplier_data(df):
-    for supplier in df['Default Supplier'].unique():
-        df[df['Default Supplier'] == supplier].to_csv(f"./processed-data/ancillaries/{supplier.lower().replace(' ', '-')}"
-                                                      f"-ancillaries-rakata-data.csv", index=False)
-    print("CSV files created successfully for all suppliers in ./processed-data/ancillaries/\n")
-
-
-def note_field(sell_price, manufacturer):
-    update_date = datetime.datetime.now().strftime("%d-%b-%Y")
-    return f"Manufacturer: {manufacturer}; Updated: {update_date}"
-
-
-def remove_accented_characters(input_string):
-    nfkd_form = unicodedata.normalize('NFKD', input_string)
-    return ''.join([c for c in nfkd_form if not unicodedata.combining(c)])
+import os
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.exports import export_groups, incremental_mode, report_changes
+from common.instrument import stage
+from common.notes import rakata_ancillary_notes
+from common.productdb import read_master_data
+from common.rakata import rakata_records
+from common.schemas import CATEGORY, NUMBER, TEXT, Schema
+from common.suppliers import load_supplier_directory
+
+# The columns used from the master workbook
+SCHEMA = Schema("Rakata ancillaries data", {
+    "SKU": TEXT,
+    "Product": TEXT,
+    "Manufacturer": CATEGORY,
+    "Supplier": CATEGORY,
+    "Type": CATEGORY,
+    "Cost ex VAT": NUMBER,
+    "Sell ex VAT": NUMBER,
+    "Discontinued?": CATEGORY,
+})
+
+
+def export_supplier_data(df, incremental=False):
+    written = export_groups(df, 'Default Supplier', "./processed-data/ancillaries/",
+                            lambda supplier: f"{supplier.lower().replace(' ', '-')}-ancillaries-rakata-data.csv",
+                            'SKU', incremental, "./processed-data/ancillaries-rakata-manifest.json",
+                            "./processed-data/ancillaries-rakata-delta.csv")
+    if incremental:
+        report_changes(written, "./processed-data/ancillaries-rakata-delta.csv")
+    else:
+        print("CSV files created successfully for all suppliers in ./processed-data/ancillaries/\n")
 
 
 def lookup_supplier_email(supplier_name):
-    try:
-        df = pd.read_excel(supplier_xlsx_file)
-    except FileNotFoundError:
-        sys.exit(print("Supplier data not found."))
-
-    try:
-        # Select rows where the 'Name' column matches the supplier_name
-        supplier_data = df[df['Name'] == supplier_name]
-        # Extract the email from the 'Email' column (assuming there's only one match)
-        return supplier_data['Email'].iloc[0]
-    except IndexError:
-        # Handle the case where no supplier is found with the given name
-        return None
+    # The supplier data is only read once, then looked up by name
+    return load_supplier_directory(supplier_xlsx_file).email(supplier_name)
 
 
 def process_data(input_xlsx):
     try:
-        df = pd.read_excel(input_xlsx)
+        df = read_master_data(input_xlsx, SCHEMA)
     except FileNotFoundError as e:
         sys.exit(print(f"\nError opening data file: {e}\n"))
 
-    transformed_data = pd.DataFrame(columns=[
-        'SKU',
-        'Product Name',
-        'Description',
-        'Cost (Ex VAT)',
-        'Price (Ex VAT)',
-        'Product Type',
-        'VAT Rate',
-        'Pack Coverage',
-        'Pack Linear Meterage',
-        'Available Stock Quantity',
-        'Active / Inactive',
-        'Product Range',
-        'Quote Script',
-        'Available Widths',
-        'Colours',
-        'Flooring Type',
-        'Calculation Type',
-        'Wastage %',
-        'Outgoing Labour Cost (per m2)',
-        'Labour Retail Price (per m2)',
-        'Default Supplier',
-        'Default Supplier Email',
-    ])
-
-    for _, row in df.iterrows():
-
-        # Set product status (Active/Inactive)
-        try:
-            if row['Discontinued?'].lower() == "yes":
-                product_status = 'Inactive'
-            else:
-                product_status = 'Active'
-        except AttributeError:
-            product_status = 'Active'
-
-        # Set wastage
-        if row['Type'].lower() == 'plank':
-            wastage = '5'
-        else:
-            wastage = '10'
-
-        new_data = pd.DataFrame({
-            'SKU': [row['SKU']],
-            'Product Name': [remove_accented_characters(row['Product'])],
-            'Description': [note_field(row['Sell inc VAT'], row['Manufacturer'])],
-            'Cost (Ex VAT)': [row['Cost ex VAT']],
-            'Price (Ex VAT)': [row['Sell ex VAT']],
-            'Product Type': ['Standard'],
-            'VAT Rate': ['20'],
-            'Pack Coverage': [''],
-            'Pack Linear Meterage': [''],
-            'Available Stock Quantity': ['0'],
-            'Active / Inactive': [product_status],
-            'Product Range': [remove_accented_characters(f"{row['Manufacturer']} - {row['Product']}")],
-            'Quote Script': [remove_accented_characters(f"{row['Manufacturer']} - {row['Product']}")],
-            'Available Widths': [''],
-            'Colours': [''],
-            'Flooring Type': ['Ancillaries'],
-            'Calculation Type': ['Per unit'],
-            'Wastage %': [wastage],
-            'Outgoing Labour Cost (per m2)': ['0'],
-            'Labour Retail Price (per m2)': ['0'],
-            'Default Supplier': [remove_accented_characters(row['Supplier'])],
-            'Default Supplier Email': [lookup_supplier_email(row['Supplier'])],
-        })
-
-        transformed_data = pd.concat(
-            [transformed_data.astype(transformed_data.dtypes), new_data.astype(transformed_data.dtypes)])
+    notes = rakata_ancillary_notes(df['Manufacturer'])
+    transformed_data = rakata_records(df, notes, 'Ancillaries', 'Per unit', wastage=True)
+
+    # The supplier emails are looked up in order, so that unknown suppliers are reported in the order they appear
+    transformed_data['Default Supplier Email'] = [lookup_supplier_email(supplier) for supplier in df['Supplier']]
+
+    load_supplier_directory(supplier_xlsx_file).report()
 
     # Export individual CSV files for each supplier. These are saved to ./processed-data/ancillaries/
-    export_supplier_data(transformed_data)
+    export_supplier_data(transformed_data, incremental_mode())
 
     return transformed_data
 
@@ -139,4 +75,7 @@ supplier_xlsx_file = "../../data/suppliers.xlsx"
 input_xlsx_file = "../../data/ancillaries.xlsx"
 output_csv_file = "./processed-data/ancillaries-rakata-data.csv"
 
-process_data(input_xlsx_file).to_csv(output_csv_file, index=False)
+with stage("convert"):
+    transformed_data = process_data(input_xlsx_file)
+with stage("export"):
+    transformed_data.to_csv(output_csv_file, index=False)
@@ -25,6 +25,26 @@ saved in the 'processed-data/wood' folder. These CSVs can be imported directly i
 import pandas as pd
 from tkinter import Tk
 from tkinter.filedialog import askopenfilename
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.instrument import stage
+from common.productdb import read_master_data
+from common.schemas import NUMBER, TEXT, Schema
+
+# The columns used from the workbook
+SCHEMA = Schema("simPRO ancillaries data", {
+    "SKU": TEXT,
+    "Product": TEXT,
+    "Manufacturer": TEXT,
+    "Supplier": TEXT,
+    "Category": TEXT,
+    "Type": TEXT,
+    "Cost ex VAT": NUMBER,
+    "Sell ex VAT": NUMBER,
+    "Discontinued?": TEXT,
+})
 
 
 def export_supplier_data(df):
@@ -32,10 +52,11 @@ def export_supplier_data(df):
     Creates an individual CSV file for every supplier detected in the XLSX file.
     These files are saved to './processed-data/ancillaries'.
     """
-    for supplier in df['Supplier'].unique():
-        df[df['Supplier'] == supplier].to_csv(
-            f"./processed-data/ancillaries/{supplier.lower().replace(' ', '_')}_ancillaries_data.csv", index=False
-        )
+    with stage("export"):
+        for supplier in df['Supplier'].unique():
+            df[df['Supplier'] == supplier].to_csv(
+                f"./processed-data/ancillaries/{supplier.lower().replace(' ', '_')}_ancillaries_data.csv", index=False
+            )
     print("CSV files created successfully for all suppliers in ./processed-data/ancillaries/\n")
 
 
@@ -44,12 +65,13 @@ def process_xlsx_to_csv(input_xlsx, output_csv):
     Main function that processes the XLSX file and outputs a CSV file.
     """
     try:
-        df = pd.read_excel(input_xlsx)
+        df = read_master_data(input_xlsx, SCHEMA)
     except Exception as e:
         print(f"\nError: {e}\n")
         return
 
-    transformed_data = pd.DataFrame(columns=[
+    # Columns for the transformed data
+    columns = [
         "Description",
         "Part Number",
         "Manufacturer",
@@ -61,30 +83,30 @@ def process_xlsx_to_csv(input_xlsx, output_csv):
         "Subgroup 1 (Ignored for Updates)",
         "Search Terms",
         "Notes"
-    ])
-
-    discontinued_ranges = [
-        f"{row['Supplier']} {row['Product']}" for _, row in df.iterrows() if row['Discontinued?'] == 'Yes'
     ]
 
-    for _, row in df.iterrows():
-        if row['Discontinued?'] == 'Yes':
+    # Each product is collected as a list, then turned into a DataFrame at the end
+    rows = []
+    discontinued_ranges = []
+
+    for product in SCHEMA.records(df):
+        if product.discontinued == 'Yes':
+            discontinued_ranges.append(f"{product.supplier} {product.product}")
             continue
-        new_data = pd.DataFrame({
-            "Description": [row['Product']],
-            "Part Number": [row['SKU']],
-            "Manufacturer": [row['Manufacturer']],
-            "Supplier": [row["Supplier"]],
-            "Cost Price": [row['Cost ex VAT']],
-            "Trade Price": [row['Cost ex VAT']],
-            "Sell Price (Tier 1 (Buy))": [row['Sell ex VAT']],
-            "Group (Ignored for Updates)": [row['Category']],
-            "Subgroup 1 (Ignored for Updates)": [row['Type']],
-            "Search Terms": f"{row["Supplier"]} {row['Manufacturer']} {row['Product']}",
-            "Notes": ["Data synced from Rakata"]
-        })
-        transformed_data = pd.concat([transformed_data.astype(transformed_data.dtypes),
-                                      new_data.astype(transformed_data.dtypes)])
+        rows.append([
+            product.product,
+            product.sku,
+            product.manufacturer,
+            product.supplier,
+            product.cost_ex_vat,
+            product.cost_ex_vat,
+            product.sell_ex_vat,
+            product.category,
+            product.type,
+            f"{product.supplier} {product.manufacturer} {product.product}",
+            "Data synced from Rakata",
+        ])
+    transformed_data = pd.DataFrame(rows, columns=columns, dtype=object)
 
     print("\nRakata to legacy-simpro-data Ancillaries Data Converter\n(c) 2024 Woven & Woods\nwj@wovenandwoods.com")
     print("\nDiscontinued Ranges\n---------------------")
@@ -100,7 +122,8 @@ def process_xlsx_to_csv(input_xlsx, output_csv):
         print(duplicates[['Part Number', 'Supplier', 'Description']])
         print("\n")
 
-    transformed_data.to_csv(output_csv, index=False)
+    with stage("export"):
+        transformed_data.to_csv(output_csv, index=False)
     print(f"CSV file '{output_csv}' created successfully!\n")
     export_supplier_data(transformed_data)
 
@@ -118,6 +141,7 @@ input_xlsx_file = askopenfilename()
 if input_xlsx_file:
     print(f"Selected file: {input_xlsx_file}")
     output_csv_file = "./processed-data/ancillaries_simpro_data.csv"
-    process_xlsx_to_csv(input_xlsx_file, output_csv_file)
+    with stage("convert"):
+        process_xlsx_to_csv(input_xlsx_file, output_csv_file)
 else:
     print("No file selected.")
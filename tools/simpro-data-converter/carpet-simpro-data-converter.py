@@ -28,54 +28,174 @@ saved in the 'processed-data/carpet' folder. These CSVs can be imported directly
 """
 
 import pandas as pd
-import hashlib
-import re
-import datetime
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.exports import CatalogueWriter, incremental_mode, report_changes
+from common.instrument import stage
+from common.notes import simpro_notes
+from common.parallel import map_partitions, merge_partitions, parallel_workers
+from common.productdb import read_master_data
+from common.schemas import CATEGORY, MIXED, NUMBER, TEXT, Schema
+from common.skus import VariantCodes
+
+# The columns used from the master workbook
+SCHEMA = Schema("simPRO carpet data", {
+    "SKU": TEXT,
+    "Product": TEXT,
+    "Manufacturer": CATEGORY,
+    "Category": CATEGORY,
+    "Type": CATEGORY,
+    "Widths": MIXED,
+    "Colours": MIXED,
+    "Cost ex VAT": NUMBER,
+    "Sell ex VAT": NUMBER,
+    "Sell inc VAT": NUMBER,
+    "Twickenham": CATEGORY,
+    "Richmond": CATEGORY,
+    "Discontinued?": CATEGORY,
+})
+
+COLUMNS = [
+    "Description",
+    "Part Number",
+    "Manufacturer",
+    "Cost Price",
+    "Trade Price",
+    "Sell Price (Tier 1 (Buy))",
+    "Group (Ignored for Updates)",
+    "Subgroup 1 (Ignored for Updates)",
+    "Search Terms",
+    "Notes"
+]
+
+# Where build_variants keeps what each variation's part number is made from
+VARIANT_KEYS = ["Variant SKU", "Variant Colour", "Variant Width"]
+
+# Ranges are expanded and written this many at a time, so only their variations are held in memory
+CHUNK_SIZE = 250
 
 
 def remove_double_spaces(text):
     """
-    Removes double spaces appearing in product names.
+    Removes double spaces appearing in product names. Accepts a pandas Series of strings.
     """
-    return re.sub(' +', ' ', text)
+    return text.str.replace(' +', ' ', regex=True)
 
 
 def lm_price(sqm_price, width):
     """
     Converts any given SQM price to LM price by multiplying it by the width.
-    Accepts only floats or ints.
+    Accepts floats or ints, or pandas Series of either (in which case the whole column is converted in one go).
     """
+    if isinstance(sqm_price, pd.Series):
+        return sqm_price.astype(float) * width.astype(float)
     return float(sqm_price) * float(width)
 
 
-def export_manufacturer_data(df):
+def manufacturer_writer(output_csv, incremental=False):
     """
-    Creates an individual CSV file for every manufacturer detected in the XLSX file.
-    These files are saved to './processed-data/carpet'.
+    Creates the writer for the master CSV and an individual CSV file for every manufacturer detected in the
+    XLSX file. Rows are written to both as they are generated. The manufacturer files are saved to
+    './processed-data/carpet'.
+
+    In incremental mode, only the files for manufacturers whose products have changed are written.
+    """
+    return CatalogueWriter(COLUMNS, 'Manufacturer', "./processed-data/carpet/",
+                           lambda manufacturer: f"{manufacturer.lower().replace(' ', '_')}_carpet_data.csv",
+                           'Part Number', output_csv, incremental, "./processed-data/carpet-simpro-manifest.json",
+                           "./processed-data/carpet-simpro-delta.csv")
+
+
+def report_manufacturer_data(written, incremental=False):
+    if incremental:
+        report_changes(written, "./processed-data/carpet-simpro-delta.csv")
+    else:
+        print("CSV files created successfully for all manufacturers in ./processed-data/carpet/\n")
+
+
+def split_list(value):
+    """
+    Splits a comma-separated 'Colours' or 'Widths' cell into a list, exactly as the row-by-row version did.
     """
-    for manufacturer in df['Manufacturer'].unique():
-        df[df['Manufacturer'] == manufacturer].to_csv(
-            f"./processed-data/carpet/{manufacturer.lower().replace(' ', '_')}_carpet_data.csv", index=False
-        )
-    print("CSV files created successfully for all manufacturers in ./processed-data/carpet/\n")
+    return str(value).split(",") if value is not None else [""]
 
 
-def note_field(sell_price, twickenham, richmond):
+def build_variants(df):
     """
-    Populates the legacy-simpro-data notes field using the existing sell price and location data.
+    Expands every active range into one row per colour and width variation.
+
+    Rather than building each variation as its own DataFrame, the 'Colours' and 'Widths' columns are split and
+    exploded so that the whole catalogue is transformed column by column. Ranges with a single (or no) colour only
+    get width variations, as before. Variations come out in the same order as the original nested loops, and keep
+    the index of the range they came from.
+
+    Part numbers are left empty. The SKU, colour and width each one is made from are kept in the VARIANT_KEYS
+    columns, so that they can be assigned in order afterwards (see assign_part_numbers).
+    """
+    active = df[df['Discontinued?'] != 'Yes']
+    if active.empty:
+        return pd.DataFrame(columns=COLUMNS + VARIANT_KEYS)
+
+    # The notes only depend on the range, so they are generated once per range rather than once per variation
+    notes = simpro_notes(active['Sell inc VAT'], active['Twickenham'], active['Richmond'])
+
+    colour_lists = active['Colours'].map(split_list)
+    has_colours = colour_lists.map(len) > 1  # if there are colour variations
+    variants = active.assign(
+        Notes=notes,
+        has_colours=has_colours,
+        colour=colour_lists.where(has_colours, pd.Series([[""]] * len(active), index=active.index)),
+        width=active['Widths'].map(split_list),
+    ).explode('colour').explode('width')
+
+    has_colours = variants['has_colours']
+    colour = variants['colour'].astype(object)
+    width = variants['width'].astype(object)
+    product = variants['Product'].map(str)
+    manufacturer = variants['Manufacturer'].astype(object).map(str)
+    colour_stripped = colour.str.strip()
+    width_stripped = width.str.strip()
+
+    description = product + (" " + colour).where(has_colours, "") + " (" + width_stripped + " M)"
+    search_terms = manufacturer + " " + product + (" " + colour).where(has_colours, "") + " " + width
+
+    return pd.DataFrame({
+        "Description": remove_double_spaces(description).to_numpy(dtype=object),
+        "Part Number": None,
+        "Manufacturer": variants['Manufacturer'].array,
+        "Cost Price": lm_price(variants['Cost ex VAT'], width_stripped).to_numpy(),
+        "Trade Price": lm_price(variants['Cost ex VAT'], width_stripped).to_numpy(),
+        "Sell Price (Tier 1 (Buy))": lm_price(variants['Sell ex VAT'], width_stripped).to_numpy(),
+        "Group (Ignored for Updates)": variants['Category'].array,
+        "Subgroup 1 (Ignored for Updates)": variants['Type'].array,
+        "Search Terms": search_terms.to_numpy(dtype=object),
+        "Notes": variants['Notes'].to_numpy(dtype=object),
+        "Variant SKU": variants['SKU'].to_numpy(dtype=object),
+        "Variant Colour": colour_stripped.to_numpy(dtype=object),
+        "Variant Width": width_stripped.to_numpy(dtype=object),
+    }, index=variants.index)
+
+
+def assign_part_numbers(variations, variant_codes):
+    """
+    Fills in the part numbers for the variations from build_variants, from variant_codes (see common/skus.py).
     """
-    update_date = datetime.datetime.now().strftime("%d-%b-%Y")
-    location_data = [loc for loc, flag in zip(["Twickenham", "Richmond"], [twickenham, richmond]) if flag == "Yes"]
-    return (f"<div>Price per SQM: £{"{0:.2f}".format(sell_price)} inc VAT</div>"
-            f"<div>Locations: {', '.join(location_data) if len(location_data) > 0 else 'None'}</div>"
-            f"<br>"
-            f"<div>Updated: {update_date}</div>")
+    part_numbers = variant_codes.codes_for(variations['Variant SKU'], variations['Variant Colour'],
+                                           variations['Variant Width'], variations['Manufacturer'],
+                                           variations['Description'])
+    return variations.assign(**{"Part Number": part_numbers})[COLUMNS]
 
-def sku_field(sku, colour, width):
+
+def expand_variants(df, variant_codes=None):
     """
-    Creates a unique five-digit hash from a concatenation of the colour and width strings.
+    Expands every active range into one row per colour and width variation, with part numbers.
+    If no variant_codes are given, codes are only kept in memory.
     """
-    return f"{sku}-{hashlib.sha1((colour + width).encode('UTF-8')).hexdigest()[:5].upper()}"
+    if variant_codes is None:
+        variant_codes = VariantCodes(db_file=None)
+    return assign_part_numbers(build_variants(df), variant_codes).reset_index(drop=True)
 
 
 def process_xlsx_to_csv(input_xlsx, output_csv):
@@ -83,71 +203,32 @@ def process_xlsx_to_csv(input_xlsx, output_csv):
     Main function that processes the XLSX file and outputs a CSV file.
     """
     try:
-        df = pd.read_excel(input_xlsx)
+        df = read_master_data(input_xlsx, SCHEMA)
     except Exception as e:
         print(f"\nError: {e}\n")
         return
 
-    transformed_data = pd.DataFrame(columns=[
-        "Description",
-        "Part Number",
-        "Manufacturer",
-        "Cost Price",
-        "Trade Price",
-        "Sell Price (Tier 1 (Buy))",
-        "Group (Ignored for Updates)",
-        "Subgroup 1 (Ignored for Updates)",
-        "Search Terms",
-        "Notes"
-    ])
-
-    discontinued_ranges = [
-        f"{row['Manufacturer']} {row['Product']}" for _, row in df.iterrows() if row['Discontinued?'] == 'Yes'
-    ]
-
-    for _, row in df.iterrows():
-        if row['Discontinued?'] == 'Yes':
-            continue
-
-        colour_list = str(row['Colours']).split(",") if row['Colours'] is not None else [""]
-        width_list = str(row['Widths']).split(",") if row['Widths'] is not None else [""]
-
-        # THERE WILL ALWAYS BE A WIDTH VALUE
-
-        if len(colour_list) > 1:  # if there are colour variations
-            for colour in colour_list:
-                for width in width_list:
-                    new_data = pd.DataFrame({
-                        "Description": [remove_double_spaces(f"{row['Product']} {colour} ({width.strip()} M)")],
-                        "Part Number": [sku_field(row['SKU'], colour.strip(), width.strip())],
-                        "Manufacturer": [row['Manufacturer']],
-                        "Cost Price": [lm_price(row['Cost ex VAT'], width)],
-                        "Trade Price": [lm_price(row['Cost ex VAT'], width)],
-                        "Sell Price (Tier 1 (Buy))": [lm_price(row['Sell ex VAT'], width)],
-                        "Group (Ignored for Updates)": [row['Category']],
-                        "Subgroup 1 (Ignored for Updates)": [row['Type']],
-                        "Search Terms": f"{row['Manufacturer']} {row['Product']} {colour} {width}",
-                        "Notes": [note_field(row['Sell inc VAT'], row['Twickenham'], row['Richmond'])]
-                    })
-                    transformed_data = pd.concat([transformed_data.astype(transformed_data.dtypes),
-                                                  new_data.astype(transformed_data.dtypes)])
-
-        else:  # if there are no colour variations
-            for width in width_list:
-                new_data = pd.DataFrame({
-                    "Description": [remove_double_spaces(f"{row['Product']} ({width.strip()} M)")],
-                    "Part Number": [sku_field(row['SKU'], "", width.strip())],
-                    "Manufacturer": [row['Manufacturer']],
-                    "Cost Price": [lm_price(row['Cost ex VAT'], width)],
-                    "Trade Price": [lm_price(row['Cost ex VAT'], width)],
-                    "Sell Price (Tier 1 (Buy))": [lm_price(row['Sell ex VAT'], width)],
-                    "Group (Ignored for Updates)": [row['Category']],
-                    "Subgroup 1 (Ignored for Updates)": [row['Type']],
-                    "Search Terms": f"{row['Manufacturer']} {row['Product']} {width}",
-                    "Notes": [note_field(row['Sell inc VAT'], row['Twickenham'], row['Richmond'])]
-                })
-                transformed_data = pd.concat([transformed_data.astype(transformed_data.dtypes),
-                                              new_data.astype(transformed_data.dtypes)])
+    discontinued = df['Discontinued?'] == 'Yes'
+    discontinued_ranges = (df.loc[discontinued, 'Manufacturer'].astype(object).map(str) + " " +
+                           df.loc[discontinued, 'Product'].map(str)).tolist()
+
+    # THERE WILL ALWAYS BE A WIDTH VALUE
+    variant_codes = VariantCodes()
+    incremental = incremental_mode()
+    workers = parallel_workers()
+    try:
+        with manufacturer_writer(output_csv, incremental) as writer:
+            if workers:
+                # Each manufacturer's ranges are expanded in a separate process, then put back in order so the part
+                # numbers and duplicate warnings are exactly the same as on a single core
+                variations = merge_partitions(map_partitions(build_variants, df.reset_index(drop=True),
+                                                             'Manufacturer', workers), COLUMNS + VARIANT_KEYS)
+                writer.write_frame(assign_part_numbers(variations, variant_codes))
+            else:
+                for start in range(0, len(df), CHUNK_SIZE):
+                    writer.write_frame(expand_variants(df.iloc[start:start + CHUNK_SIZE], variant_codes))
+    finally:
+        variant_codes.close()
 
     print("\nlegacy-simpro-data Carpet Data Converter\n(c) 2024 Woven & Woods\nwj@wovenandwoods.com")
     print("\nDiscontinued Ranges\n---------------------")
@@ -157,17 +238,15 @@ def process_xlsx_to_csv(input_xlsx, output_csv):
     else:
         print("None\n")
 
-    duplicates = transformed_data[transformed_data.duplicated(subset=['Part Number'])]
-    if not duplicates.empty:
-        print("\nWarning: Duplicate entries found in the 'Part Number' column.\n")
-        print(duplicates[['Part Number', 'Manufacturer', 'Description']])
-        print("\n")
+    variant_codes.report()
 
-    transformed_data.to_csv(output_csv, index=False)
     print(f"CSV file '{output_csv}' created successfully!\n")
-    export_manufacturer_data(transformed_data)
+    report_manufacturer_data(writer.close(), incremental)
+
 
+if __name__ == "__main__":
+    input_xlsx_file = "../../data/carpet.xlsx"
+    output_csv_file = "./processed-data/carpet_simpro_data.csv"
+    with stage("convert"):
+        process_xlsx_to_csv(input_xlsx_file, output_csv_file)
 
-input_xlsx_file = "../../data/carpet.xlsx"
-output_csv_file = "./processed-data/carpet_simpro_data.csv"
-process_xlsx_to_csv(input_xlsx_file, output_csv_file)
@@ -9,15 +9,24 @@ be uploaded directly with legacy-simpro-data's catalogue or pre-build import mod
 
 import pandas as pd
 import sys
-import datetime
-
-
-def generate_notes(cost_price, sell_price):
-    update_date = datetime.datetime.now().strftime("%d-%b-%Y")
-    return (f"<div>Labour cost: £{"{0:.2f}".format(cost_price)} ex VAT</div>"
-            f"<div>Sell price: £{"{0:.2f}".format(sell_price)} inc VAT</div>"
-            f"<br>"
-            f"<div><em>Updated: {update_date}</em></div>")
+import os
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.instrument import stage
+from common.notes import installation_notes
+from common.productdb import read_master_data
+from common.schemas import NUMBER, TEXT, Schema
+
+# The columns used from the workbook
+SCHEMA = Schema("simPRO installation data", {
+    "SKU": TEXT,
+    "Installation Item": TEXT,
+    "Category": TEXT,
+    "Type": TEXT,
+    "Cost": NUMBER,
+    "Sell (Exc.)": NUMBER,
+    "Sell (Inc.)": NUMBER,
+})
 
 
 def adjust_for_vat(price):
@@ -36,11 +45,12 @@ def process_data(input_xlsx):
   This function reads the XLSX file, transforms the data, and handles duplicates based on the merge flag.
   """
     try:
-        df = pd.read_excel(input_xlsx)
+        df = read_master_data(input_xlsx, SCHEMA)
     except FileNotFoundError:
         sys.exit(print("\nThe system doesn't work!\n"))
 
-    transformed_data = pd.DataFrame(columns=[
+    # Columns for the transformed data
+    columns = [
         "Description",
         "Part Number",
         "Manufacturer",
@@ -50,37 +60,39 @@ def process_data(input_xlsx):
         "Group (Ignored for Updates)",
         "Search Terms",
         "Notes"
-    ])
-
-    for _, row in df.iterrows():
-        new_data = pd.DataFrame({
-            "Description": [row['Installation Item']],
-            "Part Number": [row['SKU']],
-            "Manufacturer": ['Installer'],
-            "Cost Price": [row['Cost']],
-            "Trade Price": [row['Cost']],
-            "Sell Price (Tier 1 (Buy))": [row['Sell (Exc.)']],
-            "Group (Ignored for Updates)": [row['Category']],
-            "Search Terms": f"{row["Installation Item"]}, {row["Category"]}, {row["Type"]}",
-            "Notes": [generate_notes(row['Cost'], row['Sell (Inc.)'])]
-        })
-
-        if merge_option and not any(transformed_data['Description'] == row["Installation Item"]):
-            transformed_data = pd.concat(
-                [transformed_data.astype(transformed_data.dtypes), new_data.astype(transformed_data.dtypes)])
-        else:
-            # Update existing row if it's a duplicate (merge mode)
-            if merge_option:
-                is_duplicate = transformed_data['Description'] == row["Installation Item"]
-                transformed_data.loc[is_duplicate, 'Group (Ignored for Updates)'] = 'General'
-                transformed_data.loc[is_duplicate, 'Part Number'] = transformed_data.loc[
-                                                                        is_duplicate, 'Part Number'].str[:-3] + 'GEN'
-            # Append new row otherwise
-            else:
-                transformed_data = pd.concat(
-                    [transformed_data.astype(transformed_data.dtypes), new_data.astype(transformed_data.dtypes)])
-
-    return transformed_data
+    ]
+
+    # Each item is collected as a list, then turned into a DataFrame at the end. In merge mode, the row for each
+    # description is kept so duplicates can be merged into it.
+    rows = []
+    merged_rows = {}
+
+    notes = installation_notes(df['Cost'], df['Sell (Inc.)'])
+    for item, note in zip(SCHEMA.records(df), notes):
+        description = item.installation_item
+        if merge_option and description in merged_rows:
+            # Update the existing row if it's a duplicate (merge mode)
+            row = merged_rows[description]
+            row[6] = 'General'
+            row[1] = row[1][:-3] + 'GEN' if isinstance(row[1], str) else None
+            continue
+
+        row = [
+            description,
+            item.sku,
+            'Installer',
+            item.cost,
+            item.cost,
+            item.sell_exc,
+            item.category,
+            f"{description}, {item.category}, {item.type}",
+            note,
+        ]
+        rows.append(row)
+        if merge_option and not pd.isna(description):
+            merged_rows[description] = row
+
+    return pd.DataFrame(rows, columns=columns, dtype=object)
 
 
 def catalogue_to_prebuild(catalogue_data):
@@ -150,21 +162,26 @@ while format_response not in ("c", "p"):
 # Make it so
 output_folder = "./processed-data/installation"
 
-if merge_option:
-    if catalogue_option:
-        install_data = process_data(input_xlsx_file)
-        output_csv = f"{output_folder}/installation-simpro-data-catalogue-merged.csv"
-        install_data.to_csv(output_csv, index=False)
-    elif prebuild_option:
-        install_data = catalogue_to_prebuild(process_data(input_xlsx_file))
-        output_csv = f"{output_folder}/installation-simpro-data-pb-merged.csv"
-        install_data.to_csv(output_csv, index=False)
-else:
-    if catalogue_option:
-        install_data = process_data(input_xlsx_file)
-        output_csv = f"{output_folder}/installation-simpro-data-catalogue.csv"
-        install_data.to_csv(output_csv, index=False)
-    elif prebuild_option:
-        install_data = catalogue_to_prebuild(process_data(input_xlsx_file))
-        output_csv = f"{output_folder}/installation-simpro-data-pb.csv"
-        install_data.to_csv(output_csv, index=False)
+with stage("convert"):
+    if merge_option:
+        if catalogue_option:
+            install_data = process_data(input_xlsx_file)
+            output_csv = f"{output_folder}/installation-simpro-data-catalogue-merged.csv"
+            with stage("export"):
+                install_data.to_csv(output_csv, index=False)
+        elif prebuild_option:
+            install_data = catalogue_to_prebuild(process_data(input_xlsx_file))
+            output_csv = f"{output_folder}/installation-simpro-data-pb-merged.csv"
+            with stage("export"):
+                install_data.to_csv(output_csv, index=False)
+    else:
+        if catalogue_option:
+            install_data = process_data(input_xlsx_file)
+            output_csv = f"{output_folder}/installation-simpro-data-catalogue.csv"
+            with stage("export"):
+                install_data.to_csv(output_csv, index=False)
+        elif prebuild_option:
+            install_data = catalogue_to_prebuild(process_data(input_xlsx_file))
+            output_csv = f"{output_folder}/installation-simpro-data-pb.csv"
+            with stage("export"):
+                install_data.to_csv(output_csv, index=False)
@@ -27,10 +27,47 @@ The script also creates a separate CSV for each manufacturer, containing all of
 saved in the 'processed-data/vinyl' folder. These CSVs can be imported directly into legacy-simpro-data.
 """
 
-import pandas as pd
-import hashlib
 import re
-import datetime
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.exports import CatalogueWriter, incremental_mode, report_changes
+from common.instrument import stage
+from common.notes import simpro_notes
+from common.productdb import read_master_data
+from common.schemas import CATEGORY, MIXED, NUMBER, TEXT, Schema
+from common.skus import VariantCodes
+
+# The columns used from the master workbook
+SCHEMA = Schema("simPRO vinyl data", {
+    "SKU": TEXT,
+    "Product": TEXT,
+    "Manufacturer": CATEGORY,
+    "Category": CATEGORY,
+    "Type": CATEGORY,
+    "Pack Quantity": MIXED,
+    "Colours": MIXED,
+    "Cost ex VAT": NUMBER,
+    "Sell ex VAT": NUMBER,
+    "Sell inc VAT": NUMBER,
+    "Twickenham": CATEGORY,
+    "Richmond": CATEGORY,
+    "Discontinued?": CATEGORY,
+})
+
+COLUMNS = [
+    "Description",
+    "Part Number",
+    "Manufacturer",
+    "Cost Price",
+    "Trade Price",
+    "Sell Price (Tier 1 (Buy))",
+    "Group (Ignored for Updates)",
+    "Subgroup 1 (Ignored for Updates)",
+    "Search Terms",
+    "Notes"
+]
 
 
 def remove_double_spaces(text):
@@ -40,35 +77,25 @@ def remove_double_spaces(text):
     return re.sub(' +', ' ', text)
 
 
-def export_manufacturer_data(df):
+def manufacturer_writer(output_csv, incremental=False):
     """
-    Creates an individual CSV file for every manufacturer detected in the XLSX file.
-    These files are saved to './processed-data/vinyl'.
-    """
-    for manufacturer in df['Manufacturer'].unique():
-        df[df['Manufacturer'] == manufacturer].to_csv(f"./processed-data/vinyl/{manufacturer.lower().replace(' ', '_')}"
-                                                      f"_vinyl_data.csv", index=False)
-    print("CSV files created successfully for all manufacturers in ./processed-data/vinyl/\n")
-
+    Creates the writer for the master CSV and an individual CSV file for every manufacturer detected in the
+    XLSX file. Rows are written to both as they are generated. The manufacturer files are saved to
+    './processed-data/vinyl'.
 
-def note_field(sell_price, pack_qty, twickenham, richmond):
-    """
-    Populates the legacy-simpro-data notes field using the existing sell price and location data.
+    In incremental mode, only the files for manufacturers whose products have changed are written.
     """
-    update_date = datetime.datetime.now().strftime("%d-%b-%Y")
-    location_data = [loc for loc, flag in zip(["Twickenham", "Richmond"], [twickenham, richmond]) if flag == "Yes"]
-    return (f"<div>Price per SQM: £{"{0:.2f}".format(sell_price)} inc VAT</div>"
-            f"Pack quantity: {pack_qty} SQM"
-            f"<div>Locations: {', '.join(location_data) if len(location_data) > 0 else 'None'}</div>"
-            f"<br>"
-            f"<div>Updated: {update_date}</div>")
+    return CatalogueWriter(COLUMNS, 'Manufacturer', "./processed-data/vinyl/",
+                           lambda manufacturer: f"{manufacturer.lower().replace(' ', '_')}_vinyl_data.csv",
+                           'Part Number', output_csv, incremental, "./processed-data/vinyl-simpro-manifest.json",
+                           "./processed-data/vinyl-simpro-delta.csv")
 
 
-def sku_field(sku, colour):
-    """
-    Creates a unique five-digit hash from a concatenation of the colour and width strings.
-    """
-    return f"{sku}-{hashlib.sha1(colour.encode('UTF-8')).hexdigest()[:5].upper()}"
+def report_manufacturer_data(written, incremental=False):
+    if incremental:
+        report_changes(written, "./processed-data/vinyl-simpro-delta.csv")
+    else:
+        print("CSV files created successfully for all manufacturers in ./processed-data/vinyl/\n")
 
 
 def process_xlsx_to_csv(input_xlsx, output_csv):
@@ -76,65 +103,62 @@ def process_xlsx_to_csv(input_xlsx, output_csv):
     Main function that processes the XLSX file and outputs a CSV file.
     """
     try:
-        df = pd.read_excel(input_xlsx)
+        df = read_master_data(input_xlsx, SCHEMA)
     except Exception as e:
         print(f"\nError: {e}\n")
         return
 
-    transformed_data = pd.DataFrame(columns=[
-        "Description",
-        "Part Number",
-        "Manufacturer",
-        "Cost Price",
-        "Trade Price",
-        "Sell Price (Tier 1 (Buy))",
-        "Group (Ignored for Updates)",
-        "Subgroup 1 (Ignored for Updates)",
-        "Search Terms",
-        "Notes"
-    ])
-
-    discontinued_ranges = [f"{row['Manufacturer']} {row['Product']}" for _, row in df.iterrows() if row['Discontinued?']
-                           == 'Yes']
-    
-    for _, row in df.iterrows():
-        if row['Discontinued?'] == 'Yes':
-            continue
-
-        colour_list = str(row['Colours']).split(",") if row['Colours'] is not None else [""]
-
-        if len(colour_list) > 1:  # if there are colour variations
-            for colour in colour_list:
-                new_data = pd.DataFrame({
-                    "Description": [remove_double_spaces(f"{row['Product']} {colour}")],
-                    "Part Number": [sku_field(row['SKU'], colour.strip())],
-                    "Manufacturer": [row['Manufacturer']],
-                    "Cost Price": [row['Cost ex VAT']],
-                    "Trade Price": [row['Cost ex VAT']],
-                    "Sell Price (Tier 1 (Buy))": [row['Sell ex VAT']], 
-                    "Group (Ignored for Updates)": [row['Category']],
-                    "Subgroup 1 (Ignored for Updates)": [row['Type']],
-                    "Search Terms": f"{row['Manufacturer']} {row['Product']} {colour}",
-                    "Notes": [note_field(row['Sell inc VAT'], row['Pack Quantity'], row['Twickenham'], row['Richmond'])]
-                })
-                transformed_data = pd.concat([transformed_data.astype(transformed_data.dtypes),
-                                              new_data.astype(transformed_data.dtypes)])
-        
-        else:  # if there are no colour variations
-            new_data = pd.DataFrame({
-                "Description": [remove_double_spaces(f"{row['Product']}")],
-                "Part Number": [row['SKU']],
-                "Manufacturer": [row['Manufacturer']],
-                "Cost Price": [row['Cost ex VAT']],
-                "Trade Price": [row['Cost ex VAT']],
-                "Sell Price (Tier 1 (Buy))": [row['Sell ex VAT']],
-                "Group (Ignored for Updates)": [row['Category']],
-                "Subgroup 1 (Ignored for Updates)": [row['Type']],
-                "Search Terms": f"{row['Manufacturer']} {row['Product']}",
-                "Notes": [note_field(row['Sell inc VAT'], row['Pack Quantity'], row['Twickenham'], row['Richmond'])]
-            })
-            transformed_data = pd.concat([transformed_data.astype(transformed_data.dtypes),
-                                          new_data.astype(transformed_data.dtypes)])
+    products = SCHEMA.records(df)
+    discontinued_ranges = [f"{product.manufacturer} {product.product}" for product in products
+                           if product.discontinued == 'Yes']
+
+    # Colour variations are hashed (see common/skus.py), ranges without them use their SKU as the part number
+    variant_codes = VariantCodes()
+    incremental = incremental_mode()
+
+    active = [product for product in products if product.discontinued != 'Yes']
+    active_notes = simpro_notes([product.sell_inc_vat for product in active],
+                                [product.twickenham for product in active],
+                                [product.richmond for product in active],
+                                [product.pack_quantity for product in active])
+
+    try:
+        with manufacturer_writer(output_csv, incremental) as writer:
+            for product, notes in zip(active, active_notes):
+                colour_list = str(product.colours).split(",") if product.colours is not None else [""]
+
+                if len(colour_list) > 1:  # if there are colour variations
+                    for colour in colour_list:
+                        description = remove_double_spaces(f"{product.product} {colour}")
+                        writer.write([
+                            description,
+                            variant_codes.code(product.sku, colour.strip(), "", product.manufacturer, description),
+                            product.manufacturer,
+                            product.cost_ex_vat,
+                            product.cost_ex_vat,
+                            product.sell_ex_vat,
+                            product.category,
+                            product.type,
+                            f"{product.manufacturer} {product.product} {colour}",
+                            notes
+                        ])
+
+                else:  # if there are no colour variations
+                    description = remove_double_spaces(f"{product.product}")
+                    writer.write([
+                        description,
+                        variant_codes.plain(product.sku, product.manufacturer, description),
+                        product.manufacturer,
+                        product.cost_ex_vat,
+                        product.cost_ex_vat,
+                        product.sell_ex_vat,
+                        product.category,
+                        product.type,
+                        f"{product.manufacturer} {product.product}",
+                        notes
+                    ])
+    finally:
+        variant_codes.close()
 
     print("\nRakata to legacy-simpro-data Vinyl Data Converter\n(c) 2024 Woven & Woods\nwj@wovenandwoods.com")
     print("\nDiscontinued Ranges\n---------------------")
@@ -144,17 +168,13 @@ def process_xlsx_to_csv(input_xlsx, output_csv):
     else:
         print("None\n")
 
-    duplicates = transformed_data[transformed_data.duplicated(subset=['Part Number'])]
-    if not duplicates.empty:
-        print("\nWarning: Duplicate entries found in the 'Part Number' column.\n")
-        print(duplicates[['Part Number', 'Manufacturer', 'Description']])
-        print("\n")
+    variant_codes.report()
 
-    transformed_data.to_csv(output_csv, index=False)
     print(f"CSV file '{output_csv}' created successfully!\n")
-    export_manufacturer_data(transformed_data)
+    report_manufacturer_data(writer.close(), incremental)
 
 
 input_xlsx_file = "../../data/vinyl.xlsx"
 output_csv_file = "./processed-data/vinyl_simpro_data.csv"
-process_xlsx_to_csv(input_xlsx_file, output_csv_file)
\ No newline at end of file
+with stage("convert"):
+    process_xlsx_to_csv(input_xlsx_file, output_csv_file)
\ No newline at end of file
@@ -22,32 +22,66 @@ The script also creates a separate CSV for each manufacturer, containing all of
 saved in the 'processed-data/wood' folder. These CSVs can be imported directly into legacy-simpro-data.
 """
 
-import pandas as pd
-import datetime
-
-
-def export_manufacturer_data(df):
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.exports import CatalogueWriter, incremental_mode, report_changes
+from common.instrument import stage
+from common.notes import simpro_notes
+from common.productdb import read_master_data
+from common.schemas import CATEGORY, MIXED, NUMBER, TEXT, Schema
+from common.skus import VariantCodes
+
+# The columns used from the master workbook
+SCHEMA = Schema("simPRO wood data", {
+    "SKU": TEXT,
+    "Product": TEXT,
+    "Manufacturer": CATEGORY,
+    "Category": CATEGORY,
+    "Type": CATEGORY,
+    "Pack Quantity": MIXED,
+    "Cost ex VAT": NUMBER,
+    "Sell ex VAT": NUMBER,
+    "Sell inc VAT": NUMBER,
+    "Twickenham": CATEGORY,
+    "Richmond": CATEGORY,
+    "Discontinued?": CATEGORY,
+})
+
+COLUMNS = [
+    "Description",
+    "Part Number",
+    "Manufacturer",
+    "Cost Price",
+    "Trade Price",
+    "Sell Price (Tier 1 (Buy))",
+    "Group (Ignored for Updates)",
+    "Subgroup 1 (Ignored for Updates)",
+    "Search Terms",
+    "Notes"
+]
+
+
+def manufacturer_writer(output_csv, incremental=False):
     """
-    Creates an individual CSV file for every manufacturer detected in the XLSX file.
-    These files are saved to './processed-data/wood'.
+    Creates the writer for the master CSV and an individual CSV file for every manufacturer detected in the
+    XLSX file. Rows are written to both as they are generated. The manufacturer files are saved to
+    './processed-data/wood'.
+
+    In incremental mode, only the files for manufacturers whose products have changed are written.
     """
-    for manufacturer in df['Manufacturer'].unique():
-        df[df['Manufacturer'] == manufacturer].to_csv(f"./processed-data/wood/{manufacturer.lower().replace(' ', '_')}"
-                                                      f"_wood_data.csv", index=False)
-    print("CSV files created successfully for all manufacturers in ./processed-data/wood/\n")
+    return CatalogueWriter(COLUMNS, 'Manufacturer', "./processed-data/wood/",
+                           lambda manufacturer: f"{manufacturer.lower().replace(' ', '_')}_wood_data.csv",
+                           'Part Number', output_csv, incremental, "./processed-data/wood-simpro-manifest.json",
+                           "./processed-data/wood-simpro-delta.csv")
 
 
-def note_field(sell_price, pack_qty, twickenham, richmond):
-    """
-    Populates the legacy-simpro-data notes field using the existing sell price and location data.
-    """
-    update_date = datetime.datetime.now().strftime("%d-%b-%Y")
-    location_data = [loc for loc, flag in zip(["Twickenham", "Richmond"], [twickenham, richmond]) if flag == "Yes"]
-    return (f"<div>Price per SQM: £{"{0:.2f}".format(sell_price)} inc VAT</div>"
-            f"Pack quantity: {pack_qty} SQM"
-            f"<div>Locations: {', '.join(location_data) if len(location_data) > 0 else 'None'}</div>"
-            f"<br>"
-            f"<div>Updated: {update_date}</div>")
+def report_manufacturer_data(written, incremental=False):
+    if incremental:
+        report_changes(written, "./processed-data/wood-simpro-delta.csv")
+    else:
+        print("CSV files created successfully for all manufacturers in ./processed-data/wood/\n")
 
 
 def process_xlsx_to_csv(input_xlsx, output_csv):
@@ -55,44 +89,37 @@ def process_xlsx_to_csv(input_xlsx, output_csv):
     Main function that processes the XLSX file and outputs a CSV file.
     """
     try:
-        df = pd.read_excel(input_xlsx)
+        df = read_master_data(input_xlsx, SCHEMA)
     except Exception as e:
         print(f"\nError: {e}\n")
         return
 
-    transformed_data = pd.DataFrame(columns=[
-        "Description",
-        "Part Number",
-        "Manufacturer",
-        "Cost Price",
-        "Trade Price",
-        "Sell Price (Tier 1 (Buy))",
-        "Group (Ignored for Updates)",
-        "Subgroup 1 (Ignored for Updates)",
-        "Search Terms",
-        "Notes"
-    ])
-
-    discontinued_ranges = [f"{row['Manufacturer']} {row['Product']}" for _, row in df.iterrows() if row['Discontinued?']
-                           == 'Yes']
-
-    for _, row in df.iterrows():
-        if row['Discontinued?'] == 'Yes':
-            continue
-        new_data = pd.DataFrame({
-            "Description": [row['Product']],
-            "Part Number": [row['SKU']],
-            "Manufacturer": [row['Manufacturer']],
-            "Cost Price": [row['Cost ex VAT']],
-            "Trade Price": [row['Cost ex VAT']],
-            "Sell Price (Tier 1 (Buy))": [row['Sell ex VAT']],
-            "Group (Ignored for Updates)": [row['Category']],
-            "Subgroup 1 (Ignored for Updates)": [row['Type']],
-            "Search Terms": f"{row['Manufacturer']} {row['Product']}",
-            "Notes": [note_field(row['Sell inc VAT'], row['Pack Quantity'], row['Twickenham'], row['Richmond'])]
-        })
-        transformed_data = pd.concat([transformed_data.astype(transformed_data.dtypes),
-                                      new_data.astype(transformed_data.dtypes)])
+    products = SCHEMA.records(df)
+    discontinued_ranges = [f"{product.manufacturer} {product.product}" for product in products
+                           if product.discontinued == 'Yes']
+
+    # Only used to find duplicate part numbers, as wood products use their SKU as the part number
+    part_numbers = VariantCodes(db_file=None)
+    incremental = incremental_mode()
+
+    active = [product for product in products if product.discontinued != 'Yes']
+    notes = simpro_notes([product.sell_inc_vat for product in active], [product.twickenham for product in active],
+                         [product.richmond for product in active], [product.pack_quantity for product in active])
+
+    with manufacturer_writer(output_csv, incremental) as writer:
+        for product, product_notes in zip(active, notes):
+            writer.write([
+                product.product,
+                part_numbers.plain(product.sku, product.manufacturer, product.product),
+                product.manufacturer,
+                product.cost_ex_vat,
+                product.cost_ex_vat,
+                product.sell_ex_vat,
+                product.category,
+                product.type,
+                f"{product.manufacturer} {product.product}",
+                product_notes
+            ])
 
     print("\nRakata to legacy-simpro-data Wood Data Converter\n(c) 2024 Woven & Woods\nwj@wovenandwoods.com")
     print("\nDiscontinued Ranges\n---------------------")
@@ -102,17 +129,13 @@ def process_xlsx_to_csv(input_xlsx, output_csv):
     else:
         print("None\n")
 
-    duplicates = transformed_data[transformed_data.duplicated(subset=['Part Number'])]
-    if not duplicates.empty:
-        print("\nWarning: Duplicate entries found in the 'Part Number' column.\n")
-        print(duplicates[['Part Number', 'Manufacturer', 'Description']])
-        print("\n")
+    part_numbers.report()
 
-    transformed_data.to_csv(output_csv, index=False)
     print(f"CSV file '{output_csv}' created successfully!\n")
-    export_manufacturer_data(transformed_data)
+    report_manufacturer_data(writer.close(), incremental)
 
 
 input_xlsx_file = "../../data/wood.xlsx"
 output_csv_file = "./processed-data/wood-simpro-data.csv"
-process_xlsx_to_csv(input_xlsx_file, output_csv_file)
+with stage("convert"):
+    process_xlsx_to_csv(input_xlsx_file, output_csv_file)
@@ -16,6 +16,7 @@ for importing.
 
 from tkinter import Tk
 from tkinter.filedialog import askopenfilename
+from collections import deque
 
 import pandas as pd
 
@@ -24,15 +25,90 @@ def compress_spaces(text):
     return ' '.join(text.split())
 
 
-def get_range(description, manufacturer_name, ref_list):
-    # Read the Excel file into a Pandas DataFrame
-    df = pd.read_excel(ref_list)
-
-    # Assuming "Product" is the first column and "Manufacturer" is the second column
-    for product, manufacturer in zip(df['Product'], df['Manufacturer']):
-        if (product.lower() in description.lower()) and (manufacturer.lower() == manufacturer_name.lower()):
-            return compress_spaces(product)
-    return None
+class RangeMatcher:
+    """
+    Aho-Corasick automaton over the lower-cased range names of a single manufacturer.
+
+    A description is scanned once, finding every range name it contains no matter how many ranges the
+    manufacturer has, rather than testing each range name in turn.
+    """
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+
+    def add(self, name, position):
+        state = 0
+        for char in name:
+            if char not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][char] = len(self.goto) - 1
+            state = self.goto[state][char]
+        self.output[state].append(position)
+
+    def build(self):
+        # Breadth-first pass to set the failure links, merging the outputs of each state's fallback
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def matches(self, text):
+        """
+        Returns the positions of every range name found in the text.
+        """
+        found = list(self.output[0])
+        state = 0
+        for char in text:
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            found.extend(self.output[state])
+        return found
+
+
+class RangeIndex:
+    """
+    The range reference list, loaded once and indexed by manufacturer.
+    """
+
+    def __init__(self, df):
+        self.names = []
+        self.matchers = {}
+        # Assuming "Product" is the first column and "Manufacturer" is the second column
+        for product, manufacturer in zip(df['Product'], df['Manufacturer']):
+            if not isinstance(product, str) or not isinstance(manufacturer, str):
+                continue
+            matcher = self.matchers.setdefault(manufacturer.lower(), RangeMatcher())
+            matcher.add(product.lower(), len(self.names))
+            self.names.append(product)
+        for matcher in self.matchers.values():
+            matcher.build()
+
+    @classmethod
+    def from_xlsx(cls, ref_list):
+        # Read the Excel file into a Pandas DataFrame
+        return cls(pd.read_excel(ref_list))
+
+    def get_range(self, description, manufacturer_name):
+        """
+        Returns the range name found in the description. If more than one range name is found, the one which
+        appears first in the reference list is used.
+        """
+        matcher = self.matchers.get(str(manufacturer_name).lower())
+        if matcher is None:
+            return None
+        positions = matcher.matches(description.lower())
+        return compress_spaces(self.names[min(positions)]) if positions else None
 
 
 def get_colour(description, range_name):
@@ -78,7 +154,7 @@ def process_data(input_csv):
         print(f"\nError: {e}\n")
         return
 
-    transformed_data = pd.DataFrame(columns=[
+    columns = [
         "Part Number",
         "Manufacturer",
         "Description",
@@ -90,29 +166,33 @@ def process_data(input_csv):
         "Category",
         "Sub-Category",
         "Notes"
-    ])
+    ]
+
+    # The range reference list is only read once
+    range_index = RangeIndex.from_xlsx(range_reference)
 
+    # Rows are collected in a list and turned into a DataFrame once at the end
+    new_rows = []
     for _, row in df.iterrows():
         description = compress_spaces(row["Description"])
-        range_name = get_range(description, row["Manufacturer"], range_reference)
+        range_name = range_index.get_range(description, row["Manufacturer"])
         width = get_width(description)
 
-        new_data = pd.DataFrame({
-            "Part Number": row['Part Number'],
-            "Manufacturer": [row['Manufacturer']],
-            "Description": [description],
-            "Range": [range_name],
-            "Colour": [get_colour(description, range_name)],
-            "Width": [width],
-            "Cost per SQM (ex VAT)": [round(row['Cost Price'] / width, 2)],
-            "Sell per SQM (inc VAT)": [round((row['Tier 1 (Buy) Sell Price'] / width) * 1.2, 0)],
-            "Category": [row["Group"]],
-            "Sub-Category": [row["Subgroup 1"]],
-            "Notes": [""]
-        })
-
-        transformed_data = pd.concat([transformed_data.astype(transformed_data.dtypes),
-                                      new_data.astype(transformed_data.dtypes)])
+        new_rows.append([
+            row['Part Number'],
+            row['Manufacturer'],
+            description,
+            range_name,
+            get_colour(description, range_name),
+            width,
+            round(row['Cost Price'] / width, 2),
+            round((row['Tier 1 (Buy) Sell Price'] / width) * 1.2, 0),
+            row["Group"],
+            row["Subgroup 1"],
+            ""
+        ])
+
+    transformed_data = pd.DataFrame(new_rows, columns=columns, dtype=object)
 
     duplicates = transformed_data[transformed_data.duplicated(subset=['Part Number'])]
     if not duplicates.empty:
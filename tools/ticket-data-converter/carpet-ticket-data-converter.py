@@ -9,6 +9,24 @@ CSV file which can be imported into the Brother label software.
 
 import pandas as pd
 import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.instrument import stage
+from common.productdb import read_master_data
+from common.schemas import CATEGORY, MIXED, NUMBER, TEXT, Schema
+
+# The columns used from the master workbook
+SCHEMA = Schema("carpet ticket data", {
+    "Product": TEXT,
+    "Manufacturer": CATEGORY,
+    "Material": CATEGORY,
+    "Widths": MIXED,
+    "Sell inc VAT": NUMBER,
+    "Twickenham": CATEGORY,
+    "Richmond": CATEGORY,
+    "Discontinued?": CATEGORY,
+})
 
 # Create lists of products which have been skipped because they are discontinued
 discontinued_ranges = []
@@ -17,47 +35,45 @@ discontinued_ranges = []
 def process_xlsx_to_csv(input_xlsx, output_csv):
     # Read the XLSX file into a DataFrame
     try:
-        df = pd.read_excel(input_xlsx)
+        df = read_master_data(input_xlsx, SCHEMA)
     except FileNotFoundError:
         sys.exit(print("\nThe system doesn't work!\n"))
 
-    # Create a new DataFrame to store the transformed data
-    transformed_data = pd.DataFrame(columns=[
+    # Columns for the transformed data
+    columns = [
         "Product",
         "Manufacturer",
         "Material",
         "Widths",
         "Price",
         "Twickenham",
-        "Richmond"])
+        "Richmond"]
+
+    # Each ticket is collected as a list, then turned into a DataFrame at the end
+    rows = []
 
     # Iterate through each row in the original DataFrame
-    for _, row in df.iterrows():
-        product_name = row["Product"]
-        discontinued = row["Discontinued?"]
+    for product in SCHEMA.records(df):
+        product_name = product.product
+        discontinued = product.discontinued
 
         # Use the Width column to check if this is a carpet
-        not_carpet = pd.isna(row['Widths'])
+        not_carpet = pd.isna(product.widths)
 
         # Check if product has been assigned to the website and not discontinued
         if not discontinued == "Yes" and not not_carpet:
-            # Create a new DataFrame with the desired structure
-            new_data = pd.DataFrame({
-                "Product": [product_name],
-                "Manufacturer": [row["Manufacturer"]],
-                "Material": [row["Material"]],
-                "Widths": [generate_widths(row["Widths"])],
-                "Price": [generate_price(row["Sell inc VAT"])],
-                "Twickenham": row["Twickenham"],
-                "Richmond": row["Richmond"]
-            })
-
-            # Concatenate the new data with the existing DataFrame
-            transformed_data = pd.concat([transformed_data.astype(transformed_data.dtypes),
-                                          new_data.astype(transformed_data.dtypes)])
+            rows.append([
+                product_name,
+                product.manufacturer,
+                product.material,
+                generate_widths(product.widths),
+                generate_price(product.sell_inc_vat),
+                product.twickenham,
+                product.richmond,
+            ])
 
         elif discontinued == "Yes":
-            discontinued_ranges.append(f"{row["Manufacturer"]} {product_name}")
+            discontinued_ranges.append(f"{product.manufacturer} {product_name}")
 
     # Print some information to the screen and a list of skipped products
     print("\nCarpet Ticket Data Generator\n(c) 2024 Woven & Woods\nwj@wovenandwoods.com")
@@ -69,8 +85,10 @@ def process_xlsx_to_csv(input_xlsx, output_csv):
         print("None\n")
 
     # Write the transformed data to a CSV file
+    transformed_data = pd.DataFrame(rows, columns=columns, dtype=object)
     sorted_data = transformed_data.sort_values(by=["Manufacturer", "Product"])
-    sorted_data.to_csv(output_csv, index=False)
+    with stage("export"):
+        sorted_data.to_csv(output_csv, index=False)
     print(f"CSV file '{output_csv}' created successfully!\n")
 
 
@@ -94,4 +112,5 @@ input_xlsx_file = "../../data/carpet.xlsx"
 output_csv_file = f"./processed-data/Carpet Ticket Data.csv"
 
 # Make it work
-process_xlsx_to_csv(input_xlsx_file, output_csv_file)
\ No newline at end of file
+with stage("convert"):
+    process_xlsx_to_csv(input_xlsx_file, output_csv_file)
\ No newline at end of file
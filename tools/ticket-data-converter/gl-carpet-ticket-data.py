@@ -28,14 +28,18 @@ def process_data(gl_data, ticket_data):
     except FileNotFoundError:
         sys.exit(print("\nThe system doesn't work!\n"))
 
-    # Create a new DataFrame to store the transformed data
-    transformed_data = pd.DataFrame(columns=[
+    # Columns for the transformed data
+    columns = [
         "Product",
         "Material",
         "Widths",
         "Price",
         "Twickenham",
-        "Richmond"])
+        "Richmond"]
+
+    # Each ticket is collected as a dict, then turned into a DataFrame at the end. The column names differ
+    # from one GOD List to the next, so the rows are still read with iterrows.
+    rows = []
 
     # Iterate through each row in the original DataFrame
     for _, row in df.iterrows():
@@ -61,18 +65,16 @@ def process_data(gl_data, ticket_data):
         except KeyError:
             pass
 
-        new_data = pd.DataFrame({
-            "Product": [product_name],
-            "Material": [row["Material"]],
-            "Widths": [generate_widths(row["Width(s) (M)"])],
-            "Price": [generate_price(row["Price (inc.) (SQM)"])],
+        rows.append({
+            "Product": product_name,
+            "Material": row["Material"],
+            "Widths": generate_widths(row["Width(s) (M)"]),
+            "Price": generate_price(row["Price (inc.) (SQM)"]),
             "Twickenham": "Yes" if in_twickenham else "",
             "Richmond": "Yes" if in_richmond else ""
         })
 
-        # Concatenate the new data with the existing DataFrame
-        transformed_data = pd.concat([transformed_data.astype(transformed_data.dtypes),
-                                      new_data.astype(transformed_data.dtypes)])
+    transformed_data = pd.DataFrame(rows, columns=columns, dtype=object)
 
     transformed_data = transformed_data[transformed_data['Material'].notna()]
 
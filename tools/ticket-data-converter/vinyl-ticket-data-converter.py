@@ -11,6 +11,24 @@ import pandas as pd
 import sys
 from tkinter import Tk
 from tkinter.filedialog import askopenfilename
+import os
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.instrument import stage
+from common.productdb import read_master_data
+from common.schemas import MIXED, NUMBER, TEXT, Schema
+
+# The columns used from the workbook
+SCHEMA = Schema("vinyl ticket data", {
+    "Description": TEXT,
+    "Manufacturer": TEXT,
+    "Width": MIXED,
+    "Length": MIXED,
+    "Thickness": MIXED,
+    "SQM sell inc VAT": NUMBER,
+    "Location": TEXT,
+    "Discontinued?": TEXT,
+})
 
 # Create lists of products which have been skipped because they are discontinued
 discontinued_ranges = []
@@ -19,50 +37,50 @@ discontinued_ranges = []
 def process_data(input_xlsx, output_csv):
     # Read the XLSX file into a DataFrame
     try:
-        df = pd.read_excel(input_xlsx)
+        df = read_master_data(input_xlsx, SCHEMA)
     except FileNotFoundError:
         sys.exit(print("\nThe system doesn't work!\n"))
 
-    # Create a new DataFrame to store the transformed data
-    transformed_data = pd.DataFrame(columns=[
+    # Columns for the transformed data
+    columns = [
         "Product",
         "Manufacturer",
         "Width & Length",
         "Thickness",
         "Price",
         "Twickenham",
-        "Richmond"])
+        "Richmond"]
+
+    # Each ticket is collected as a list, then turned into a DataFrame at the end
+    rows = []
 
     # Iterate through each row in the original DataFrame
-    for _, row in df.iterrows():
-        product_name = row["Description"]
-        discontinued = row["Discontinued?"]
+    for product in SCHEMA.records(df):
+        product_name = product.description
+        discontinued = product.discontinued
 
         # Check locations
-        if isinstance(row['Location'], str):
-            location_list = row['Location']
+        if isinstance(product.location, str):
+            location_list = product.location
         else:
             location_list = ""
 
         # Check if product has been assigned to the website and not discontinued
         if not discontinued == "Yes":
-            # Create a new DataFrame with the desired structure
-            new_data = pd.DataFrame({
-                "Product": [product_name],
-                "Manufacturer": row["Manufacturer"],
-                "Width & Length": generate_dimensions(row["Width"], row["Length"]),
-                "Thickness": generate_thickness(row["Thickness"]),
-                "Price": generate_price(row["SQM sell inc VAT"]),
-                "Twickenham": "Yes" if "Twickenham" in location_list else None,
-                "Richmond": "Yes" if "Richmond" in location_list else None,
-            })
-
-            # Concatenate the new data with the existing DataFrame
-            transformed_data = pd.concat([transformed_data.astype(transformed_data.dtypes),
-                                          new_data.astype(transformed_data.dtypes)])
+            rows.append([
+                product_name,
+                product.manufacturer,
+                generate_dimensions(product.width, product.length),
+                generate_thickness(product.thickness),
+                generate_price(product.sqm_sell_inc_vat),
+                "Yes" if "Twickenham" in location_list else None,
+                "Yes" if "Richmond" in location_list else None,
+            ])
 
         else:
-            discontinued_ranges.append(f"{row["Manufacturer"]} {product_name}")
+            discontinued_ranges.append(f"{product.manufacturer} {product_name}")
+
+    transformed_data = pd.DataFrame(rows, columns=columns, dtype=object)
 
     # Print some information to the screen and a list of skipped products
     print("\nVinyl Ticket Data Generator\n(c) 2024 Woven & Woods\nwj@wovenandwoods.com")
@@ -75,7 +93,8 @@ def process_data(input_xlsx, output_csv):
 
     # Write the transformed data to a CSV file
     sorted_data = transformed_data.sort_values(by=["Manufacturer", "Product"])
-    sorted_data.to_csv(output_csv, index=False)
+    with stage("export"):
+        sorted_data.to_csv(output_csv, index=False)
     print(f"CSV file '{output_csv}' created successfully!\n")
 
 
@@ -98,6 +117,7 @@ output_dir = "./processed-data"
 if input_file:
     print(f"Selected file: {input_file}")
     output_file = f"{output_dir}/simpro-{input_file.split('/')[-1].replace('.xlsx', '')}-ticket-data.csv"
-    process_data(input_file, output_file)
+    with stage("convert"):
+        process_data(input_file, output_file)
 else:
     print("No file selected.")
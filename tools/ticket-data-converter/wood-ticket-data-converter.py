@@ -12,26 +12,47 @@ import sys
 from tkinter import Tk
 from tkinter.filedialog import askopenfilename
 import re
+import os
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.instrument import stage
+from common.productdb import read_master_data
+from common.schemas import MIXED, NUMBER, TEXT, Schema
+
+# The columns used from the workbook
+SCHEMA = Schema("wood ticket data", {
+    "Description": TEXT,
+    "Manufacturer": TEXT,
+    "Species": TEXT,
+    "Finish": TEXT,
+    "Width": MIXED,
+    "Length": MIXED,
+    "Thickness": MIXED,
+    "SQM sell inc VAT": NUMBER,
+    "Location": TEXT,
+    "Discontinued?": TEXT,
+})
 
 # Create lists of products which have been skipped because they are discontinued
 discontinued_ranges = []
 
 
 def export_supplier_data(df):
-    for supplier in df['Manufacturer'].unique():
-        df[df['Manufacturer'] == supplier].to_csv(f"./processed-data/wood/{supplier.lower().replace(' ', '-')}"
-                                                      f"-ticket-data.csv", index=False)
+    with stage("export"):
+        for supplier in df['Manufacturer'].unique():
+            df[df['Manufacturer'] == supplier].to_csv(f"./processed-data/wood/{supplier.lower().replace(' ', '-')}"
+                                                          f"-ticket-data.csv", index=False)
     print("CSV files created successfully for all suppliers in ./processed-data/wood/\n")
 
 def process_data(input_xlsx, output_csv):
     # Read the XLSX file into a DataFrame
     try:
-        df = pd.read_excel(input_xlsx)
+        df = read_master_data(input_xlsx, SCHEMA)
     except FileNotFoundError:
         sys.exit(print("\nThe system doesn't work!\n"))
 
-    # Create a new DataFrame to store the transformed data
-    transformed_data = pd.DataFrame(columns=[
+    # Columns for the transformed data
+    columns = [
         "Product",
         "Manufacturer",
         "Species",
@@ -40,41 +61,41 @@ def process_data(input_xlsx, output_csv):
         "Thickness",
         "Price",
         "Twickenham",
-        "Richmond"])
+        "Richmond"]
+
+    # Each ticket is collected as a list, then turned into a DataFrame at the end
+    rows = []
 
     # Iterate through each row in the original DataFrame
-    for _, row in df.iterrows():
+    for product in SCHEMA.records(df):
         # Capture the product name and remove anything inside [square brackets]
-        product_name = re.sub(r"\[.*?\]|\(.*?\)", "", row["Description"])
-        discontinued = row["Discontinued?"]
+        product_name = re.sub(r"\[.*?\]|\(.*?\)", "", product.description)
+        discontinued = product.discontinued
 
         # Check locations
-        if isinstance(row['Location'], str):
-            location_list = row['Location']
+        if isinstance(product.location, str):
+            location_list = product.location
         else:
             location_list = ""
 
         # Check if product has been assigned to the website and not discontinued
         if not discontinued == "Yes":
-            # Create a new DataFrame with the desired structure
-            new_data = pd.DataFrame({
-                "Product": [product_name],
-                "Manufacturer": [row["Manufacturer"]],
-                "Species": [row["Species"]],
-                "Finish": [row["Finish"]],
-                "Width & Length": [generate_width_length(row["Width"], row["Length"])],
-                "Thickness": [generate_thickness(row["Thickness"])],
-                "Price": [generate_price(row["SQM sell inc VAT"])],
-                "Twickenham": "Yes" if "Twickenham" in location_list else None,
-                "Richmond": "Yes" if "Richmond" in location_list else None,
-            })
-
-            # Concatenate the new data with the existing DataFrame
-            transformed_data = pd.concat([transformed_data.astype(transformed_data.dtypes),
-                                          new_data.astype(transformed_data.dtypes)])
+            rows.append([
+                product_name,
+                product.manufacturer,
+                product.species,
+                product.finish,
+                generate_width_length(product.width, product.length),
+                generate_thickness(product.thickness),
+                generate_price(product.sqm_sell_inc_vat),
+                "Yes" if "Twickenham" in location_list else None,
+                "Yes" if "Richmond" in location_list else None,
+            ])
 
         else:
-            discontinued_ranges.append(f"{row["Manufacturer"]} {product_name}")
+            discontinued_ranges.append(f"{product.manufacturer} {product_name}")
+
+    transformed_data = pd.DataFrame(rows, columns=columns, dtype=object)
 
     # Print some information to the screen and a list of skipped products
     print("\nWood Ticket Data Generator\n(c) 2024 Woven & Woods\nwj@wovenandwoods.com")
@@ -89,7 +110,8 @@ def process_data(input_xlsx, output_csv):
 
     # Write the transformed data to a CSV file
     sorted_data = transformed_data.sort_values(by=["Manufacturer", "Product"])
-    sorted_data.to_csv(output_csv, index=False)
+    with stage("export"):
+        sorted_data.to_csv(output_csv, index=False)
     print(f"CSV file '{output_csv}' created successfully!\n")
 
     export_supplier_data(transformed_data)
@@ -114,6 +136,7 @@ output_dir = "./processed-data"
 if input_file:
     print(f"Selected file: {input_file}")
     output_file = f"{output_dir}/simpro-{input_file.split('/')[-1].replace('.xlsx', '')}-ticket-data.csv"
-    process_data(input_file, output_file)
+    with stage("convert"):
+        process_data(input_file, output_file)
 else:
     print("No file selected.")
\ No newline at end of file
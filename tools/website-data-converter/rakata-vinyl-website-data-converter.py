@@ -10,8 +10,29 @@ via WP All Import.
 
 import pandas as pd
 import sys
-import string
-import unicodedata
+import os
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.instrument import stage
+from common.productdb import read_master_data
+from common.schemas import CATEGORY, MIXED, NUMBER, TEXT, Schema
+from common.slugs import image_url_column, slug_column
+
+# The columns used from the master workbook
+SCHEMA = Schema("vinyl website data", {
+    "SKU": TEXT,
+    "Product": TEXT,
+    "Manufacturer": CATEGORY,
+    "Category": CATEGORY,
+    "Width": MIXED,
+    "Length": MIXED,
+    "Thickness": MIXED,
+    "Colours": MIXED,
+    "Sell ex VAT": NUMBER,
+    "Sell inc VAT": NUMBER,
+    "Show on Website?": CATEGORY,
+    "Discontinued?": CATEGORY,
+})
 
 # Create lists of products which have been skipped because they are either
 # discontinued or not marked for addition to the website
@@ -22,12 +43,12 @@ not_on_website = []
 def process_data(input_xlsx):
     # Read the XLSX file into a DataFrame
     try:
-        df = pd.read_excel(input_xlsx)
+        df = read_master_data(input_xlsx, SCHEMA)
     except FileNotFoundError:
         sys.exit(print("\nThe system doesn't work!\n"))
 
-    # Create a new DataFrame to store the transformed data
-    transformed_data = pd.DataFrame(columns=[
+    # Columns for the transformed data
+    columns = [
         "SKU",
         "Product",
         "Manufacturer",
@@ -40,69 +61,55 @@ def process_data(input_xlsx):
         "Colour",
         "Slug",
         "Image URL"
-    ])
+    ]
+
+    # Each variation is collected as a dict, then turned into a DataFrame at the end
+    rows = []
+    image_categories = []
 
     # Iterate through each row in the original DataFrame
-    for _, row in df.iterrows():
-        product_name = row["Product"]
-        colours = row["Colours"]
-        on_website = row["Show on Website?"]
-        discontinued = row["Discontinued?"]
+    for product in SCHEMA.records(df):
+        product_name = product.product
+        colours = product.colours
+        on_website = product.show_on_website
+        discontinued = product.discontinued
 
         # Check if product has been assigned to the website and not discontinued
         if on_website == "Yes" and discontinued != "Yes":
-            # If Colours field is empty or not a string, skip it
+            # If Colours field is empty or not a string, there is a single row without a colour
             if not (isinstance(colours, str)):
-                # Create a new DataFrame with the desired structure
-                new_data = pd.DataFrame({
-                    "SKU": [row["SKU"]],
-                    "Product": [product_name],
-                    "Manufacturer": [row["Manufacturer"]],
-                    "Category": [f"Luxury Vinyl Flooring"],
-                    "Width": [row["Width"]],
-                    "Length": [row["Length"]],
-                    "Thickness": [row["Thickness"]],
-                    "Sell ex VAT": [row["Sell ex VAT"]],
-                    "Sell inc VAT": [row["Sell inc VAT"]],
-                    "Colour": [""],
-                    "Slug": [generate_slug(product_name, "")],
-                    "Image URL": [generate_image_url(row["Category"], row["Manufacturer"], product_name, "")]
-                })
-
-                # Concatenate the new data with the existing DataFrame
-                transformed_data = pd.concat([transformed_data.astype(transformed_data.dtypes),
-                                              new_data.astype(transformed_data.dtypes)])
-
+                colour_list = [""]
             else:
                 # Split comma-separated colours and create new rows
-                colour_list = colours.split(",")
-                for colour in colour_list:
-                    # Create a new DataFrame with the desired structure
-                    new_data = pd.DataFrame({
-                        "SKU": [row["SKU"]],
-                        "Product": [product_name],
-                        "Manufacturer": [row["Manufacturer"]],
-                        "Category": [f"Luxury Vinyl Flooring"],
-                        "Width": [row["Width"]],
-                        "Length": [row["Length"]],
-                        "Thickness": [row["Thickness"]],
-                        "Sell ex VAT": [row["Sell ex VAT"]],
-                        "Sell inc VAT": [row["Sell inc VAT"]],
-                        "Colour": [colour.strip()],  # Include colour after stripping
-                        "Slug": [generate_slug(product_name, colour.strip())],
-                        "Image URL": [
-                            generate_image_url(row["Category"], row["Manufacturer"], product_name, colour.strip())]
-                    })
-
-                    # Concatenate the new data with the existing DataFrame
-                    transformed_data = pd.concat([transformed_data.astype(transformed_data.dtypes),
-                                                  new_data.astype(transformed_data.dtypes)])
+                colour_list = [colour.strip() for colour in colours.split(",")]
+
+            for colour in colour_list:
+                rows.append({
+                    "SKU": product.sku,
+                    "Product": product_name,
+                    "Manufacturer": product.manufacturer,
+                    "Category": f"Luxury Vinyl Flooring",
+                    "Width": product.width,
+                    "Length": product.length,
+                    "Thickness": product.thickness,
+                    "Sell ex VAT": product.sell_ex_vat,
+                    "Sell inc VAT": product.sell_inc_vat,
+                    "Colour": colour,
+                })
+                image_categories.append(product.category)
 
         else:
             if discontinued == "Yes":
-                discontinued_ranges.append(f"{row["Manufacturer"]} {product_name}")
+                discontinued_ranges.append(f"{product.manufacturer} {product_name}")
             if on_website != "Yes":
-                not_on_website.append(f"{row["Manufacturer"]} {product_name}")
+                not_on_website.append(f"{product.manufacturer} {product_name}")
+
+    # The slugs and image URLs are generated for all the rows at once
+    transformed_data = pd.DataFrame(rows, columns=columns, dtype=object)
+    transformed_data["Slug"] = slug_column(transformed_data["Product"], transformed_data["Colour"])
+    transformed_data["Image URL"] = image_url_column(image_categories, transformed_data["Manufacturer"],
+                                                     transformed_data["Product"], transformed_data["Colour"],
+                                                     colourless_slug=False, slugs=transformed_data["Slug"])
 
     # Print some information to the screen and a list of skipped products
     print("\nVinyl Website Data Generator\n(c) 2024 Woven & Woods\nwj@wovenandwoods.com")
@@ -117,63 +124,13 @@ def process_data(input_xlsx):
 
 
 
-def generate_slug(product_name, colour):
-    # Check if the colour is blank (empty or contains only whitespace)
-    if not colour.strip():
-        slug_str = product_name.lower()  # Use only the product name
-    else:
-        slug_str = f"{product_name}-{colour}"
-
-    # Process the slug
-    slug = (
-        slug_str
-        .replace("-", " ")  # Replace existing hyphens with spaces (for handling multiple words)
-        .replace("'", "")  # Remove apostrophees
-        .translate(str.maketrans("", "", string.punctuation))  # Remove punctuation
-        .replace(" ", "-")  # Replace spaces with hyphens
-        .rstrip("-")  # Removes any trailing "-" characters
-    )
-    slug = unicodedata.normalize("NFKD", slug).encode("ascii", "ignore").decode("ascii")  # Remove accents
-    return compress_dashes(slug.lower())  # Remove any repeating dashes and convert to all lowercase
-
-
-def generate_image_url(category, manufacturer, product_name, colour):
-    # Process the product name
-    processed_product_name = (
-        product_name
-        .replace("-", " ")  # Replace existing hyphens with spaces (for handling multiple words)
-        .replace("'", "")  # Remove apostrophees
-        .translate(str.maketrans("", "", string.punctuation))  # Remove punctuation
-        .replace(" ", "-")  # Replace spaces with hyphens
-    )
-
-    # Construct the image URL
-    if len(colour) > 0:
-        image_url = (f"product-images/{category}/{manufacturer}/{processed_product_name}/"
-                     f"{generate_slug(product_name, colour)}.jpg")
-    else:
-        image_url = f"product-images/{category}/{manufacturer}/{processed_product_name}.jpg"
-
-    # Clean the URL (compress consecutive dashes; replace spaces with hyphens)
-    return compress_dashes(image_url.replace(" ", "-").lower())
-
-
-# Replace consecutive dashes with a single dash. Bit of a bodge, to be honest.
-def compress_dashes(text):
-    compressed_text = ""
-    prev_char = None
-    for char in text:
-        if char == "-" and prev_char == "-":
-            continue
-        compressed_text += char
-        prev_char = char
-    return compressed_text
-
-
 # File locations
 supplier_xlsx_file = "../../data/suppliers.xlsx"
 input_xlsx_file = "../../data/vinyl.xlsx"
 output_csv_file = "./processed-data/vinyl_website_data.csv"
 
-process_data(input_xlsx_file).to_csv(output_csv_file, index=False)
+with stage("convert"):
+    transformed_data = process_data(input_xlsx_file)
+with stage("export"):
+    transformed_data.to_csv(output_csv_file, index=False)
 print(f"CSV file '{output_csv_file}' created successfully!\n")
@@ -12,19 +12,42 @@ import pandas as pd
 import sys
 from tkinter import Tk
 from tkinter.filedialog import askopenfilename
-import unicodedata
-import string
+import os
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.instrument import stage
+from common.productdb import read_master_data
+from common.schemas import MIXED, NUMBER, TEXT, Schema
+from common.slugs import image_url_column, slug_column
+
+# The columns used from the workbook
+SCHEMA = Schema("wood website data", {
+    "Part Number": TEXT,
+    "Description": TEXT,
+    "Manufacturer": TEXT,
+    "Group": TEXT,
+    "Subgroup 1": TEXT,
+    "Species": TEXT,
+    "Finish": TEXT,
+    "Width": MIXED,
+    "Length": MIXED,
+    "Thickness": MIXED,
+    "Pack Quantity": MIXED,
+    "SQM sell inc VAT": NUMBER,
+    "Show on Website?": TEXT,
+    "Discontinued?": TEXT,
+})
 
 
 def process_data(input_data, output_data):
     # Read the XLSX file into a DataFrame
     try:
-        df = pd.read_excel(input_data)
+        df = read_master_data(input_data, SCHEMA)
     except FileNotFoundError:
         sys.exit(print("\nThe system doesn't work!\n"))
 
-    # Create a new DataFrame to store the transformed data
-    transformed_data = pd.DataFrame(columns=[
+    # Columns for the transformed data
+    columns = [
         "SKU",
         "Product",
         "Manufacturer",
@@ -38,7 +61,11 @@ def process_data(input_data, output_data):
         "Pack Quantity",
         "Sell ex VAT",
         "Slug",
-        "Image URL"])
+        "Image URL"]
+
+    # Each product is collected as a dict, then turned into a DataFrame at the end
+    rows = []
+    image_categories = []
 
     # Create lists of products which have been skipped because they are either
     # discontinued or not marked for addition to the website
@@ -46,40 +73,41 @@ def process_data(input_data, output_data):
     not_on_website = []
 
     # Iterate through each row in the original DataFrame
-    for _, row in df.iterrows():
-        product_name = row["Description"]
-        on_website = row["Show on Website?"]
-        discontinued = row["Discontinued?"]
+    for product in SCHEMA.records(df):
+        product_name = product.description
+        on_website = product.show_on_website
+        discontinued = product.discontinued
 
         # Check if product has been assigned to the website and not discontinued
         if on_website == "Yes" and discontinued != "Yes":
-            # Create a new DataFrame with the desired structure
-            new_data = pd.DataFrame({
-                "SKU": [row["Part Number"]],
-                "Product": [product_name],
-                "Manufacturer": [row["Manufacturer"]],
-                "Category": [f"{row["Group"]} > {row['Subgroup 1']}"],
-                "Type": [row["Subgroup 1"]],
-                "Species": [row["Species"]],
-                "Finish": [row["Finish"]],
-                "Length": [row["Length"]],
-                "Width": [str(row["Width"])],
-                "Thickness": [row["Thickness"]],
-                "Pack Quantity": [row["Pack Quantity"]],
-                "Sell ex VAT": [generate_ex_vat(row["SQM sell inc VAT"])],
-                "Slug": [generate_slug(product_name)],
-                "Image URL": [generate_image_url(row["Group"], row["Manufacturer"], product_name)]
+            rows.append({
+                "SKU": product.part_number,
+                "Product": product_name,
+                "Manufacturer": product.manufacturer,
+                "Category": f"{product.group} > {product.subgroup_1}",
+                "Type": product.subgroup_1,
+                "Species": product.species,
+                "Finish": product.finish,
+                "Length": product.length,
+                "Width": str(product.width),
+                "Thickness": product.thickness,
+                "Pack Quantity": product.pack_quantity,
+                "Sell ex VAT": generate_ex_vat(product.sqm_sell_inc_vat),
             })
-
-            # Concatenate the new data with the existing DataFrame
-            transformed_data = pd.concat([transformed_data.astype(transformed_data.dtypes),
-                                          new_data.astype(transformed_data.dtypes)])
+            image_categories.append(product.group)
 
         else:
             if discontinued == "Yes":
-                discontinued_ranges.append(f"{row["Manufacturer"]} {product_name}")
+                discontinued_ranges.append(f"{product.manufacturer} {product_name}")
             if on_website != "Yes":
-                not_on_website.append(f"{row["Manufacturer"]} {product_name}")
+                not_on_website.append(f"{product.manufacturer} {product_name}")
+
+    # The slugs and image URLs are generated for all the rows at once. Wood images aren't kept in product folders.
+    transformed_data = pd.DataFrame(rows, columns=columns, dtype=object)
+    transformed_data["Slug"] = slug_column(transformed_data["Product"])
+    transformed_data["Image URL"] = image_url_column(image_categories, transformed_data["Manufacturer"],
+                                                     transformed_data["Product"], slugs=transformed_data["Slug"],
+                                                     product_folders=False)
 
     # Print some information to the screen and a list of skipped products
     print("\nWood Website Data Generator\n(c) 2024 Woven & Woods\nwj@wovenandwoods.com")
@@ -92,45 +120,11 @@ def process_data(input_data, output_data):
 
     # Write the transformed data to a CSV file
     sorted_data = transformed_data.sort_values(by=["Manufacturer", "Product"])
-    sorted_data.to_csv(output_data, index=False)
+    with stage("export"):
+        sorted_data.to_csv(output_data, index=False)
     print(f"CSV file '{output_data}' created successfully!\n")
 
 
-def generate_slug(product_name):
-    # Generate the slug
-    slug = (
-        product_name
-        .replace("-", " ")  # Replace existing hyphens with spaces (for handling multiple words)
-        .replace("'", "")  # Remove apostrophees
-        .translate(str.maketrans("", "", string.punctuation))  # Remove punctuation
-        .replace(" ", "-")  # Replace spaces with hyphens
-        .rstrip("-")  # Removes any trailing "-" characters
-
-    )
-    slug = unicodedata.normalize("NFKD", slug).encode("ascii", "ignore").decode("ascii")  # Remove accents
-    return compress_dashes(slug.lower())  # Remove any repeating dashes and convert to all lowercase
-
-
-def generate_image_url(category, manufacturer, product_name):
-    # Construct the image URL
-    image_url = f"product-images/{category}/{manufacturer}/{generate_slug(product_name)}.jpg"
-
-    # Clean the URL (compress consecutive dashes; replace spaces with hyphens)
-    return compress_dashes(image_url.replace(" ", "-").lower())
-
-
-# Replace consecutive dashes with a single dash. Bit of a bodge, to be honest.
-def compress_dashes(text):
-    compressed_text = ""
-    prev_char = None
-    for char in text:
-        if char == "-" and prev_char == "-":
-            continue
-        compressed_text += char
-        prev_char = char
-    return compressed_text
-
-
 def generate_ex_vat(sell_inc_vat):
     return sell_inc_vat / 1.2
 
@@ -142,6 +136,7 @@ output_dir = "./processed-data"
 if input_file:
     print(f"Selected file: {input_file}")
     output_file = f"{output_dir}/simpro-{input_file.split('/')[-1].replace('.xlsx', '')}-website-data.csv"
-    process_data(input_file, output_file)
+    with stage("convert"):
+        process_data(input_file, output_file)
 else:
     print("No file selected.")
@@ -10,19 +10,38 @@ from tkinter import Tk
 from tkinter.filedialog import askopenfilename
 import pandas as pd
 import sys
-from replace_accents import replace_accents_characters
+import os
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.instrument import stage
+from common.productdb import read_master_data
+from common.schemas import MIXED, NUMBER, TEXT, Schema
+
+# The columns used from the workbook
+SCHEMA = Schema("carpet website data", {
+    "Part Number": TEXT,
+    "Description": TEXT,
+    "Range": TEXT,
+    "Colour": MIXED,
+    "Manufacturer": TEXT,
+    "Group": TEXT,
+    "Material": TEXT,
+    "SQM Sell inc VAT": NUMBER,
+    "Tags": TEXT,
+    "Show on Website?": TEXT,
+    "Discontinued?": TEXT,
+})
 
 # Lists to track discontinued and non-website products
 discontinued_ranges = []
 not_on_website = []
-ranges_seen = []
+ranges_seen = set()
 
 
 # Function to generate a slug from a product name
 def clean_string(input_string):
     cleaned_string = ""
     previous_char = ""
-    replace_accents_characters(input_string)
     for char in input_string.replace(" ", "-").replace("&", "and"):
         if char == "-" and previous_char == "-":
             pass
@@ -46,57 +65,69 @@ def generate_image_url(category, manufacturer, product_range, product_colour):
 # Process the data
 def main(input_data, output_data):
     try:
-        df = pd.read_excel(input_data)
+        df = read_master_data(input_data, SCHEMA)
     except ValueError:
         sys.exit(print(f"\nNot a valid Excel file: {input_data}\n"))
 
-    transformed_data = pd.DataFrame()
+    # Each product is collected as a dict, then turned into a DataFrame at the end
+    rows = []
 
     previous_range = ""
     previous_parent_sku = ""
 
-    for _, row in df.iterrows():
-        product_name = row["Description"]
-        on_website = row["Show on Website?"]
-        discontinued = row["Discontinued?"]
-        range_colour = f"{row["Range"]} {row["Colour"]}"
+    for product in SCHEMA.records(df):
+        product_name = product.description
+        on_website = product.show_on_website
+        discontinued = product.discontinued
+        range_colour = f"{product.range} {product.colour}"
 
         # Parent SKU
-        if previous_range == row['Range']:
+        if previous_range == product.range:
             parent_sku = previous_parent_sku
         else:
-            parent_sku = row['Part Number']
+            parent_sku = product.part_number
 
         if on_website == "Yes" and discontinued != "Yes" and range_colour not in ranges_seen:
-            new_data = pd.DataFrame({
-                "SKU": [row["Part Number"]],
-                "Parent SKU": [previous_parent_sku if row['Range'] == previous_range else row['Part Number']],
-                "Product": [product_name],
-                "Range": [row['Range']],
-                "Colour": [str(row['Colour']) if 'Colour' in df.columns else ""],
-                "Manufacturer": [row["Manufacturer"]],
-                "Category": [row["Group"]],
-                "Material": [row["Material"]],
-                "Sell ex VAT": [row["SQM Sell inc VAT"] / 1.2],
-                "Slug": [generate_slug(row['Range'], row["Colour"])],
-                "Image URL": [generate_image_url(row["Group"], row["Manufacturer"], row['Range'],
-                                                 generate_slug(row['Range'], row["Colour"]))],
-                "Tags": [row["Tags"]]
+            rows.append({
+                "SKU": product.part_number,
+                "Parent SKU": previous_parent_sku if product.range == previous_range else product.part_number,
+                "Product": product_name,
+                "Range": product.range,
+                "Colour": str(product.colour),
+                "Manufacturer": product.manufacturer,
+                "Category": product.group,
+                "Material": product.material,
+                "Sell ex VAT": product.sqm_sell_inc_vat / 1.2,
+                "Slug": generate_slug(product.range, product.colour),
+                "Image URL": generate_image_url(product.group, product.manufacturer, product.range,
+                                                generate_slug(product.range, product.colour)),
+                "Tags": product.tags,
             })
-
-            transformed_data = pd.concat([transformed_data.astype(transformed_data.dtypes),
-                                          new_data.astype(transformed_data.dtypes)])
         else:
             if discontinued == "Yes":
-                discontinued_ranges.append(f"{row['Manufacturer']} {product_name}")
+                discontinued_ranges.append(f"{product.manufacturer} {product_name}")
             if on_website != "Yes":
-                not_on_website.append(f"{row['Manufacturer']} {product_name}")
+                not_on_website.append(f"{product.manufacturer} {product_name}")
 
-        ranges_seen.append(range_colour)
+        ranges_seen.add(range_colour)
 
-        previous_range = row["Range"]
+        previous_range = product.range
         previous_parent_sku = parent_sku
 
+    transformed_data = pd.DataFrame(rows, columns=[
+        "SKU",
+        "Parent SKU",
+        "Product",
+        "Range",
+        "Colour",
+        "Manufacturer",
+        "Category",
+        "Material",
+        "Sell ex VAT",
+        "Slug",
+        "Image URL",
+        "Tags"], dtype=object)
+
     print("\nsimPRO -> Website Carpet Data\n(c) 2024 Woven & Woods\nwj@wovenandwoods.com")
     print("\nDiscontinued Ranges\n---------------------")
     if len(discontinued_ranges) > 0:
@@ -105,7 +136,8 @@ def main(input_data, output_data):
     else:
         print("None\n")
 
-    transformed_data.to_csv(output_data, index=False, encoding="utf-8")
+    with stage("export"):
+        transformed_data.to_csv(output_data, index=False, encoding="utf-8")
     print(f"\nCSV file '{output_data}' created successfully!\n")
 
 
@@ -117,6 +149,7 @@ if __name__ == "__main__":
     if input_file:
         print(f"Selected file: {input_file}")
         output_file = f"{output_dir}/{input_file.split('/')[-1].replace('.xlsx', '')}-website.csv"
-        main(input_file, output_file)
+        with stage("convert"):
+            main(input_file, output_file)
     else:
         print("No file selected.")
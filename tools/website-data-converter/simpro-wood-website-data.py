@@ -10,7 +10,30 @@ from tkinter import Tk
 from tkinter.filedialog import askopenfilename
 import pandas as pd
 import sys
-from replace_accents import replace_accents_characters
+import os
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.instrument import stage
+from common.productdb import read_master_data
+from common.schemas import MIXED, NUMBER, TEXT, Schema
+
+# The columns used from the workbook
+SCHEMA = Schema("wood website data", {
+    "Part Number": TEXT,
+    "Description": TEXT,
+    "Manufacturer": TEXT,
+    "Group": TEXT,
+    "Species": TEXT,
+    "Finish": TEXT,
+    "Width": MIXED,
+    "Length": MIXED,
+    "Thickness": MIXED,
+    "Wear Layer": MIXED,
+    "SQM Sell inc VAT": NUMBER,
+    "Tags": TEXT,
+    "Show on Website?": TEXT,
+    "Discontinued?": TEXT,
+})
 
 # Lists to track discontinued and non-website products
 discontinued_ranges = []
@@ -22,7 +45,6 @@ ranges_seen = []
 def clean_string(input_string):
     cleaned_string = ""
     previous_char = ""
-    replace_accents_characters(input_string)
     for char in input_string.replace(" ", "-").replace("&", "and"):
         if char == "-" and previous_char == "-":
             pass
@@ -41,43 +63,58 @@ def generate_image_url(category, manufacturer, product_name):
 # Process the data
 def main(input_data, output_data):
     try:
-        df = pd.read_excel(input_data)
+        df = read_master_data(input_data, SCHEMA)
     except ValueError:
         sys.exit(print(f"\nNot a valid Excel file: {input_data}\n"))
 
-    transformed_data = pd.DataFrame()
+    # Each product is collected as a dict, then turned into a DataFrame at the end
+    rows = []
 
-    for _, row in df.iterrows():
-        product_name = row["Description"]
-        on_website = row["Show on Website?"]
-        discontinued = row["Discontinued?"]
+    for product in SCHEMA.records(df):
+        product_name = product.description
+        on_website = product.show_on_website
+        discontinued = product.discontinued
 
         if on_website == "Yes" and discontinued != "Yes":
-            new_data = pd.DataFrame({
-                "SKU": [row["Part Number"]],
-                "Parent SKU": [row["Part Number"]],
-                "Product": [product_name],
-                "Manufacturer": [row["Manufacturer"]],
-                "Category": [row["Group"]],
-                "Species": [row["Species"]],
-                "Finish": [row["Finish"]],
-                "Width": [row["Width"]],
-                "Length": [row["Length"]],
-                "Thickness": [row["Thickness"]],
-                "Wear Layer": [row["Wear Layer"]],
-                "Sell ex VAT": [row["SQM Sell inc VAT"] / 1.2],
-                "Slug": [clean_string(product_name)],
-                "Image URL": [generate_image_url(row["Group"], row["Manufacturer"], product_name)],
-                "Tags": [row["Tags"]]
+            rows.append({
+                "SKU": product.part_number,
+                "Parent SKU": product.part_number,
+                "Product": product_name,
+                "Manufacturer": product.manufacturer,
+                "Category": product.group,
+                "Species": product.species,
+                "Finish": product.finish,
+                "Width": product.width,
+                "Length": product.length,
+                "Thickness": product.thickness,
+                "Wear Layer": product.wear_layer,
+                "Sell ex VAT": product.sqm_sell_inc_vat / 1.2,
+                "Slug": clean_string(product_name),
+                "Image URL": generate_image_url(product.group, product.manufacturer, product_name),
+                "Tags": product.tags,
             })
-
-            transformed_data = pd.concat([transformed_data.astype(transformed_data.dtypes),
-                                          new_data.astype(transformed_data.dtypes)])
         else:
             if discontinued == "Yes":
-                discontinued_ranges.append(f"{row['Manufacturer']} {product_name}")
+                discontinued_ranges.append(f"{product.manufacturer} {product_name}")
             if on_website != "Yes":
-                not_on_website.append(f"{row['Manufacturer']} {product_name}")
+                not_on_website.append(f"{product.manufacturer} {product_name}")
+
+    transformed_data = pd.DataFrame(rows, columns=[
+        "SKU",
+        "Parent SKU",
+        "Product",
+        "Manufacturer",
+        "Category",
+        "Species",
+        "Finish",
+        "Width",
+        "Length",
+        "Thickness",
+        "Wear Layer",
+        "Sell ex VAT",
+        "Slug",
+        "Image URL",
+        "Tags"], dtype=object)
 
     print("\nsimPRO -> Website Wood Data\n(c) 2024 Woven & Woods\nwj@wovenandwoods.com")
     print("\nDiscontinued Ranges\n---------------------")
@@ -87,7 +124,8 @@ def main(input_data, output_data):
     else:
         print("None\n")
 
-    transformed_data.to_csv(output_data, index=False, encoding="utf-8")
+    with stage("export"):
+        transformed_data.to_csv(output_data, index=False, encoding="utf-8")
     print(f"\nCSV file '{output_data}' created successfully!\n")
 
 
@@ -99,6 +137,7 @@ if __name__ == "__main__":
     if input_file:
         print(f"Selected file: {input_file}")
         output_file = f"{output_dir}/{input_file.split('/')[-1].replace('.xlsx', '')}-website.csv"
-        main(input_file, output_file)
+        with stage("convert"):
+            main(input_file, output_file)
     else:
         print("No file selected.")